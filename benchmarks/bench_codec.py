@@ -0,0 +1,196 @@
+# Microbenchmarks for frame parsing, unit conversion and serialization hot paths.
+#
+# Frames are the real captures from tests, history is also scaled up to the largest size the
+# protocol can carry. Run with dev dependencies installed (test modules import pytest and bleak):
+#
+#   python benchmarks/bench_codec.py
+#   python benchmarks/bench_codec.py -k history
+#   python benchmarks/bench_codec.py --save baseline.json
+#   python benchmarks/bench_codec.py --compare baseline.json --threshold 0.2
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from struct import pack
+from typing import Any
+
+from runner import Benchmark, main
+
+from radoneye import interface_v1, interface_v2
+from radoneye.util import (
+    convert_radon_value,
+    read_short_list,
+    round_pci_l,
+    serialize_object,
+    to_bq_m3,
+    to_pci_l,
+)
+
+TESTS_DIR = Path(__file__).resolve().parent.parent / "tests" / "radoneye"
+
+# V1 history size is uint16
+V1_HISTORY_MAX_SIZE = 0xFFFF
+
+# V2 page count and values per page are uint8, device sends up to 250 values per page
+V2_HISTORY_MAX_PAGES = 0xFF
+V2_HISTORY_PAGE_VALUES = 250
+
+
+def load_test_module(name: str) -> Any:
+    spec = importlib.util.spec_from_file_location(name, TESTS_DIR / f"{name}.py")
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def repeat_values(values: list[int], size: int) -> list[int]:
+    return [values[i % len(values)] for i in range(size)]
+
+
+def v1_history_frames(values: list[int]) -> list[bytes]:
+    # E8 with size, followed by E9 frames (20 bytes each)
+    msg_e8 = bytes([interface_v1.COMMAND_STATUS_E8, 0x0B]) + pack("<H", len(values))
+    data = pack(f"<{len(values)}H", *values)
+    return [msg_e8.ljust(20, b"\x00")] + [data[i : i + 20] for i in range(0, len(data), 20)]
+
+
+def v2_history_frames(values: list[int]) -> list[bytes]:
+    pages = [
+        values[i : i + V2_HISTORY_PAGE_VALUES]
+        for i in range(0, len(values), V2_HISTORY_PAGE_VALUES)
+    ]
+    return [
+        bytes([interface_v2.COMMAND_HISTORY, len(pages), page_no, len(page)])
+        + pack(f"<{len(page)}H", *page)
+        for page_no, page in enumerate(pages, 1)
+    ]
+
+
+def parse_v2_pages(frames: list[bytes]) -> list[interface_v2.RadonEyeHistoryPage]:
+    # parse_history_page consumes header from buffer, so every call needs a fresh copy
+    return [interface_v2.parse_history_page(bytearray(frame)) for frame in frames]
+
+
+def build_benchmarks() -> list[Benchmark]:
+    v1 = load_test_module("test_interface_v1")
+    v2 = load_test_module("test_interface_v2")
+
+    v1_status = [
+        bytearray(msg)
+        for msg in [v1.msg_50, v1.msg_51, v1.msg_a4, v1.msg_a6, v1.msg_a8, v1.msg_ac, v1.msg_af]
+    ]
+    v2_status = v2.dump_to_bytearray(v2.msg_40_v2)
+    v3_status = v2.dump_to_bytearray(v2.msg_40_v3)
+
+    v1_sample_frames: list[bytes] = [v1.msg_e8, *v1.msg_e9]
+    v1_sample_size = interface_v1.parse_history_size(bytearray(v1.msg_e8))
+    v1_sample_data = bytearray(b"".join(v1.msg_e9))
+    v1_values = read_short_list(v1_sample_data, 0, v1_sample_size)
+    v1_max_frames = v1_history_frames(repeat_values(v1_values, V1_HISTORY_MAX_SIZE))
+    v1_max_data = bytearray(b"".join(v1_max_frames[1:]))
+
+    v2_sample_frames = [bytes.fromhex(msg) for msg in v2.msg_41]
+    v2_sample_pages = parse_v2_pages(v2_sample_frames)
+    v2_values = [value for page in v2_sample_pages for value in page["values_bq_m3"]]
+    v2_max_size = V2_HISTORY_MAX_PAGES * V2_HISTORY_PAGE_VALUES
+    v2_max_frames = v2_history_frames(repeat_values(v2_values, v2_max_size))
+    v2_max_pages = parse_v2_pages(v2_max_frames)
+
+    status = interface_v2.parse_status(v2_status)
+    history = interface_v2.merge_history(v2_max_pages)
+    values_bq_m3 = history["values_bq_m3"]
+    values_pci_l = history["values_pci_l"]
+
+    return [
+        # status
+        Benchmark("v1.parse_status", lambda: interface_v1.parse_status(*v1_status)),
+        Benchmark("v2.parse_status", lambda: interface_v2.parse_status(v2_status)),
+        Benchmark("v3.parse_status", lambda: interface_v2.parse_status(v3_status)),
+        # v1 history
+        Benchmark(
+            "v1.parse_history_data[sample]",
+            lambda: interface_v1.parse_history_data(v1_sample_data, v1_sample_size),
+            v1_sample_size,
+        ),
+        Benchmark(
+            "v1.parse_history_data[max]",
+            lambda: interface_v1.parse_history_data(v1_max_data, V1_HISTORY_MAX_SIZE),
+            V1_HISTORY_MAX_SIZE,
+        ),
+        Benchmark(
+            "v1.parse_history_frames[sample]",
+            lambda: interface_v1.parse_history_frames(v1_sample_frames),
+            v1_sample_size,
+        ),
+        Benchmark(
+            "v1.parse_history_frames[max]",
+            lambda: interface_v1.parse_history_frames(v1_max_frames),
+            V1_HISTORY_MAX_SIZE,
+        ),
+        # v2 history
+        Benchmark(
+            "v2.parse_history_page[sample]",
+            lambda: parse_v2_pages(v2_sample_frames),
+            len(v2_values),
+        ),
+        Benchmark(
+            "v2.parse_history_page[max]",
+            lambda: parse_v2_pages(v2_max_frames),
+            v2_max_size,
+        ),
+        Benchmark(
+            "v2.merge_history[sample]",
+            lambda: interface_v2.merge_history(v2_sample_pages),
+            len(v2_values),
+        ),
+        Benchmark(
+            "v2.merge_history[max]",
+            lambda: interface_v2.merge_history(v2_max_pages),
+            v2_max_size,
+        ),
+        Benchmark(
+            "v2.parse_history_frames[max]",
+            lambda: interface_v2.parse_history_frames(v2_max_frames),
+            v2_max_size,
+        ),
+        # helpers
+        Benchmark(
+            "read_short_list[max]",
+            lambda: read_short_list(v1_max_data, 0, V1_HISTORY_MAX_SIZE),
+            V1_HISTORY_MAX_SIZE,
+        ),
+        Benchmark(
+            "to_pci_l[max]",
+            lambda: [to_pci_l(value) for value in values_bq_m3],
+            len(values_bq_m3),
+        ),
+        Benchmark(
+            "to_bq_m3[max]",
+            lambda: [to_bq_m3(value) for value in values_pci_l],
+            len(values_pci_l),
+        ),
+        Benchmark(
+            "round_pci_l[max]",
+            lambda: [round_pci_l(value) for value in values_pci_l],
+            len(values_pci_l),
+        ),
+        Benchmark(
+            "convert_radon_value[max]",
+            lambda: [convert_radon_value(value, "bq/m3", "pci/l") for value in values_bq_m3],
+            len(values_bq_m3),
+        ),
+        Benchmark("serialize_object[status,text]", lambda: serialize_object(status, "text")),
+        Benchmark("serialize_object[status,json]", lambda: serialize_object(status, "json")),
+        Benchmark(
+            "serialize_object[history,json,max]",
+            lambda: serialize_object(history, "json"),
+            len(values_bq_m3),
+        ),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(build_benchmarks(), "RadonEye codec microbenchmarks"))
@@ -0,0 +1,267 @@
+# Fleet load benchmark: polls N simulated devices concurrently through RadonEyeClient, like the
+# daemon does every cycle, and shows how latency degrades with fleet size. No radio is needed, the
+# link (latency, jitter, lost notifications) is emulated by radoneye.simulator.
+#
+#   python benchmarks/bench_fleet.py
+#   python benchmarks/bench_fleet.py --devices 10 100 500 --cycles 3
+#   python benchmarks/bench_fleet.py --devices 200 --concurrency 8 --drop-rate 0.01 --json
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import sys
+import time
+from typing import Awaitable, NamedTuple, TypedDict
+
+from radoneye.client import RadonEyeClient
+from radoneye.simulator import SimulatedClient, SimulatedDevice
+
+OPERATIONS = ["connect", "status", "history", "disconnect", "cycle"]
+
+LAG_INTERVAL = 0.01  # sec, how often event loop lag is sampled
+
+
+class FleetOptions(NamedTuple):
+    cycles: int
+    concurrency: int | None  # max devices polled at once, like adapter connection limit
+    v1_ratio: float
+    min_history_days: float
+    max_history_days: float
+    drop_rate: float  # max probability of lost notification, every device gets random rate
+    latency: float
+    jitter: float
+    connect_latency: float
+    timeout: float
+    seed: int
+
+
+class OperationStats(TypedDict):
+    count: int
+    failed: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class FleetResult(TypedDict):
+    devices: int
+    wall_time: float
+    cycles_per_sec: float
+    operations: dict[str, OperationStats]
+    errors: dict[str, int]  # "operation: exception type" -> count
+    loop_lag_p99: float
+    loop_lag_max: float
+    peak_rss_mib: float
+
+
+def percentile(values: list[float], p: float) -> float:
+    # nearest rank
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mib() -> float:
+    # whole process peak, includes previous (smaller) runs of the same sweep
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def create_devices(count: int, options: FleetOptions) -> list[tuple[SimulatedDevice, float]]:
+    rand = random.Random(options.seed)
+    devices: list[tuple[SimulatedDevice, float]] = []
+    for index in range(count):
+        days = rand.uniform(options.min_history_days, options.max_history_days)
+        if rand.random() < options.v1_ratio:
+            device = SimulatedDevice(1, uptime_minutes=int(days * 24 * 60), seed=index)
+        else:
+            model = rand.choice(["RD200N", "RD200V3"])
+            device = SimulatedDevice(2, model=model, uptime_minutes=int(days * 24 * 60), seed=index)
+        devices.append((device, rand.uniform(0, options.drop_rate)))
+    return devices
+
+
+async def monitor_lag(lags: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(loop.time() - expected)
+
+
+async def poll_device(
+    device: SimulatedDevice,
+    drop_rate: float,
+    options: FleetOptions,
+    semaphore: asyncio.Semaphore | None,
+    timings: dict[str, list[float]],
+    failures: dict[str, int],
+    errors: dict[str, int],
+) -> None:
+    loop = asyncio.get_running_loop()
+    link = SimulatedClient(
+        device,
+        latency=options.latency,
+        jitter=options.jitter,
+        connect_latency=options.connect_latency,
+        drop_rate=drop_rate,
+        seed=device.seed,
+    )
+    client = RadonEyeClient(
+        f"simulated-{device.seed}",
+        status_read_timeout=options.timeout,
+        history_read_timeout=options.timeout,
+        client=link,
+    )
+
+    async def measure(operation: str, coro: Awaitable[object]) -> bool:
+        start = loop.time()
+        try:
+            await coro
+        except Exception as e:
+            # lost history frames fail fast (page mismatch, short data), lost status times out
+            failures[operation] += 1
+            error = f"{operation}: {type(e).__name__}"
+            errors[error] = errors.get(error, 0) + 1
+            return False
+        timings[operation].append(loop.time() - start)
+        return True
+
+    for _ in range(options.cycles):
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            start = loop.time()
+            ok = (
+                await measure("connect", client.connect())
+                and await measure("status", client.status())
+                and await measure("history", client.history())
+            )
+            await measure("disconnect", client.disconnect())
+            if ok:
+                timings["cycle"].append(loop.time() - start)
+            else:
+                failures["cycle"] += 1
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+
+async def run_fleet(count: int, options: FleetOptions) -> FleetResult:
+    devices = create_devices(count, options)
+    semaphore = asyncio.Semaphore(options.concurrency) if options.concurrency else None
+    timings: dict[str, list[float]] = {operation: [] for operation in OPERATIONS}
+    failures: dict[str, int] = {operation: 0 for operation in OPERATIONS}
+    errors: dict[str, int] = {}
+    lags: list[float] = []
+
+    monitor = asyncio.create_task(monitor_lag(lags))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            poll_device(device, drop_rate, options, semaphore, timings, failures, errors)
+            for device, drop_rate in devices
+        ]
+    )
+    wall_time = time.perf_counter() - start
+    monitor.cancel()
+
+    return {
+        "devices": count,
+        "wall_time": wall_time,
+        "cycles_per_sec": len(timings["cycle"]) / wall_time,
+        "operations": {
+            operation: {
+                "count": len(timings[operation]),
+                "failed": failures[operation],
+                "p50": percentile(timings[operation], 50),
+                "p95": percentile(timings[operation], 95),
+                "p99": percentile(timings[operation], 99),
+                "max": max(timings[operation], default=math.nan),
+            }
+            for operation in OPERATIONS
+        },
+        "errors": errors,
+        "loop_lag_p99": percentile(lags, 99),
+        "loop_lag_max": max(lags, default=math.nan),
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def format_result(result: FleetResult) -> str:
+    lines = [
+        f"devices: {result['devices']}, wall time: {result['wall_time']:.2f}s,"
+        f" {result['cycles_per_sec']:.1f} cycles/s,"
+        f" loop lag p99/max: {result['loop_lag_p99'] * 1000:.1f}/"
+        f"{result['loop_lag_max'] * 1000:.1f} ms, peak rss: {result['peak_rss_mib']:.1f} MiB",
+        f"{'operation':<12}{'ok':>8}{'failed':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'max ms':>10}",
+    ]
+    for operation, stats in result["operations"].items():
+        lines.append(
+            f"{operation:<12}{stats['count']:>8}{stats['failed']:>8}"
+            f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}"
+            f"{stats['p99'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}"
+        )
+    for error, count in sorted(result["errors"].items()):
+        lines.append(f"error {error}: {count}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="RadonEye fleet load benchmark")
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[10, 50, 100], help="fleet sizes to run"
+    )
+    parser.add_argument("--cycles", type=int, default=2, help="poll cycles per device")
+    parser.add_argument("--concurrency", type=int, help="max devices polled at once")
+    parser.add_argument("--v1-ratio", type=float, default=0.3, help="share of V1 devices")
+    parser.add_argument("--min-history-days", type=float, default=1)
+    parser.add_argument("--max-history-days", type=float, default=30)
+    parser.add_argument(
+        "--drop-rate", type=float, default=0.0, help="max notification loss rate per device"
+    )
+    parser.add_argument("--latency", type=float, default=0.03, help="link latency (sec)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="link jitter (sec)")
+    parser.add_argument("--connect-latency", type=float, default=0.5, help="connect time (sec)")
+    parser.add_argument("--timeout", type=float, default=10, help="read timeout (sec)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as json")
+    args = parser.parse_args(argv)
+
+    options = FleetOptions(
+        cycles=args.cycles,
+        concurrency=args.concurrency,
+        v1_ratio=args.v1_ratio,
+        min_history_days=args.min_history_days,
+        max_history_days=args.max_history_days,
+        drop_rate=args.drop_rate,
+        latency=args.latency,
+        jitter=args.jitter,
+        connect_latency=args.connect_latency,
+        timeout=args.timeout,
+        seed=args.seed,
+    )
+
+    results: list[FleetResult] = []
+    for count in args.devices:
+        result = asyncio.run(run_fleet(count, options))
+        results.append(result)
+        if not args.json:
+            print(format_result(result), end="\n\n", flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import re
+import timeit
+import tracemalloc
+from typing import Any, Callable, NamedTuple, TypedDict
+
+
+class Benchmark(NamedTuple):
+    name: str
+    func: Callable[[], Any]
+    items: int = 1  # values (frames, data points) processed by one call
+
+
+class BenchmarkResult(TypedDict):
+    time: float  # sec per call, best of repeats
+    items: int
+    peak_bytes: int  # peak memory allocated during one call (result included)
+
+
+class Baseline(TypedDict):
+    python: str
+    machine: str
+    results: dict[str, BenchmarkResult]
+
+
+def measure_time(func: Callable[[], Any], repeat: int) -> float:
+    # every repeat runs for at least 0.2 sec, the best repeat is the least disturbed by other load
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def measure_memory(func: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+        return peak - start
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> BenchmarkResult:
+    func = benchmark.func
+    func()  # warm up caches (struct formats, lazy imports)
+    # memory is measured separately, tracing slows down allocations a lot
+    return {
+        "time": measure_time(func, repeat),
+        "items": benchmark.items,
+        "peak_bytes": measure_memory(func),
+    }
+
+
+def format_change(value: float, baseline: float) -> str:
+    if baseline == 0:
+        return "n/a"
+    return f"{(value / baseline - 1) * 100:+.1f}%"
+
+
+def format_result(name: str, result: BenchmarkResult, baseline: BenchmarkResult | None) -> str:
+    line = (
+        f"{name:<36} {result['time'] * 1e6:>12.2f} us"
+        f" {result['items'] / result['time']:>14,.0f} items/s"
+        f" {result['peak_bytes'] / 1024:>10.1f} KiB"
+    )
+    if baseline is not None:
+        line += (
+            f"  time {format_change(result['time'], baseline['time']):>8}"
+            f"  mem {format_change(result['peak_bytes'], baseline['peak_bytes']):>8}"
+        )
+    return line
+
+
+def find_regressions(
+    results: dict[str, BenchmarkResult], baseline: Baseline, threshold: float
+) -> list[str]:
+    regressions: list[str] = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["time"] > base["time"] * (1 + threshold):
+            regressions.append(f"{name}: time {format_change(result['time'], base['time'])}")
+        # a few bytes of jitter (allocator, interned values) are not a regression
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + threshold) + 1024:
+            change = format_change(result["peak_bytes"], base["peak_bytes"])
+            regressions.append(f"{name}: memory {change}")
+    return regressions
+
+
+def load_baseline(path: str) -> Baseline:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, results: dict[str, BenchmarkResult]) -> None:
+    baseline: Baseline = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2)
+        file.write("\n")
+
+
+def main(benchmarks: list[Benchmark], description: str, argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-k", "--filter", help="run benchmarks with names matching regex")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats (default: 5)")
+    parser.add_argument("--save", metavar="FILE", help="save results as baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare results with saved baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown or memory growth reported as regression (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    if baseline is not None and baseline["python"] != platform.python_version():
+        print(f"warning: baseline was recorded with python {baseline['python']}")
+
+    results: dict[str, BenchmarkResult] = {}
+    for benchmark in benchmarks:
+        if args.filter and not re.search(args.filter, benchmark.name):
+            continue
+        result = run_benchmark(benchmark, args.repeat)
+        results[benchmark.name] = result
+        base = baseline["results"].get(benchmark.name) if baseline is not None else None
+        print(format_result(benchmark.name, result, base), flush=True)
+
+    if args.save:
+        save_baseline(args.save, results)
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"regressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+
+    return 0
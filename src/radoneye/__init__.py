@@ -1,5 +1,29 @@
 # pyright: reportUnusedImport=false
 # flake8: noqa
 
-from radoneye.client import RadonEyeClient, RadonEyeHistory, RadonEyeStatus
-from radoneye.scanner import RadonEyeScanner
+from typing import TYPE_CHECKING, Any
+
+from radoneye.model import RadonEyeHistory, RadonEyeStatus
+
+if TYPE_CHECKING:
+    from radoneye.client import RadonEyeClient
+    from radoneye.scanner import RadonEyeScanner
+
+# public name -> module, loaded on first access so "import radoneye" stays cheap
+LAZY_ATTRIBUTES = {
+    "RadonEyeClient": "radoneye.client",
+    "RadonEyeScanner": "radoneye.scanner",
+}
+
+__all__ = ["RadonEyeClient", "RadonEyeHistory", "RadonEyeScanner", "RadonEyeStatus"]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'radoneye' has no attribute '{name}'")
+    import importlib
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any
+from urllib.parse import unquote
+
+from radoneye.httpserver import HttpRequest, HttpResponse, HttpServer, parse_listen
+from radoneye.model import RadonEyeHistory, RadonEyeStatus
+from radoneye.output import RadonEyeEvent, RadonEyeOutput
+
+CONTENT_TYPE = "application/json"
+
+
+class DeviceState:
+    def __init__(self, address: str, name: str) -> None:
+        self.address = address
+        self.name = name
+        self.version = 0
+        self.status: RadonEyeStatus | None = None
+        self.status_time: float | None = None
+        self.status_version = 0
+        self.history: RadonEyeHistory | None = None
+        self.history_time: float | None = None
+        self.history_version = 0
+        self.error: str | None = None
+        self.error_time: float | None = None
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "address": self.address,
+            "name": self.name,
+            "time": self.status_time,
+            "status": self.status,
+            "history_time": self.history_time,
+            "error": self.error,
+            "error_time": self.error_time,
+        }
+
+
+# Serves last known device state as JSON. Response bodies are serialized once and reused until
+# the device is read again. ETag is derived from the read that produced the data, so clients can
+# poll with If-None-Match and get cheap 304 responses.
+class ApiOutput(RadonEyeOutput):
+    def __init__(self, listen: str) -> None:
+        self.listen = listen
+        self.devices: dict[str, DeviceState] = {}
+        self.version = 0  # increments on every update of any device
+        # versions start over after restart, instance id keeps old ETags from matching
+        self.instance = f"{int(time.time() * 1000):x}"
+        self.responses: dict[str, HttpResponse] = {}
+        self.server: HttpServer | None = None
+
+    async def start(self) -> None:
+        self.server = HttpServer(self.handle)
+        await self.server.start(*parse_listen(self.listen))
+
+    async def close(self) -> None:
+        if self.server is not None:
+            await self.server.close()
+            self.server = None
+
+    async def emit(self, event: RadonEyeEvent) -> None:
+        address = event["address"]
+        device = self.devices.get(address)
+        if device is None:
+            device = DeviceState(address, event["name"])
+            self.devices[address] = device
+        device.name = event["name"]
+
+        self.version += 1
+        device.version = self.version
+        if event["type"] in ("status", "poll"):
+            # poll has the same status as the previous one, it is still current at poll time
+            if event["type"] == "status":
+                device.status = event["data"]
+            device.status_time = event["time"]
+            device.status_version = self.version
+            device.error = None
+            self.responses.pop(f"/devices/{address}/status", None)
+        elif event["type"] == "history":
+            device.history = event["data"]
+            device.history_time = event["time"]
+            device.history_version = self.version
+            self.responses.pop(f"/devices/{address}/history", None)
+        else:
+            device.error = event["data"]
+            device.error_time = event["time"]
+
+        self.responses.pop(f"/devices/{address}", None)
+        self.responses.pop("/devices", None)
+
+    def render(self, path: str) -> HttpResponse | None:
+        parts = path.strip("/").split("/")
+        if parts[0] != "devices" or len(parts) > 3:
+            return None
+
+        if len(parts) == 1:
+            devices = [self.devices[address] for address in sorted(self.devices.keys())]
+            return self.json_response(
+                {"devices": [device.summary() for device in devices]}, f"f{self.version}"
+            )
+
+        device = self.devices.get(parts[1])
+        if device is None:
+            return None
+
+        if len(parts) == 2:
+            return self.json_response(device.summary(), f"d{device.version}")
+        if parts[2] == "status" and device.status is not None:
+            return self.json_response(
+                {
+                    "address": device.address,
+                    "name": device.name,
+                    "time": device.status_time,
+                    "status": device.status,
+                },
+                f"s{device.status_version}",
+            )
+        if parts[2] == "history" and device.history is not None:
+            return self.json_response(
+                {
+                    "address": device.address,
+                    "name": device.name,
+                    "time": device.history_time,
+                    "history": device.history,
+                },
+                f"h{device.history_version}",
+            )
+        return None
+
+    def handle(self, request: HttpRequest) -> HttpResponse:
+        path = unquote(request.path).rstrip("/") or "/"
+        response = self.responses.get(path)
+        if response is None:
+            response = self.render(path)
+            if response is None:
+                return HttpResponse(404, {"Content-Type": CONTENT_TYPE}, b'{"error":"not found"}')
+            self.responses[path] = response
+
+        etag = response.headers["ETag"]
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and (
+            if_none_match == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+        ):
+            return HttpResponse(304, {"ETag": etag, "Cache-Control": "no-cache"}, b"")
+        return response
+
+    def json_response(self, obj: Any, version: str) -> HttpResponse:
+        return HttpResponse(
+            200,
+            {
+                "Content-Type": CONTENT_TYPE,
+                "ETag": f'"{self.instance}-{version}"',
+                "Cache-Control": "no-cache",
+            },
+            json.dumps(obj, separators=(",", ":")).encode(),
+        )
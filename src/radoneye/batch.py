@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import IO, Any, AsyncIterator
+
+from radoneye.commands import configure_alarm, configure_unit
+from radoneye.pool import RadonEyeConnectionPool
+from radoneye.remote import execute_command, open_remote_client
+
+
+async def read_lines(stream: IO[str]) -> AsyncIterator[str]:
+    # blocking read is done in thread, so commands that are already read keep running
+    while line := await asyncio.to_thread(stream.readline):
+        yield line
+
+
+async def execute_batch_command(client: Any, request: dict[str, Any]) -> Any:
+    command = request.get("command")
+    if command == "alarm":
+        status = request.get("status")
+        if status not in [None, "on", "off"]:
+            raise ValueError(f"Invalid alarm status: {status}")
+        unit = request.get("unit")
+        if unit not in [None, "bq/m3", "pci/l"]:
+            raise ValueError(f"Invalid unit: {unit}")
+        level = request.get("level")
+        interval = request.get("interval")
+        return await configure_alarm(
+            client,
+            status=status,
+            level=float(level) if level is not None else None,
+            unit=unit,
+            interval=int(interval) if interval is not None else None,
+        )
+    if command == "unit":
+        unit = request.get("unit")
+        if unit not in [None, "bq/m3", "pci/l"]:
+            raise ValueError(f"Invalid unit: {unit}")
+        return await configure_unit(client, unit)
+    if command in ["status", "history", "beep"]:
+        return await execute_command(client, request)
+    raise ValueError(f"Unsupported command: {command}")
+
+
+# Executes newline delimited JSON commands like {"command": "status", "address": "..."} and writes
+# one JSON line per command as soon as it completes, so results can come in different order than
+# commands, "id" from command (or line number) ties them together. Connections are kept in the pool
+# and reused by following commands for the same device.
+class RadonEyeBatch:
+    def __init__(
+        self,
+        pool: RadonEyeConnectionPool,
+        output: IO[str],
+        concurrency: int = 4,
+        socket_path: str | None = None,
+    ) -> None:
+        self.pool = pool
+        self.output = output
+        self.concurrency = concurrency
+        self.socket_path = socket_path
+        self.failed = 0
+
+    async def run(self, lines: AsyncIterator[str]) -> int:
+        # slot is taken before next line is read, so huge input doesn't turn into huge task list
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: set[asyncio.Task[None]] = set()
+        index = 0
+        try:
+            async for line in lines:
+                index += 1
+                if not line.strip():
+                    continue
+                await semaphore.acquire()
+                task = asyncio.create_task(self.execute(index, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.pool.close()
+        return self.failed
+
+    async def execute(self, index: int, line: str) -> None:
+        response: dict[str, Any] = {"id": index}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Command must be JSON object")
+            response["id"] = request.get("id", index)
+            response["command"] = request.get("command")
+            response["address"] = request.get("address")
+            if not isinstance(request.get("address"), str):
+                raise ValueError("Missing device address")
+            response["result"] = await self.execute_request(request)
+            response["ok"] = True
+        except Exception as e:
+            self.failed += 1
+            response["ok"] = False
+            response["error"] = str(e) or type(e).__name__
+        self.output.write(json.dumps(response, separators=(",", ":")) + "\n")
+        self.output.flush()
+
+    async def execute_request(self, request: dict[str, Any]) -> Any:
+        # running daemon owns connections to its devices, so let it execute the command
+        remote_client = await open_remote_client(self.socket_path, request["address"])
+        if remote_client is not None:
+            async with remote_client as client:
+                return await execute_batch_command(client, request)
+
+        async with self.pool.acquire(request["address"]) as client:
+            return await execute_batch_command(client, request)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import math
+from typing import Callable, TypedDict
+
+from radoneye import interface_v1, interface_v2
+from radoneye.client import RadonEyeClient
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.model import OutputType, RadonEyeFrame
+from radoneye.raw import parse_history_raw, parse_status_raw
+from radoneye.util import serialize_object
+
+# timed steps of one iteration in execution order, total is the whole iteration
+BENCH_PHASES = ["connect", "services", "status", "history", "disconnect", "total"]
+
+# from history notification timestamps: request to first notification and between notifications
+BENCH_NOTIFICATIONS = ["first_notification", "notification_interval"]
+
+
+class BenchStats(TypedDict):
+    count: int
+    min: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    mean: float
+
+
+class BenchIteration(TypedDict):
+    iteration: int
+    timings: dict[str, float]  # phase -> sec
+    notifications: int  # history notifications received
+    error: str | None  # failed phase and error
+
+
+class BenchReport(TypedDict):
+    address: str
+    interface: int | None
+    model: str | None
+    firmware_version: str | None
+    iterations: list[BenchIteration]
+    stats: dict[str, BenchStats]  # phase or notification metric -> sec, only measured ones
+
+
+def percentile(values: list[float], p: float) -> float:
+    # nearest rank, values must be sorted
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def bench_stats(values: list[float]) -> BenchStats:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "min": values[0],
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+        "mean": sum(values) / len(values),
+    }
+
+
+# Runs connect, service discovery, status, history and disconnect on a fresh client every
+# iteration. Bleak discovers services during connect, so services phase is interface detection
+# on top of already discovered services.
+async def run_bench(
+    create_client: Callable[[], RadonEyeClient],
+    address: str,
+    iterations: int,
+    interval: float = 0,  # sec, pause between iterations
+    history: bool = True,
+    clock: Clock = SYSTEM_CLOCK,
+    on_iteration: Callable[[BenchIteration], None] | None = None,
+) -> BenchReport:
+    report: BenchReport = {
+        "address": address,
+        "interface": None,
+        "model": None,
+        "firmware_version": None,
+        "iterations": [],
+        "stats": {},
+    }
+    samples: dict[str, list[float]] = {name: [] for name in BENCH_PHASES + BENCH_NOTIFICATIONS}
+
+    for iteration in range(1, iterations + 1):
+        if iteration > 1 and interval > 0:
+            await clock.sleep(interval)
+
+        client = create_client()
+        timings: dict[str, float] = {}
+        notifications: list[float] = []
+        stream: list[float] = []  # history data notifications
+        error: str | None = None
+        requested = 0.0
+        phase = "connect"
+        started = clock.monotonic()
+        try:
+            await client.connect()
+            timings["connect"] = clock.monotonic() - started
+
+            phase = "services"
+            phase_started = clock.monotonic()
+            report["interface"] = client.version
+            timings["services"] = clock.monotonic() - phase_started
+
+            phase = "status"
+            phase_started = clock.monotonic()
+            status = parse_status_raw(await client.status_raw())
+            timings["status"] = clock.monotonic() - phase_started
+            report["model"] = status["model"]
+            report["firmware_version"] = status["firmware_version"]
+
+            if history:
+                phase = "history"
+                phase_started = clock.monotonic()
+                requested = clock.time()  # frames have wall clock timestamps
+                raw = await client.history_raw()
+                parse_history_raw(raw)
+                timings["history"] = clock.monotonic() - phase_started
+                notifications = [frame.time for frame in raw["frames"]]
+                # history size (v1 E8, v2 status when read with progress) is requested before
+                # history data, it is not part of the stream
+                sized = bool(raw["frames"]) and is_history_size(raw["interface"], raw["frames"][0])
+                stream = notifications[1:] if sized else notifications
+        except Exception as e:
+            error = f"{phase}: {str(e) or type(e).__name__}"
+        finally:
+            phase_started = clock.monotonic()
+            await client.disconnect()
+            timings["disconnect"] = clock.monotonic() - phase_started
+
+        if error is None:
+            timings["total"] = clock.monotonic() - started
+            if notifications:
+                samples["first_notification"].append(notifications[0] - requested)
+            samples["notification_interval"].extend(b - a for a, b in zip(stream, stream[1:]))
+
+        for name, value in timings.items():
+            samples[name].append(value)
+
+        result: BenchIteration = {
+            "iteration": iteration,
+            "timings": timings,
+            "notifications": len(notifications),
+            "error": error,
+        }
+        report["iterations"].append(result)
+        if on_iteration is not None:
+            on_iteration(result)
+
+    report["stats"] = {name: bench_stats(values) for name, values in samples.items() if values}
+    return report
+
+
+def is_history_size(interface: int, frame: RadonEyeFrame) -> bool:
+    if interface == 1:
+        return frame.data[0] == interface_v1.MSG_PREAMBLE_E8
+    return frame.data[0] == interface_v2.COMMAND_STATUS
+
+
+def format_iteration(result: BenchIteration) -> str:
+    if result["error"] is not None:
+        return f"iteration {result['iteration']}\terror\t{result['error']}"
+    return f"iteration {result['iteration']}\t{result['timings']['total'] * 1000:.1f} ms"
+
+
+def format_bench(report: BenchReport, output: OutputType) -> str:
+    if output == "json":
+        return serialize_object(report, "json")
+
+    failed = sum(1 for result in report["iterations"] if result["error"] is not None)
+    lines = [
+        f"address\t{report['address']}",
+        f"interface\t{report['interface'] or 'unknown'}",
+        f"model\t{report['model'] or 'unknown'}",
+        f"firmware_version\t{report['firmware_version'] or 'unknown'}",
+        f"iterations\t{len(report['iterations'])}",
+        f"failed\t{failed}",
+        "",
+        f"{'ms':<24}{'count':>6}{'min':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+        f"{'mean':>10}",
+    ]
+    for name in BENCH_PHASES + BENCH_NOTIFICATIONS:
+        stats = report["stats"].get(name)
+        if stats is None:
+            continue
+        lines.append(
+            f"{name:<24}{stats['count']:>6}"
+            + "".join(
+                f"{value * 1000:>10.1f}"
+                for value in [
+                    stats["min"],
+                    stats["p50"],
+                    stats["p95"],
+                    stats["p99"],
+                    stats["max"],
+                    stats["mean"],
+                ]
+            )
+        )
+    return "\n".join(lines)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from struct import Struct
+from typing import Any, BinaryIO, Callable, Iterator, NamedTuple
+
+from radoneye.model import RadonEyeTransport
+
+# file starts with magic (includes format version), followed by records
+CAPTURE_MAGIC = b"RDEYCAP1"
+
+# record header: kind, characteristic id, time.monotonic() timestamp, data size
+RECORD_HEADER = Struct("<BBdH")
+
+KIND_CHAR = 0  # defines characteristic id, data is characteristic uuid
+KIND_SERVICE = 1  # service available on device, data is service uuid
+KIND_WRITE = 2  # outgoing write
+KIND_NOTIFY = 3  # incoming notification
+
+
+class CaptureRecord(NamedTuple):
+    kind: int
+    uuid: str  # characteristic uuid (service uuid for KIND_SERVICE)
+    time: float  # time.monotonic() when record was written
+    data: bytes
+
+
+# service or characteristic passed to replayed notify callbacks
+class ReplayAttribute(NamedTuple):
+    uuid: str
+
+
+def uuid_of(char_specifier: Any) -> str:
+    # interfaces use uuid strings, bleak also accepts characteristic objects
+    return str(getattr(char_specifier, "uuid", char_specifier)).lower()
+
+
+# Appends records to binary stream, characteristic uuids are written once and then referenced by
+# one byte id, so a typical 20 byte notification takes 32 bytes in the file.
+class CaptureWriter:
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.char_ids: dict[str, int] = {}
+        stream.write(CAPTURE_MAGIC)
+
+    def write_record(self, kind: int, uuid: str, data: bytes | bytearray) -> None:
+        char_id = 0
+        if kind != KIND_SERVICE:
+            char_id = self.char_ids.get(uuid, -1)
+            if char_id < 0:
+                char_id = len(self.char_ids)
+                self.char_ids[uuid] = char_id
+                self.write_header(KIND_CHAR, char_id, uuid.encode())
+        self.write_header(kind, char_id, data)
+
+    def write_header(self, kind: int, char_id: int, data: bytes | bytearray) -> None:
+        self.stream.write(RECORD_HEADER.pack(kind, char_id, time.monotonic(), len(data)))
+        self.stream.write(data)
+
+    def service(self, uuid: str) -> None:
+        self.write_record(KIND_SERVICE, uuid.lower(), uuid.lower().encode())
+
+    def write(self, uuid: str, data: bytes | bytearray) -> None:
+        self.write_record(KIND_WRITE, uuid, data)
+
+    def notify(self, uuid: str, data: bytes | bytearray) -> None:
+        self.write_record(KIND_NOTIFY, uuid, data)
+
+
+def read_capture(data: bytes | bytearray | memoryview | Any) -> Iterator[CaptureRecord]:
+    # data is whole file content, mmap object works too (only record data is copied), view is
+    # released on exit, so mmap can be closed even if reading failed
+    with memoryview(data) as view:
+        if bytes(view[: len(CAPTURE_MAGIC)]) != CAPTURE_MAGIC:
+            raise ValueError("Not a capture file")
+
+        uuids: dict[int, str] = {}
+        offset = len(CAPTURE_MAGIC)
+        header_size = RECORD_HEADER.size
+        unpack_header = RECORD_HEADER.unpack_from
+        while offset < len(view):
+            if offset + header_size > len(view):
+                raise ValueError("Truncated capture record")
+            kind, char_id, timestamp, size = unpack_header(view, offset)
+            offset += header_size
+            if offset + size > len(view):
+                raise ValueError("Truncated capture record")
+            record_data = bytes(view[offset : offset + size])
+            offset += size
+
+            if kind == KIND_CHAR:
+                uuids[char_id] = record_data.decode()
+            elif kind == KIND_SERVICE:
+                yield CaptureRecord(kind, record_data.decode(), timestamp, record_data)
+            elif kind in (KIND_WRITE, KIND_NOTIFY):
+                if char_id not in uuids:
+                    raise ValueError(f"Undefined characteristic id: {char_id}")
+                yield CaptureRecord(kind, uuids[char_id], timestamp, record_data)
+            else:
+                raise ValueError(f"Unknown capture record kind: {kind}")
+
+
+def load_capture(path: str) -> list[CaptureRecord]:
+    with open(path, "rb") as file:
+        return list(read_capture(file.read()))
+
+
+# Wraps real client and records every write and notification passing through it.
+class CapturingClient:
+    def __init__(self, client: RadonEyeTransport, writer: CaptureWriter) -> None:
+        self.client = client
+        self.writer = writer
+        self.services_written = False
+
+    @property
+    def services(self) -> Any:
+        services = self.client.services
+        # services are known only after connect, interfaces ask for them before the first read
+        if not self.services_written:
+            self.services_written = True
+            for service in services:
+                self.writer.service(uuid_of(service))
+        return services
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client.is_connected
+
+    async def connect(self) -> None:
+        await self.client.connect()
+
+    async def disconnect(self) -> None:
+        await self.client.disconnect()
+
+    async def start_notify(
+        self, char_specifier: str, callback: Callable[[Any, bytearray], None]
+    ) -> None:
+        uuid = uuid_of(char_specifier)
+
+        def capture_callback(char: Any, data: bytearray) -> None:
+            self.writer.notify(uuid, data)
+            callback(char, data)
+
+        await self.client.start_notify(char_specifier, capture_callback)
+
+    async def stop_notify(self, char_specifier: str) -> None:
+        await self.client.stop_notify(char_specifier)
+
+    async def write_gatt_char(self, char_specifier: str, data: bytearray) -> None:
+        self.writer.write(uuid_of(char_specifier), data)
+        await self.client.write_gatt_char(char_specifier, data)
+
+
+class ReplayServices:
+    def __init__(self, uuids: list[str]) -> None:
+        self.uuids = uuids
+
+    def __iter__(self) -> Iterator[ReplayAttribute]:
+        return iter([ReplayAttribute(uuid) for uuid in self.uuids])
+
+    def get_service(self, specifier: str) -> ReplayAttribute | None:
+        uuid = uuid_of(specifier)
+        return ReplayAttribute(uuid) if uuid in self.uuids else None
+
+
+# Plays capture back instead of talking to the device. Every write must match the next captured
+# write, notifications captured after it (up to the next write) are delivered with original delays
+# divided by speed (speed 0 delivers them immediately).
+class ReplayClient:
+    def __init__(self, records: list[CaptureRecord], speed: float = 1.0) -> None:
+        self.records = records
+        self.speed = speed
+        self.position = 0
+        self.callbacks: dict[str, Callable[[Any, bytearray], None]] = {}
+        self.services = ReplayServices(
+            list(dict.fromkeys(record.uuid for record in records if record.kind == KIND_SERVICE))
+        )
+        self.is_connected = False
+
+    @classmethod
+    def load(cls, path: str, speed: float = 1.0) -> ReplayClient:
+        return cls(load_capture(path), speed)
+
+    async def connect(self) -> None:
+        self.is_connected = True
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+
+    async def start_notify(
+        self, char_specifier: str, callback: Callable[[Any, bytearray], None]
+    ) -> None:
+        self.callbacks[uuid_of(char_specifier)] = callback
+
+    async def stop_notify(self, char_specifier: str) -> None:
+        self.callbacks.pop(uuid_of(char_specifier), None)
+
+    async def write_gatt_char(self, char_specifier: str, data: bytearray) -> None:
+        uuid = uuid_of(char_specifier)
+        write = self.next_record(KIND_WRITE)
+        if write is None or write.uuid != uuid or write.data != bytes(data):
+            raise ValueError(f"Unexpected write to {uuid}: {bytes(data).hex()}")
+
+        loop = asyncio.get_running_loop()
+        while self.position < len(self.records):
+            record = self.records[self.position]
+            if record.kind == KIND_WRITE:
+                break
+            self.position += 1
+            if record.kind != KIND_NOTIFY:
+                continue
+            if self.speed > 0:
+                loop.call_later((record.time - write.time) / self.speed, self.deliver, record)
+            else:
+                loop.call_soon(self.deliver, record)
+
+    def next_record(self, kind: int) -> CaptureRecord | None:
+        while self.position < len(self.records):
+            record = self.records[self.position]
+            self.position += 1
+            if record.kind == kind:
+                return record
+        return None
+
+    def deliver(self, record: CaptureRecord) -> None:
+        # notifications are dropped when nobody listens, same as the device does
+        callback = self.callbacks.get(record.uuid)
+        if callback is not None:
+            callback(ReplayAttribute(record.uuid), bytearray(record.data))
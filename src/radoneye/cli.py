@@ -1,21 +1,109 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
 import sys
-from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
-from typing import Literal, NamedTuple, TypedDict
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser, ArgumentTypeError
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Literal, NamedTuple
 
+from radoneye.batch import RadonEyeBatch, read_lines
 from radoneye.client import RadonEyeClient
-from radoneye.model import OutputType, RadonUnit
+from radoneye.commands import configure_alarm, configure_unit
+from radoneye.history_writer import HistoryRowFormat, HistoryWriter
+from radoneye.model import (
+    HistoryOutputType,
+    OutputType,
+    RadonEyeHistory,
+    RadonEyeStatus,
+    RadonUnit,
+)
+from radoneye.pool import RadonEyeConnectionPool
+from radoneye.remote import RadonEyeRemoteClient, default_socket_path, open_remote_client
 from radoneye.scanner import RadonEyeScanner
-from radoneye.util import convert_radon_value, serialize_object
+from radoneye.util import serialize_object
+
+if TYPE_CHECKING:
+    from bleak.backends.device import BLEDevice
+
+
+async def open_client(
+    socket: str | None,
+    address_or_ble_device: BLEDevice | str,
+    max_age: float | None = None,
+    read_timeout: float | None = None,
+    **kwargs: Any,
+) -> RadonEyeClient | RadonEyeRemoteClient:
+    # daemon has its own adapter and doesn't dump messages, so these need direct connection
+    if kwargs.get("debug") or kwargs.get("adapter") is not None:
+        return RadonEyeClient(address_or_ble_device, **kwargs)
+    # running daemon already has connection to the device, so forward command to it, the daemon
+    # might need to reconnect first, so response can take up to connect and read timeout
+    timeout = kwargs.get("connect_timeout", 0) + (read_timeout or 0) or None
+    remote_client = await open_remote_client(
+        socket, device_address(address_or_ble_device), max_age, timeout
+    )
+    if remote_client is not None:
+        return remote_client
+    return RadonEyeClient(address_or_ble_device, **kwargs)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+
+def device_address(address_or_ble_device: BLEDevice | str) -> str:
+    if isinstance(address_or_ble_device, str):
+        return address_or_ble_device
+    return address_or_ble_device.address
+
+
+async def resolve_devices(
+    args: StatusCommandArgs | HistoryCommandArgs,
+) -> list[BLEDevice | str]:
+    devices: list[BLEDevice | str] = list(args.addresses)
+    if args.all:
+        # discovered devices are used directly, so connect doesn't need to scan for them again
+        for dev in await RadonEyeScanner.discover(adapter=args.adapter, timeout=args.scan_timeout):
+            if dev.address not in args.addresses:
+                devices.append(dev)
+    return devices
+
+
+async def read_devices(
+    devices: list[BLEDevice | str],
+    concurrency: int,
+    read: Callable[[BLEDevice | str], Awaitable[Any]],
+) -> AsyncIterator[tuple[str, Any, Exception | None]]:
+    # yields (address, result, error) as soon as each device is done, not in input order
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def read_one(device: BLEDevice | str) -> tuple[str, Any, Exception | None]:
+        async with semaphore:
+            try:
+                return device_address(device), await read(device), None
+            except Exception as e:
+                return device_address(device), None, e
+
+    # tasks are created in input order, so devices get semaphore slots in that order too
+    tasks = [asyncio.create_task(read_one(device)) for device in devices]
+    for future in asyncio.as_completed(tasks):
+        yield await future
+
+
+def print_device_error(address: str, error: Exception, output: OutputType) -> None:
+    message = str(error) or type(error).__name__
+    if output == "text":
+        print(f"{address}\terror\t{message}", file=sys.stderr, flush=True)
+    else:
+        print(serialize_object({"address": address, "error": message}, "json"), flush=True)
 
 
-class RadonEyeAlarmStatus(TypedDict):
-    alarm_enabled: int
-    alarm_level_bq_m3: float
-    alarm_level_pci_l: float
-    alarm_interval_minutes: int
+def is_multi_device(args: StatusCommandArgs | HistoryCommandArgs) -> bool:
+    return args.all or len(args.addresses) > 1
 
 
 class ListCommandArgs(NamedTuple):
@@ -39,12 +127,14 @@ async def cmd_list(args: ListCommandArgs):
 class BeepCommandArgs(NamedTuple):
     adapter: str | None
     debug: bool
+    socket: str | None
     connect_timeout: int
     address: str
 
 
 async def cmd_beep(args: BeepCommandArgs):
-    async with RadonEyeClient(
+    async with await open_client(
+        args.socket,
         args.address,
         adapter=args.adapter,
         connect_timeout=args.connect_timeout,
@@ -57,54 +147,149 @@ async def cmd_beep(args: BeepCommandArgs):
 class StatusCommandArgs(NamedTuple):
     adapter: str | None
     debug: bool
+    socket: str | None
     connect_timeout: int
     read_timeout: int
     output: OutputType
-    address: str
-
-
-async def cmd_status(args: StatusCommandArgs):
-    async with RadonEyeClient(
-        args.address,
+    addresses: list[str]
+    all: bool
+    scan_timeout: int
+    concurrency: int
+    max_age: float | None
+
+
+async def read_status(args: StatusCommandArgs, device: BLEDevice | str) -> RadonEyeStatus:
+    async with await open_client(
+        args.socket,
+        device,
+        max_age=args.max_age,
+        read_timeout=args.read_timeout,
         adapter=args.adapter,
         connect_timeout=args.connect_timeout,
         status_read_timeout=args.read_timeout,
         debug=args.debug,
     ) as client:
-        status = await client.status()
+        return await client.status()
+
+
+async def cmd_status(args: StatusCommandArgs):
+    if not is_multi_device(args):
+        status = await read_status(args, args.addresses[0])
         print(serialize_object(status, args.output))
+        return
+
+    failed = 0
+    async for address, status, error in read_devices(
+        await resolve_devices(args), args.concurrency, lambda device: read_status(args, device)
+    ):
+        if error is not None:
+            failed += 1
+            print_device_error(address, error, args.output)
+        elif args.output == "text":
+            lines = serialize_object(status, "text").splitlines()
+            print("\n".join(f"{address}\t{line}" for line in lines), flush=True)
+        else:
+            print(serialize_object({"address": address, "status": status}, "json"), flush=True)
+    if failed:
+        sys.exit(1)
 
 
 class HistoryCommandArgs(NamedTuple):
     adapter: str | None
     debug: bool
+    socket: str | None
     connect_timeout: int
     read_timeout: int
-    output: OutputType
-    address: str
-
-
-async def cmd_history(args: HistoryCommandArgs):
-    async with RadonEyeClient(
-        args.address,
+    output: HistoryOutputType
+    timestamps: bool
+    addresses: list[str]
+    all: bool
+    scan_timeout: int
+    concurrency: int
+
+
+async def read_history(args: HistoryCommandArgs, device: BLEDevice | str) -> RadonEyeHistory:
+    async with await open_client(
+        args.socket,
+        device,
+        read_timeout=args.read_timeout,
         adapter=args.adapter,
         connect_timeout=args.connect_timeout,
         history_read_timeout=args.read_timeout,
         debug=args.debug,
     ) as client:
-        history = await client.history()
+        return await client.history()
+
+
+def format_history_text(history: RadonEyeHistory) -> list[str]:
+    return [
+        f"{index + 1}\t{value_bq_m3}\t{history['values_pci_l'][index]}"
+        for index, value_bq_m3 in enumerate(history["values_bq_m3"])
+    ]
+
+
+async def cmd_history(args: HistoryCommandArgs):
+    if args.output == "ndjson" or args.output == "csv":
+        await write_history_rows(args, args.output)
+        return
+
+    if not is_multi_device(args):
+        history = await read_history(args, args.addresses[0])
         if args.output == "text":
             print("#\tBq/m3\tpCi/L")
-            for index, value_bq_m3 in enumerate(history["values_bq_m3"]):
-                value_pci_l = history["values_pci_l"][index]
-                print(f"{index + 1}\t{value_bq_m3}\t{value_pci_l}")
+            for line in format_history_text(history):
+                print(line)
         else:
             print(serialize_object(history, "json"))
+        return
+
+    if args.output == "text":
+        print("address\t#\tBq/m3\tpCi/L", flush=True)
+    failed = 0
+    async for address, history, error in read_devices(
+        await resolve_devices(args), args.concurrency, lambda device: read_history(args, device)
+    ):
+        if error is not None:
+            failed += 1
+            print_device_error(address, error, args.output)
+        elif args.output == "text":
+            lines = format_history_text(history)
+            print("\n".join(f"{address}\t{line}" for line in lines), flush=True)
+        else:
+            print(serialize_object({"address": address, "history": history}, "json"), flush=True)
+    if failed:
+        sys.exit(1)
+
+
+async def write_history_rows(args: HistoryCommandArgs, row_format: HistoryRowFormat):
+    # one row per value, rows of every device go to the same stream with address column
+    multi_device = is_multi_device(args)
+    writer = HistoryWriter(
+        sys.stdout, row_format, timestamps=args.timestamps, with_address=multi_device
+    )
+    writer.write_header()
+
+    if not multi_device:
+        writer.write(await read_history(args, args.addresses[0]))
+        return
+
+    failed = 0
+    async for address, history, error in read_devices(
+        await resolve_devices(args), args.concurrency, lambda device: read_history(args, device)
+    ):
+        if error is not None:
+            failed += 1
+            print_device_error(address, error, "json" if row_format == "ndjson" else "text")
+        else:
+            writer.write(history, address)
+    if failed:
+        sys.exit(1)
 
 
 class AlarmCommandArgs(NamedTuple):
     adapter: str | None
     debug: bool
+    socket: str | None
     connect_timeout: int
     read_timeout: int
     output: OutputType
@@ -116,84 +301,29 @@ class AlarmCommandArgs(NamedTuple):
 
 
 async def cmd_alarm(args: AlarmCommandArgs):
-    async with RadonEyeClient(
+    async with await open_client(
+        args.socket,
         args.address,
+        read_timeout=args.read_timeout,
         adapter=args.adapter,
         connect_timeout=args.connect_timeout,
         status_read_timeout=args.read_timeout,
         debug=args.debug,
     ) as client:
-        if args.status is None and args.level is None and args.interval is None:
-            status = await client.status()
-
-            alarm_status = {
-                "alarm_enabled": status["alarm_enabled"],
-                "alarm_level_bq_m3": status["alarm_level_bq_m3"],
-                "alarm_level_pci_l": status["alarm_level_pci_l"],
-                "alarm_interval_minutes": status["alarm_interval_minutes"],
-            }
-
-            print(serialize_object(alarm_status, args.output))
-        elif (
-            args.status is not None
-            and args.level is not None
-            and args.unit is not None
-            and args.interval is not None
-        ):
-            new_alarm_status: RadonEyeAlarmStatus = {
-                "alarm_enabled": args.status == "on",
-                "alarm_level_bq_m3": convert_radon_value(args.level, args.unit, "bq/m3"),
-                "alarm_level_pci_l": convert_radon_value(args.level, args.unit, "pci/l"),
-                "alarm_interval_minutes": args.interval,
-            }
-
-            await client.set_alarm(
-                enabled=args.status == "on",
-                level=args.level,
-                unit=args.unit,
-                interval=args.interval,
-            )
-
-            print(serialize_object(new_alarm_status, args.output))
-        else:
-            status = await client.status()
-
-            new_enabled = (
-                args.status == "on" if args.status is not None else bool(status["alarm_enabled"])
-            )
-
-            if args.level is not None:
-                new_unit = args.unit or status["display_unit"]
-                new_level = args.level
-            elif status["display_unit"] == "pci/l":
-                new_level = status["alarm_level_pci_l"]
-                new_unit = "pci/l"
-            else:
-                new_level = status["alarm_level_bq_m3"]
-                new_unit = "bq/m3"
-
-            new_interval = args.interval or status["alarm_interval_minutes"]
-
-            await client.set_alarm(
-                enabled=new_enabled,
-                level=new_level,
-                unit=new_unit,
-                interval=new_interval,
-            )
-
-            new_alarm_status: RadonEyeAlarmStatus = {
-                "alarm_enabled": new_enabled,
-                "alarm_level_bq_m3": convert_radon_value(new_level, new_unit, "bq/m3"),
-                "alarm_level_pci_l": convert_radon_value(new_level, new_unit, "pci/l"),
-                "alarm_interval_minutes": new_interval,
-            }
-
-            print(serialize_object(new_alarm_status, args.output))
+        alarm_status = await configure_alarm(
+            client,
+            status=args.status,
+            level=args.level,
+            unit=args.unit,
+            interval=args.interval,
+        )
+        print(serialize_object(alarm_status, args.output))
 
 
 class UnitCommandArgs(NamedTuple):
     adapter: str | None
     debug: bool
+    socket: str | None
     connect_timeout: int
     read_timeout: int
     output: OutputType
@@ -202,19 +332,123 @@ class UnitCommandArgs(NamedTuple):
 
 
 async def cmd_unit(args: UnitCommandArgs):
-    async with RadonEyeClient(
+    async with await open_client(
+        args.socket,
         args.address,
+        read_timeout=args.read_timeout,
         adapter=args.adapter,
         connect_timeout=args.connect_timeout,
         status_read_timeout=args.read_timeout,
         debug=args.debug,
     ) as client:
-        if args.unit is None:
-            status = await client.status()
-            print(serialize_object(status["display_unit"], args.output))
-        else:
-            await client.set_unit(args.unit)
-            print(serialize_object(args.unit, args.output))
+        unit = await configure_unit(client, args.unit)
+        print(serialize_object(unit, args.output))
+
+
+class DaemonCommandArgs(NamedTuple):
+    adapter: str | None
+    debug: bool
+    socket: str | None
+    config: str
+    no_socket: bool
+
+
+async def cmd_daemon(args: DaemonCommandArgs):
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        stream=sys.stderr,
+    )
+    # daemon brings outputs, http server and schedulers, other commands don't need them
+    from radoneye.daemon import RadonEyeDaemon
+
+    await RadonEyeDaemon(
+        args.config,
+        adapter=args.adapter,
+        debug=args.debug,
+        socket_path=None if args.no_socket else args.socket,
+    ).run()
+
+
+class BatchCommandArgs(NamedTuple):
+    adapter: str | None
+    debug: bool
+    socket: str | None
+    connect_timeout: int
+    read_timeout: int
+    history_read_timeout: int
+    concurrency: int
+
+
+async def cmd_batch(args: BatchCommandArgs):
+    pool = RadonEyeConnectionPool(
+        connect_timeout=args.connect_timeout,
+        status_read_timeout=args.read_timeout,
+        history_read_timeout=args.history_read_timeout,
+        adapter=args.adapter,
+        debug=args.debug,
+        max_connections=args.concurrency,
+    )
+    batch = RadonEyeBatch(pool, sys.stdout, concurrency=args.concurrency, socket_path=args.socket)
+    failed = await batch.run(read_lines(sys.stdin))
+    if failed:
+        sys.exit(1)
+
+
+class DecodeCommandArgs(NamedTuple):
+    adapter: str | None
+    debug: bool
+    socket: str | None
+    files: list[str]
+    output: Literal["ndjson", "csv"]
+    jobs: int | None
+
+
+async def cmd_decode(args: DecodeCommandArgs):
+    # offline tool, process pool and parsers are not needed by other commands
+    from radoneye.decode import decode_files
+
+    failed = decode_files(args.files, args.output, sys.stdout, sys.stderr, jobs=args.jobs)
+    if failed:
+        sys.exit(1)
+
+
+class BenchCommandArgs(NamedTuple):
+    adapter: str | None
+    debug: bool
+    socket: str | None
+    connect_timeout: int
+    read_timeout: int
+    history_read_timeout: int
+    output: OutputType
+    address: str
+    iterations: int
+    interval: float
+    no_history: bool
+
+
+async def cmd_bench(args: BenchCommandArgs):
+    # always direct connection, forwarding to daemon would measure the daemon instead
+    from radoneye.bench import format_bench, format_iteration, run_bench
+
+    report = await run_bench(
+        lambda: RadonEyeClient(
+            args.address,
+            adapter=args.adapter,
+            connect_timeout=args.connect_timeout,
+            status_read_timeout=args.read_timeout,
+            history_read_timeout=args.history_read_timeout,
+            debug=args.debug,
+        ),
+        args.address,
+        args.iterations,
+        interval=args.interval,
+        history=not args.no_history,
+        on_iteration=lambda result: print(format_iteration(result), file=sys.stderr, flush=True),
+    )
+    print(format_bench(report, args.output))
+    if all(result["error"] is not None for result in report["iterations"]):
+        sys.exit(1)
 
 
 async def main(argv: list[str]):
@@ -228,6 +462,12 @@ async def main(argv: list[str]):
     parser.add_argument(
         "-d", "--debug", action="store_true", default=False, help="enable to see message dumps"
     )
+    parser.add_argument(
+        "--socket",
+        help="daemon unix socket, commands are forwarded to running daemon unless --debug or"
+        " --adapter is given",
+        default=os.environ.get("RADONEYE_SOCKET") or default_socket_path(),
+    )
 
     subparsers = parser.add_subparsers(required=True, help="sub-command help")
 
@@ -261,7 +501,19 @@ async def main(argv: list[str]):
     parser_status.add_argument(
         "--output", choices=["json", "text"], help="output format", default="text"
     )
-    parser_status.add_argument("address", help="device address")
+    parser_status.add_argument(
+        "--max-age", type=float, help="accept status cached by daemon up to this age (in seconds)"
+    )
+    parser_status.add_argument("addresses", nargs="*", metavar="address", help="device address")
+    parser_status.add_argument(
+        "--all", action="store_true", help="discover nearby devices and read all of them"
+    )
+    parser_status.add_argument(
+        "--scan-timeout", type=int, help="discovery timeout (with --all)", default=30
+    )
+    parser_status.add_argument(
+        "--concurrency", type=positive_int, help="max number of devices read at once", default=4
+    )
     parser_status.set_defaults(func=cmd_status)
 
     parser_history = subparsers.add_parser(
@@ -272,9 +524,26 @@ async def main(argv: list[str]):
     parser_history.add_argument("--connect-timeout", type=int, help="connect timeout", default=30)
     parser_history.add_argument("--read-timeout", type=int, help="read timeout", default=60)
     parser_history.add_argument(
-        "--output", choices=["json", "text"], help="output format", default="text"
+        "--output",
+        choices=["json", "text", "ndjson", "csv"],
+        help="output format (ndjson and csv are streamed one row per value)",
+        default="text",
+    )
+    parser_history.add_argument(
+        "--timestamps",
+        action="store_true",
+        help="add reconstructed time of each value (ndjson and csv only)",
+    )
+    parser_history.add_argument("addresses", nargs="*", metavar="address", help="device address")
+    parser_history.add_argument(
+        "--all", action="store_true", help="discover nearby devices and read all of them"
+    )
+    parser_history.add_argument(
+        "--scan-timeout", type=int, help="discovery timeout (with --all)", default=30
+    )
+    parser_history.add_argument(
+        "--concurrency", type=positive_int, help="max number of devices read at once", default=4
     )
-    parser_history.add_argument("address", help="device address")
     parser_history.set_defaults(func=cmd_history)
 
     parser_alarm = subparsers.add_parser(
@@ -308,7 +577,81 @@ async def main(argv: list[str]):
     )
     parser_unit.set_defaults(func=cmd_unit)
 
+    parser_daemon = subparsers.add_parser(
+        "daemon",
+        help="poll devices from inventory file continuously (SIGHUP reloads inventory)",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser_daemon.add_argument("--config", required=True, help="inventory file (json)")
+    parser_daemon.add_argument(
+        "--no-socket", action="store_true", help="don't accept forwarded commands on unix socket"
+    )
+    parser_daemon.set_defaults(func=cmd_daemon)
+
+    parser_batch = subparsers.add_parser(
+        "batch",
+        help="execute json commands from stdin, one per line, results are printed as json lines",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser_batch.add_argument("--connect-timeout", type=int, help="connect timeout", default=30)
+    parser_batch.add_argument("--read-timeout", type=int, help="status read timeout", default=5)
+    parser_batch.add_argument(
+        "--history-read-timeout", type=int, help="history read timeout", default=60
+    )
+    parser_batch.add_argument(
+        "--concurrency",
+        type=positive_int,
+        help="max number of commands executed at once",
+        default=4,
+    )
+    parser_batch.set_defaults(func=cmd_batch)
+
+    parser_decode = subparsers.add_parser(
+        "decode",
+        help="decode status and history reads from capture files",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser_decode.add_argument("files", nargs="+", metavar="file", help="capture file")
+    parser_decode.add_argument(
+        "--output",
+        choices=["ndjson", "csv"],
+        help="output format (csv has status reads only)",
+        default="ndjson",
+    )
+    parser_decode.add_argument(
+        "--jobs", type=int, help="number of worker processes (defaults to number of CPUs)"
+    )
+    parser_decode.set_defaults(func=cmd_decode)
+
+    parser_bench = subparsers.add_parser(
+        "bench",
+        help="measure connect, status and history latency of device (bypasses daemon)",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser_bench.add_argument("address", help="device address")
+    parser_bench.add_argument("--connect-timeout", type=int, help="connect timeout", default=30)
+    parser_bench.add_argument("--read-timeout", type=int, help="status read timeout", default=5)
+    parser_bench.add_argument(
+        "--history-read-timeout", type=int, help="history read timeout", default=60
+    )
+    parser_bench.add_argument("--iterations", type=int, help="number of iterations", default=10)
+    parser_bench.add_argument(
+        "--interval", type=float, help="pause between iterations (in seconds)", default=1
+    )
+    parser_bench.add_argument("--no-history", action="store_true", help="don't read history")
+    parser_bench.add_argument(
+        "--output", choices=["json", "text"], help="output format", default="text"
+    )
+    parser_bench.set_defaults(func=cmd_bench)
+
     args = parser.parse_args(argv[1:])
+    if getattr(args, "addresses", None) == [] and not args.all:
+        parser.error("device address or --all is required")
+
+    if args.debug and args.func is not cmd_daemon:
+        # frame dumps are debug events of radoneye.debug logger, daemon configures logging itself
+        logging.basicConfig(format="%(message)s", stream=sys.stderr)
+        logging.getLogger("radoneye").setLevel(logging.DEBUG)
 
     await args.func(args)
 
@@ -1,13 +1,33 @@
 from __future__ import annotations
 
-from typing import Union
-
-from bleak import BleakClient
-from bleak.backends.device import BLEDevice
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, BinaryIO, Callable, Literal, TypeVar, Union
 
+from radoneye.capture import CaptureWriter, CapturingClient
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.debug import FrameLog
 from radoneye.interface_v1 import InterfaceV1
 from radoneye.interface_v2 import InterfaceV2
-from radoneye.model import RadonEyeHistory, RadonEyeInterface, RadonEyeStatus, RadonUnit
+from radoneye.memo import FrameMemo
+from radoneye.model import (
+    HistoryProgressCallback,
+    RadonEyeHistory,
+    RadonEyeHistoryTransfer,
+    RadonEyeInterface,
+    RadonEyeRawData,
+    RadonEyeStatus,
+    RadonEyeTransport,
+    RadonUnit,
+)
+from radoneye.observer import ObservedTransport, RadonEyeObserver
+from radoneye.raw import parse_history_raw
+
+if TYPE_CHECKING:
+    from bleak.backends.device import BLEDevice
+
+T = TypeVar("T")
+
+HISTORY_RETRY_DELAY = 1.0  # sec, before second attempt of history transfer, doubles after that
 
 
 class RadonEyeClient:
@@ -18,17 +38,37 @@ class RadonEyeClient:
         status_read_timeout: float = 5,
         history_read_timeout: float = 60,
         adapter: str | None = None,
-        debug: bool = False,
+        debug: bool = False,  # log frames (radoneye.debug logger), dump recent frames on error
+        client: RadonEyeTransport | None = None,  # instead of bleak client, like ReplayClient
+        capture: BinaryIO | None = None,  # binary stream to record all writes and notifications
+        clock: Clock = SYSTEM_CLOCK,  # VirtualClock to run on VirtualTimeEventLoop
+        observer: RadonEyeObserver | None = None,  # receives connect and operation timings
     ) -> None:
-        self.client = BleakClient(address_or_ble_device, timeout=connect_timeout, adapter=adapter)
+        self.address = str(getattr(address_or_ble_device, "address", address_or_ble_device))
+        if client is None:
+            # bleak (and its platform backend) is slow to import, load it only when it is needed
+            from bleak import BleakClient
+
+            client = BleakClient(address_or_ble_device, timeout=connect_timeout, adapter=adapter)
+        if capture is not None:
+            client = CapturingClient(client, CaptureWriter(capture))
+        self.observed: ObservedTransport | None = None
+        if observer is not None:
+            client = self.observed = ObservedTransport(client, self.address, observer, clock)
+
+        self.client: RadonEyeTransport = client
         self.interface: RadonEyeInterface | None = None
+        # last status frames, survives interface detection and reconnects
+        self.memo = FrameMemo[RadonEyeStatus]()
         self.status_read_timeout = status_read_timeout
         self.history_read_timeout = history_read_timeout
         self.adapter = adapter
         self.debug = debug
+        self.frame_log = FrameLog(self.address, clock=clock) if debug else None
+        self.clock = clock
 
     async def __aenter__(self):
-        await self.client.connect()  # type: ignore
+        await self.client.connect()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):  # type: ignore
@@ -39,11 +79,11 @@ class RadonEyeClient:
             pass
 
     async def connect(self) -> None:
-        await self.client.connect()  # type: ignore
+        await self.client.connect()
 
     async def disconnect(self) -> None:
         try:
-            await self.client.disconnect()  # type: ignore
+            await self.client.disconnect()
         except (EOFError, Exception):
             # Ignore errors during disconnect - connection may already be closed
             pass
@@ -52,14 +92,44 @@ class RadonEyeClient:
     def is_connected(self) -> bool:
         return self.client.is_connected
 
+    @property
+    def version(self) -> Literal[1, 2]:
+        # interface version, detected by services of connected device
+        return self.__get_interface().version
+
+    @property
+    def status_unchanged(self) -> bool:
+        # last status() got the same frames as the one before it
+        return self.memo.unchanged
+
     async def beep(self) -> None:
-        return await self.__get_interface().beep()
+        return await self.__run("beep", lambda interface: interface.beep())
 
     async def status(self) -> RadonEyeStatus:
-        return await self.__get_interface().status()
+        return await self.__run("status", lambda interface: interface.status())
 
-    async def history(self) -> RadonEyeHistory:
-        return await self.__get_interface().history()
+    async def history(
+        self,
+        retries: int = 0,
+        progress: HistoryProgressCallback | None = None,  # called for every history notification
+    ) -> RadonEyeHistory:
+        if retries > 0:
+            return parse_history_raw(await self.__read_history(retries, progress))
+        return await self.__run("history", lambda interface: interface.history(progress))
+
+    async def status_raw(self) -> RadonEyeRawData:
+        # status frames as received, parse them with radoneye.raw.parse_status_raw()
+        return await self.__run("status_raw", lambda interface: interface.status_raw())
+
+    async def history_raw(
+        self, retries: int = 0, progress: HistoryProgressCallback | None = None
+    ) -> RadonEyeRawData:
+        # history frames as received, parse them with radoneye.raw.parse_history_raw()
+        if retries > 0:
+            return await self.__read_history(retries, progress)
+        return await self.__run(
+            "history_raw", lambda interface: interface.history_raw(progress=progress)
+        )
 
     async def set_alarm(
         self,
@@ -68,21 +138,78 @@ class RadonEyeClient:
         unit: RadonUnit,  # bq/m3 or pci/l
         interval: int,  # in minutes, app supports 10 mins, 1 hour and 6 hours
     ) -> None:
-        return await self.__get_interface().set_alarm(enabled, level, unit, interval)
+        return await self.__run(
+            "set_alarm", lambda interface: interface.set_alarm(enabled, level, unit, interval)
+        )
 
     async def set_unit(self, unit: RadonUnit) -> None:
-        return await self.__get_interface().set_unit(unit)
+        return await self.__run("set_unit", lambda interface: interface.set_unit(unit))
+
+    async def __read_history(
+        self, retries: int, progress: HistoryProgressCallback | None
+    ) -> RadonEyeRawData:
+        # Frames received by failed attempt are kept, so next attempt (after reconnect if link was
+        # lost) only has to get what is still missing. Device can't resend part of history, so
+        # every attempt requests all of it again.
+        transfer: RadonEyeHistoryTransfer | None = None
+        for attempt in range(retries + 1):
+            if attempt > 0:
+                await self.clock.sleep(HISTORY_RETRY_DELAY * 2 ** (attempt - 1))
+            try:
+                if not self.client.is_connected:
+                    await self.client.connect()
+                if transfer is None:
+                    # interface is detected by services, so only after connect
+                    transfer = self.__get_interface().history_transfer()
+                history_transfer = transfer
+                raw = await self.__run(
+                    "history_raw",
+                    lambda interface: interface.history_raw(history_transfer, progress),
+                )
+            except Exception as e:
+                # lost notifications (timeout) and lost link can be retried, anything else (like
+                # unsupported device or malformed data) would fail the same way again
+                lost = isinstance(e, (asyncio.TimeoutError, ConnectionError))
+                if attempt == retries or (self.client.is_connected and not lost):
+                    raise
+                continue
+            if transfer.complete:
+                return raw
+        raise ValueError("History transfer is incomplete")
+
+    async def __run(self, name: str, operation: Callable[[RadonEyeInterface], Awaitable[T]]) -> T:
+        interface = self.__get_interface()
+        try:
+            if self.observed is None:
+                return await operation(interface)
+            async with self.observed.operation(name, interface.version):
+                return await operation(interface)
+        except Exception as e:
+            if self.frame_log is not None:
+                self.frame_log.dump(f"{name} failed: {str(e) or type(e).__name__}")
+            raise
 
     def __get_interface(self) -> RadonEyeInterface:
         if self.interface:
             return self.interface
 
+        if self.observed is not None:
+            started = self.clock.monotonic()
+            interface = self.__detect_interface()
+            duration = self.clock.monotonic() - started
+            self.observed.detected(interface.version, duration)
+            return interface
+        return self.__detect_interface()
+
+    def __detect_interface(self) -> RadonEyeInterface:
         for InterfaceClass in [InterfaceV2, InterfaceV1]:
             interface = InterfaceClass(
                 client=self.client,
                 status_read_timeout=self.status_read_timeout,
                 history_read_timeout=self.history_read_timeout,
-                debug=self.debug,
+                frame_log=self.frame_log,
+                memo=self.memo,
+                clock=self.clock,
             )
             if interface.supports():
                 self.interface = interface
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import selectors
+import time
+from typing import Any, Awaitable, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+# Time source for interfaces, client and daemon. Sleeps and timeouts are event loop timers, so
+# they follow the running loop: real time on regular loop, virtual time on VirtualTimeEventLoop.
+class Clock:
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        # unix timestamp
+        return time.time()
+
+    async def sleep(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+
+    async def wait_for(self, awaitable: Awaitable[T], timeout: float | None) -> T:
+        return await asyncio.wait_for(awaitable, timeout)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+# Clock of VirtualTimeEventLoop, must be used from coroutines running on that loop.
+class VirtualClock(Clock):
+    def __init__(self, start_time: float = 0.0) -> None:
+        self.start_time = start_time  # unix timestamp at loop time 0
+
+    def monotonic(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def time(self) -> float:
+        return self.start_time + self.monotonic()
+
+
+# Selector that doesn't wait for timers: when nothing is ready, virtual time jumps to the next
+# scheduled timer instead of sleeping until it is due. Without timers it waits for I/O (like data
+# from other threads) as usual.
+class VirtualTimeSelector(selectors.DefaultSelector):
+    def __init__(self) -> None:
+        super().__init__()
+        self.virtual_time = 0.0
+
+    def select(self, timeout: float | None = None) -> list[tuple[selectors.SelectorKey, int]]:
+        if timeout is None:
+            return super().select(None)
+        events = super().select(0)
+        if not events and timeout > 0:
+            self.virtual_time += timeout
+        return events
+
+
+# Event loop running on virtual time, a day of sleeps, polls and timeouts takes as long as the
+# callbacks take to run. Time starts at 0.
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self) -> None:
+        self.virtual_selector = VirtualTimeSelector()
+        super().__init__(self.virtual_selector)
+
+    def time(self) -> float:
+        return self.virtual_selector.virtual_time
+
+
+def run_virtual(main: Coroutine[Any, Any, T]) -> T:
+    # same as asyncio.run() but on virtual time
+    loop = VirtualTimeEventLoop()
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from struct import Struct
+from typing import Any, NamedTuple
+
+
+class MessageField(NamedTuple):
+    name: str
+    offset: int  # byte offset within message
+    format: str  # struct format of the value without byte order, like "B", "H", "f", "6s", "19p"
+
+
+# Message layout compiled into one precompiled struct, gaps between fields become pad bytes, so the
+# whole message is decoded (or encoded) with one C call instead of one call per field.
+class MessageSpec:
+    def __init__(self, fields: list[MessageField]) -> None:
+        fields = sorted(fields, key=lambda field: field.offset)
+        format = "<"
+        position = 0
+        for field in fields:
+            if field.offset < position:
+                raise ValueError(f"Field {field.name} overlaps previous field")
+            if field.offset > position:
+                format += f"{field.offset - position}x"
+            format += field.format
+            position = field.offset + Struct("<" + field.format).size
+        self.fields = fields
+        self.names = tuple(field.name for field in fields)
+        self.struct = Struct(format)
+        self.size = self.struct.size
+
+    def unpack(self, data: bytes | bytearray) -> tuple[Any, ...]:
+        # values in offset order, data can be longer than the message layout
+        return self.struct.unpack_from(data)
+
+    def unpack_dict(self, data: bytes | bytearray) -> dict[str, Any]:
+        return dict(zip(self.names, self.struct.unpack_from(data)))
+
+    def pack(self, **values: Any) -> bytearray:
+        return bytearray(self.struct.pack(*[values[name] for name in self.names]))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any, Literal, TypedDict
+
+from radoneye.model import RadonUnit
+from radoneye.util import convert_radon_value
+
+
+class RadonEyeAlarmStatus(TypedDict):
+    alarm_enabled: int
+    alarm_level_bq_m3: float
+    alarm_level_pci_l: float
+    alarm_interval_minutes: int
+
+
+async def configure_alarm(
+    client: Any,  # RadonEyeClient or anything with the same methods
+    status: Literal["on", "off"] | None = None,
+    level: float | None = None,
+    unit: RadonUnit | None = None,
+    interval: int | None = None,
+) -> RadonEyeAlarmStatus:
+    # nothing to change, just read current configuration
+    if status is None and level is None and interval is None:
+        current = await client.status()
+
+        return {
+            "alarm_enabled": current["alarm_enabled"],
+            "alarm_level_bq_m3": current["alarm_level_bq_m3"],
+            "alarm_level_pci_l": current["alarm_level_pci_l"],
+            "alarm_interval_minutes": current["alarm_interval_minutes"],
+        }
+
+    # everything is known, no need to read current configuration
+    if status is not None and level is not None and unit is not None and interval is not None:
+        await client.set_alarm(
+            enabled=status == "on",
+            level=level,
+            unit=unit,
+            interval=interval,
+        )
+
+        return {
+            "alarm_enabled": status == "on",
+            "alarm_level_bq_m3": convert_radon_value(level, unit, "bq/m3"),
+            "alarm_level_pci_l": convert_radon_value(level, unit, "pci/l"),
+            "alarm_interval_minutes": interval,
+        }
+
+    # partial update, missing values are taken from current configuration
+    current = await client.status()
+
+    new_enabled = status == "on" if status is not None else bool(current["alarm_enabled"])
+
+    if level is not None:
+        new_unit = unit or current["display_unit"]
+        new_level = level
+    elif current["display_unit"] == "pci/l":
+        new_level = current["alarm_level_pci_l"]
+        new_unit = "pci/l"
+    else:
+        new_level = current["alarm_level_bq_m3"]
+        new_unit = "bq/m3"
+
+    new_interval = interval or current["alarm_interval_minutes"]
+
+    await client.set_alarm(
+        enabled=new_enabled,
+        level=new_level,
+        unit=new_unit,
+        interval=new_interval,
+    )
+
+    return {
+        "alarm_enabled": new_enabled,
+        "alarm_level_bq_m3": convert_radon_value(new_level, new_unit, "bq/m3"),
+        "alarm_level_pci_l": convert_radon_value(new_level, new_unit, "pci/l"),
+        "alarm_interval_minutes": new_interval,
+    }
+
+
+async def configure_unit(client: Any, unit: RadonUnit | None = None) -> RadonUnit:
+    if unit is None:
+        status = await client.status()
+        return status["display_unit"]
+    await client.set_unit(unit)
+    return unit
@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import signal
+import sys
+from typing import Any, Literal, TypedDict
+
+from radoneye.api import ApiOutput
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.exporter import PrometheusOutput
+from radoneye.model import RadonEyeStatus
+from radoneye.output import FileOutput, RadonEyeEvent, RadonEyeOutput, StreamOutput
+from radoneye.pool import RadonEyeConnectionPool
+from radoneye.remote import RadonEyeSocketServer, execute_command
+from radoneye.schedule import (
+    AdaptiveSchedule,
+    AirtimeBudget,
+    CycleAlignedSchedule,
+    IntervalSchedule,
+    RadonEyeSchedule,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 600  # sec, device updates measurement every 10 minutes
+DEFAULT_RETRY_INTERVAL = 60  # sec
+DEFAULT_HISTORY_RETRIES = 2  # long history transfer is likely to lose a notification
+
+OUTPUT_TYPES = ["stdout", "file", "prometheus", "api"]
+SCHEDULE_TYPES = ["interval", "aligned", "adaptive"]
+
+
+class RadonEyeDeviceConfig(TypedDict):
+    address: str
+    name: str
+    poll_interval: float  # sec
+    schedule: str  # interval, aligned (to device measurement cycle) or adaptive (to level trend)
+    max_poll_interval: float  # sec, adaptive schedule backs off up to this interval
+    history_interval: float | None  # sec, None disables history sync
+
+
+# output specific options next to "type", e.g. {"type": "file", "path": "radon.ndjson"}
+RadonEyeOutputConfig = dict[str, Any]
+
+
+class RadonEyeInventory(TypedDict):
+    adapter: str | None
+    connect_timeout: float
+    status_read_timeout: float
+    history_read_timeout: float
+    max_connections: int | None
+    max_reads_per_hour: float | None  # airtime budget shared by all devices
+    retry_interval: float
+    history_retries: int  # history is requested again (keeping received data) after lost data
+    outputs: list[RadonEyeOutputConfig]
+    devices: list[RadonEyeDeviceConfig]
+
+
+def parse_positive(obj: dict[str, Any], key: str, default: float) -> float:
+    value = float(obj.get(key, default))
+    if value <= 0:
+        raise ValueError(f"Inventory {key} must be positive")
+    return value
+
+
+def parse_output(output: Any) -> RadonEyeOutputConfig:
+    if not isinstance(output, dict):
+        raise ValueError(f"Inventory output must be an object: {output}")
+    if output.get("type") not in OUTPUT_TYPES:
+        raise ValueError(f"Unsupported output type: {output.get('type')}")
+    if output["type"] == "file" and not output.get("path"):
+        raise ValueError("Inventory file output must have a path")
+    if output["type"] == "api" and not output.get("listen"):
+        raise ValueError("Inventory api output must have a listen address")
+    if output["type"] == "prometheus" and not output.get("listen") and not output.get("textfile"):
+        raise ValueError("Inventory prometheus output must have a listen address or textfile")
+    return output
+
+
+def parse_inventory(obj: Any) -> RadonEyeInventory:
+    if not isinstance(obj, dict):
+        raise ValueError("Inventory must be an object")
+
+    devices: list[RadonEyeDeviceConfig] = []
+    for dev in obj.get("devices", []):
+        if not isinstance(dev, dict) or not dev.get("address"):
+            raise ValueError(f"Inventory device must have an address: {dev}")
+        if dev.get("schedule", "interval") not in SCHEDULE_TYPES:
+            raise ValueError(f"Unsupported schedule type: {dev.get('schedule')}")
+        poll_interval = parse_positive(dev, "poll_interval", DEFAULT_POLL_INTERVAL)
+        devices.append(
+            {
+                "address": str(dev["address"]),
+                "name": str(dev.get("name") or dev["address"]),
+                "poll_interval": poll_interval,
+                "schedule": str(dev.get("schedule", "interval")),
+                "max_poll_interval": parse_positive(dev, "max_poll_interval", poll_interval * 6),
+                "history_interval": (
+                    parse_positive(dev, "history_interval", 0)
+                    if dev.get("history_interval") is not None
+                    else None
+                ),
+            }
+        )
+
+    addresses = [dev["address"] for dev in devices]
+    if len(set(addresses)) != len(addresses):
+        raise ValueError("Inventory has duplicate device addresses")
+
+    outputs = [parse_output(output) for output in obj.get("outputs") or [{"type": "stdout"}]]
+
+    max_connections = obj.get("max_connections")
+    if max_connections is not None and int(max_connections) <= 0:
+        raise ValueError("Inventory max_connections must be positive")
+    history_retries = int(obj.get("history_retries", DEFAULT_HISTORY_RETRIES))
+    if history_retries < 0:
+        raise ValueError("Inventory history_retries must not be negative")
+    max_reads_per_hour = obj.get("max_reads_per_hour")
+    if max_reads_per_hour is not None and float(max_reads_per_hour) <= 0:
+        raise ValueError("Inventory max_reads_per_hour must be positive")
+
+    return {
+        "adapter": obj.get("adapter"),
+        "connect_timeout": float(obj.get("connect_timeout", 30)),
+        "status_read_timeout": float(obj.get("status_read_timeout", 5)),
+        "history_read_timeout": float(obj.get("history_read_timeout", 60)),
+        "max_connections": int(max_connections) if max_connections is not None else None,
+        "max_reads_per_hour": (
+            float(max_reads_per_hour) if max_reads_per_hour is not None else None
+        ),
+        "retry_interval": parse_positive(obj, "retry_interval", DEFAULT_RETRY_INTERVAL),
+        "history_retries": history_retries,
+        "outputs": outputs,
+        "devices": devices,
+    }
+
+
+def load_inventory(path: str) -> RadonEyeInventory:
+    with open(path) as f:
+        return parse_inventory(json.load(f))
+
+
+def create_output(config: RadonEyeOutputConfig) -> RadonEyeOutput:
+    if config["type"] == "stdout":
+        return StreamOutput(sys.stdout)
+    if config["type"] == "file":
+        return FileOutput(config["path"])
+    if config["type"] == "prometheus":
+        return PrometheusOutput(listen=config.get("listen"), textfile=config.get("textfile"))
+    if config["type"] == "api":
+        return ApiOutput(listen=config["listen"])
+    raise ValueError(f"Unsupported output type: {config['type']}")
+
+
+def create_schedule(device: RadonEyeDeviceConfig) -> RadonEyeSchedule:
+    if device["schedule"] == "aligned":
+        return CycleAlignedSchedule(fallback_interval=device["poll_interval"])
+    if device["schedule"] == "adaptive":
+        return AdaptiveSchedule(
+            min_interval=device["poll_interval"], max_interval=device["max_poll_interval"]
+        )
+    return IntervalSchedule(device["poll_interval"])
+
+
+class RadonEyeDaemon:
+    def __init__(
+        self,
+        config_path: str,
+        adapter: str | None = None,
+        debug: bool = False,
+        socket_path: str | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        self.config_path = config_path
+        self.adapter = adapter
+        self.debug = debug
+        self.clock = clock
+        self.socket_server = (
+            RadonEyeSocketServer(socket_path, self.handle_request) if socket_path else None
+        )
+        self.statuses: dict[str, tuple[float, RadonEyeStatus]] = {}  # last status with loop time
+        self.inventory: RadonEyeInventory | None = None
+        self.pool: RadonEyeConnectionPool | None = None
+        self.budget: AirtimeBudget | None = None
+        self.outputs: list[RadonEyeOutput] = []
+        self.tasks: dict[str, asyncio.Task[None]] = {}
+        self.devices: dict[str, RadonEyeDeviceConfig] = {}
+        self.reload_tasks: set[asyncio.Task[None]] = set()  # loop keeps only weak references
+        self.apply_lock = asyncio.Lock()  # inventory changes are applied one at a time
+        self.stop_event = asyncio.Event()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        handled_signals: list[signal.Signals] = []
+        for sig, handler in [
+            (signal.SIGINT, self.stop),
+            (signal.SIGTERM, self.stop),
+            (signal.SIGHUP, self.reload),
+        ]:
+            try:
+                loop.add_signal_handler(sig, handler)
+                handled_signals.append(sig)
+            except (NotImplementedError, AttributeError, RuntimeError):
+                pass  # not available on this platform or loop
+
+        try:
+            await self.apply(load_inventory(self.config_path))
+            if self.socket_server is not None:
+                await self.socket_server.start()
+            await self.stop_event.wait()
+        finally:
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+            await self.shutdown()
+
+    def stop(self) -> None:
+        logger.info("Stopping")
+        self.stop_event.set()
+
+    def reload(self) -> None:
+        task = asyncio.create_task(self.reload_inventory())
+        self.reload_tasks.add(task)
+        task.add_done_callback(self.reload_tasks.discard)
+
+    async def reload_inventory(self) -> None:
+        logger.info("Reloading inventory from %s", self.config_path)
+        try:
+            inventory = load_inventory(self.config_path)
+        except Exception as e:
+            logger.error("Unable to reload inventory, keeping current one: %s", e)
+            return
+        try:
+            await self.apply(inventory)
+        except Exception as e:
+            logger.error("Unable to apply inventory, keeping current one: %s", e)
+
+    async def apply(self, inventory: RadonEyeInventory) -> None:
+        async with self.apply_lock:
+            await self.__apply(inventory)
+
+    async def __apply(self, inventory: RadonEyeInventory) -> None:
+        previous = self.inventory
+
+        def settings(inv: RadonEyeInventory | None) -> Any:
+            return inv and {k: v for k, v in inv.items() if k not in ["outputs", "devices"]}
+
+        restart_all = settings(previous) != settings(inventory)
+
+        # outputs go first, if they can't be started nothing else is changed
+        await self.replace_outputs(previous["outputs"] if previous else [], inventory["outputs"])
+        self.inventory = inventory
+
+        new_devices = {dev["address"]: dev for dev in inventory["devices"]}
+        for address in list(self.tasks.keys()):
+            if restart_all or new_devices.get(address) != self.devices.get(address):
+                await self.cancel_device(address)
+
+        if restart_all:
+            if self.pool is not None:
+                await self.pool.close()
+            self.pool = RadonEyeConnectionPool(
+                connect_timeout=inventory["connect_timeout"],
+                status_read_timeout=inventory["status_read_timeout"],
+                history_read_timeout=inventory["history_read_timeout"],
+                adapter=inventory["adapter"] or self.adapter,
+                debug=self.debug,
+                max_connections=inventory["max_connections"],
+                clock=self.clock,
+            )
+            self.budget = (
+                AirtimeBudget(inventory["max_reads_per_hour"])
+                if inventory["max_reads_per_hour"] is not None
+                else None
+            )
+        elif self.pool is not None:
+            for address in self.devices.keys() - new_devices.keys():
+                await self.pool.release(address)
+
+        self.devices = new_devices
+        for address, device in new_devices.items():
+            if address not in self.tasks:
+                self.tasks[address] = asyncio.create_task(self.poll_device(device))
+
+    async def replace_outputs(
+        self, previous: list[RadonEyeOutputConfig], configs: list[RadonEyeOutputConfig]
+    ) -> None:
+        # outputs with unchanged config keep running (and keep their state)
+        outputs: list[RadonEyeOutput | None] = []
+        removed = list(range(len(self.outputs)))
+        for config in configs:
+            index = next((i for i in removed if previous[i] == config), None)
+            if index is None:
+                outputs.append(None)
+            else:
+                removed.remove(index)
+                outputs.append(self.outputs[index])
+
+        # removed outputs are closed first to free their resources (e.g. listen address)
+        for index in removed:
+            await self.outputs[index].close()
+
+        started: list[RadonEyeOutput] = []
+        try:
+            for i, config in enumerate(configs):
+                if outputs[i] is None:
+                    output = create_output(config)
+                    started.append(output)
+                    await output.start()
+                    outputs[i] = output
+        except Exception:
+            for output in started:
+                await output.close()
+            for index in removed:
+                self.outputs[index] = create_output(previous[index])
+                await self.outputs[index].start()
+            raise
+
+        self.outputs = [output for output in outputs if output is not None]
+
+    async def cancel_device(self, address: str) -> None:
+        task = self.tasks.pop(address)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def shutdown(self) -> None:
+        if self.socket_server is not None:
+            await self.socket_server.close()
+        # reload in progress would start devices again after they are cancelled below
+        await asyncio.gather(*self.reload_tasks, return_exceptions=True)
+        for address in list(self.tasks.keys()):
+            await self.cancel_device(address)
+        if self.pool is not None:
+            await self.pool.close()
+        for output in self.outputs:
+            await output.close()
+        self.outputs = []
+
+    async def emit(self, event: RadonEyeEvent) -> None:
+        for output in self.outputs:
+            try:
+                await output.emit(event)
+            except Exception as e:
+                logger.error("Unable to emit event to output: %s", e)
+
+    def create_event(
+        self,
+        event_type: Literal["status", "history", "error", "poll"],
+        device: RadonEyeDeviceConfig,
+        data: Any,
+    ) -> RadonEyeEvent:
+        return {
+            "type": event_type,
+            "address": device["address"],
+            "name": device["name"],
+            "time": self.clock.time(),
+            "data": data,
+        }
+
+    async def handle_request(self, request: dict[str, Any]) -> Any:
+        # requests forwarded by CLI over unix socket
+        assert self.pool is not None
+        address = request.get("address")
+        if not address:
+            raise ValueError("Request must have an address")
+
+        loop = asyncio.get_running_loop()
+        max_age = request.get("max_age")
+        cached = self.statuses.get(address)
+        if request.get("command") == "status" and max_age is not None and cached is not None:
+            if loop.time() - cached[0] <= max_age:
+                return cached[1]
+
+        pool = self.pool
+        try:
+            async with pool.acquire(address) as client:
+                result = await execute_command(client, request)
+        finally:
+            # device isn't polled, so its only link is not kept (phone app and others can connect)
+            if address not in self.devices:
+                await pool.release(address)
+        if request.get("command") == "status":
+            self.statuses[address] = (loop.time(), result)
+        return result
+
+    async def poll_device(self, device: RadonEyeDeviceConfig) -> None:
+        assert self.pool is not None and self.inventory is not None
+        pool = self.pool
+        budget = self.budget
+        schedule = create_schedule(device)
+        loop = asyncio.get_running_loop()
+        history_due = loop.time()
+        status_emitted = False  # last poll emitted status, not error
+
+        while True:
+            if budget is not None:
+                await budget.acquire(schedule.priority())
+            try:
+                async with pool.acquire(device["address"]) as client:
+                    status = await client.status()
+                    self.statuses[device["address"]] = (loop.time(), status)
+                    schedule.observe(loop.time(), status)
+                    # same frames as last time, outputs already have this status, only the poll
+                    # is recorded (for exporter and API health)
+                    if status_emitted and client.status_unchanged:
+                        await self.emit(self.create_event("poll", device, None))
+                    else:
+                        await self.emit(self.create_event("status", device, status))
+                        status_emitted = True
+
+                    if device["history_interval"] is not None and loop.time() >= history_due:
+                        history = await client.history(retries=self.inventory["history_retries"])
+                        await self.emit(self.create_event("history", device, history))
+                        history_due = loop.time() + device["history_interval"]
+
+                delay = schedule.next_delay(loop.time())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                logger.warning(
+                    "Unable to poll %s (%s): %s", device["name"], device["address"], error
+                )
+                await self.emit(self.create_event("error", device, error))
+                status_emitted = False
+                delay = min(schedule.next_delay(loop.time()), self.inventory["retry_interval"])
+
+            await self.clock.sleep(delay)
@@ -1,4 +1,18 @@
+from __future__ import annotations
+
+import logging
 import string
+from collections import deque
+from datetime import datetime
+from typing import Literal, NamedTuple
+
+from radoneye.clock import SYSTEM_CLOCK, Clock
+
+logger = logging.getLogger(__name__)
+
+FRAME_LOG_SIZE = 64  # recent frames kept per device
+
+Direction = Literal["<-", "->"]  # notification from device, write to device
 
 
 def is_printable(ch: str):
@@ -12,31 +26,89 @@ def print_byte(b: int) -> str:
     return ch if is_printable(ch) else "."
 
 
-def split_data(data: bytearray, size: int):
+def split_data(data: bytes | bytearray, size: int):
     for i in range(0, len(data), size):
         yield data[i : i + size]
 
 
-def dump_data_str(data: bytearray) -> str:
+def dump_data_str(data: bytes | bytearray) -> str:
     return "".join([print_byte(b) for b in data])
 
 
-def dump_data(data: bytearray, input: bool, debug: bool) -> bytearray:
-    if debug:
-        dir = "<-" if input else "->"
-        text = "\n   ".join(
+# Hex and ASCII dump, formatted only when log record is actually emitted.
+class HexDump:
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def __str__(self) -> str:
+        return "\n   ".join(
             [
                 f"{chunk.hex(' ').ljust(48)}# {dump_data_str(chunk)}"
-                for chunk in split_data(data, 16)
+                for chunk in split_data(self.data, 16)
             ]
         )
-        print(f"{dir} {text}")
-    return data
 
 
-def dump_in(data: bytearray, debug: bool) -> bytearray:
-    return dump_data(data, True, debug)
+class LoggedFrame(NamedTuple):
+    time: float  # unix timestamp
+    direction: Direction
+    data: bytes
+
+    def __str__(self) -> str:
+        time_str = datetime.fromtimestamp(self.time).strftime("%H:%M:%S.%f")[:-3]
+        return f"{time_str} {self.direction} {HexDump(self.data)}"
+
+
+class FrameLogDump:
+    __slots__ = ("frames",)
 
+    def __init__(self, frames: list[LoggedFrame]) -> None:
+        self.frames = frames
 
-def dump_out(data: bytearray, debug: bool) -> bytearray:
-    return dump_data(data, False, debug)
+    def __str__(self) -> str:
+        return "\n".join(str(frame) for frame in self.frames)
+
+
+# Frames of one device, every frame is logged as debug event (with address, direction and frame
+# as record attributes for structured handlers) and kept in ring buffer, so recent traffic can be
+# dumped when operation fails even if debug events are not emitted.
+class FrameLog:
+    def __init__(self, address: str, size: int = FRAME_LOG_SIZE, clock: Clock = SYSTEM_CLOCK):
+        self.address = address
+        self.clock = clock
+        self.frames: deque[LoggedFrame] = deque(maxlen=size)
+
+    def record(self, direction: Direction, data: bytearray) -> None:
+        frame = bytes(data)
+        self.frames.append(LoggedFrame(self.clock.time(), direction, frame))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "%s %s %s",
+                self.address,
+                direction,
+                HexDump(frame),
+                extra={"address": self.address, "direction": direction, "frame": frame},
+            )
+
+    def dump(self, reason: str) -> None:
+        logger.warning(
+            "%s %s, recent frames:\n%s",
+            self.address,
+            reason,
+            FrameLogDump(list(self.frames)),
+            extra={"address": self.address, "frames": list(self.frames)},
+        )
+
+
+def dump_in(data: bytearray, frame_log: FrameLog | None) -> bytearray:
+    if frame_log is not None:
+        frame_log.record("<-", data)
+    return data
+
+
+def dump_out(data: bytearray, frame_log: FrameLog | None) -> bytearray:
+    if frame_log is not None:
+        frame_log.record("->", data)
+    return data
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import mmap
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import IO, Any, Iterable, Iterator, Literal, NamedTuple
+
+from radoneye import interface_v1, interface_v2
+from radoneye.capture import KIND_NOTIFY, KIND_WRITE, CaptureRecord, read_capture
+from radoneye.model import RadonEyeFrame, RadonEyeRawData
+from radoneye.raw import parse_history_raw, parse_status_raw
+from radoneye.record import STATUS_COLUMNS, StatusBatch
+
+DecodeOutputType = Literal["ndjson", "csv"]
+
+ReadType = Literal["status", "history"]
+
+# csv has one row per status read, identity columns first, then numeric StatusBatch columns
+CSV_COLUMNS = [
+    "file",
+    "offset",
+    "serial",
+    "model",
+    "firmware_version",
+    "display_unit",
+    *[name for name, _ in STATUS_COLUMNS[1:]],
+]
+
+
+class DecodeResult(NamedTuple):
+    text: str  # formatted output rows
+    frames: int  # notification frames in capture
+    reads: int  # decoded status and history reads
+    errors: list[str]
+
+
+def assemble_reads(records: Iterable[CaptureRecord]) -> Iterator[tuple[ReadType, RadonEyeRawData]]:
+    # groups captured notifications into complete reads, same way interfaces do it during read
+    v1_status: dict[int, RadonEyeFrame] = {}
+    v1_history: list[RadonEyeFrame] = []
+    v1_history_size = 0
+    v1_history_bytes = 0
+    v2_history: list[RadonEyeFrame] = []
+    v2_status: RadonEyeFrame | None = None  # not emitted yet, history read might start with it
+
+    preamble_history_v2 = interface_v2.COMMAND_HISTORY
+    history_command_v2 = bytes([preamble_history_v2])
+
+    for record in records:
+        if v2_status is not None and record.kind in (KIND_WRITE, KIND_NOTIFY):
+            if record.kind == KIND_WRITE and record.data == history_command_v2:
+                # status requested right before history has history size (for progress), it is
+                # part of history read (indistinguishable from status read followed by history)
+                pages = [frame for frame in v2_history if frame.data[0] == preamble_history_v2]
+                v2_history = [v2_status, *pages]
+                v2_status = None
+                continue
+            yield "status", {"interface": 2, "frames": [v2_status]}
+            v2_status = None
+
+        if record.kind != KIND_NOTIFY or not record.data:
+            continue
+        frame = RadonEyeFrame(record.time, record.data)
+        preamble = record.data[0]
+
+        if record.uuid == interface_v2.CHAR_STATUS:
+            if preamble == interface_v2.COMMAND_STATUS:
+                v2_status = frame
+        elif record.uuid == interface_v2.CHAR_HISTORY:
+            if preamble == interface_v2.COMMAND_HISTORY:
+                v2_history.append(frame)
+                # byte 1 is page count, byte 2 is page number
+                if record.data[1] == record.data[2]:
+                    yield "history", {"interface": 2, "frames": v2_history}
+                    v2_history = []
+        elif record.uuid == interface_v1.CHAR_STATUS:
+            if preamble in interface_v1.STATUS_PREAMBLES:
+                v1_status[preamble] = frame
+                if len(v1_status) == len(interface_v1.STATUS_PREAMBLES):
+                    frames = [v1_status[preamble] for preamble in interface_v1.STATUS_PREAMBLES]
+                    yield "status", {"interface": 1, "frames": frames}
+                    v1_status = {}
+            elif preamble == interface_v1.MSG_PREAMBLE_E8:
+                v1_history = [frame]
+                v1_history_size = interface_v1.parse_history_size(bytearray(record.data))
+                v1_history_bytes = 0
+                if v1_history_size == 0:
+                    yield "history", {"interface": 1, "frames": v1_history}
+                    v1_history = []
+        elif record.uuid == interface_v1.CHAR_HISTORY and v1_history:
+            v1_history.append(frame)
+            v1_history_bytes += len(record.data)
+            if v1_history_bytes >= v1_history_size * 2:
+                yield "history", {"interface": 1, "frames": v1_history}
+                v1_history = []
+
+    if v2_status is not None:
+        yield "status", {"interface": 2, "frames": [v2_status]}
+
+
+@contextmanager
+def open_capture_file(path: str) -> Iterator[Iterator[CaptureRecord]]:
+    # file is memory mapped and records are read lazily, only payloads of records being decoded
+    # are copied out of it
+    with open(path, "rb") as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file can't be mapped
+            yield read_capture(file.read())
+            return
+        with mapped:
+            yield read_capture(mapped)
+
+
+def decode_file(path: str, output: DecodeOutputType) -> DecodeResult:
+    # runs in worker process, formatting is done here too, so parent process only writes
+    frames = 0
+    reads = 0
+    errors: list[str] = []
+    parsed: list[tuple[ReadType, float, Any]] = []
+    start: float | None = None
+
+    def relative(records: Iterator[CaptureRecord]) -> Iterator[CaptureRecord]:
+        # offset from the first record, monotonic timestamps have no meaning outside of capture
+        nonlocal frames, start
+        for record in records:
+            if start is None:
+                start = record.time
+            if record.kind == KIND_NOTIFY:
+                frames += 1
+            yield record._replace(time=record.time - start)
+
+    try:
+        with open_capture_file(path) as records:
+            for read_type, raw in assemble_reads(relative(records)):
+                reads += 1
+                offset = raw["frames"][-1].time
+                try:
+                    if read_type == "status":
+                        data = parse_status_raw(raw)
+                    else:
+                        data = parse_history_raw(raw)
+                except (ValueError, IndexError, KeyError, struct.error) as e:
+                    # one bad read (like truncated frame) is reported, the rest is decoded
+                    errors.append(f"{path}: {read_type} at {offset:.3f}s: {e}")
+                    continue
+                parsed.append((read_type, offset, data))
+    except (OSError, ValueError) as e:
+        return DecodeResult("", 0, 0, [f"{path}: {e}"])
+
+    text = format_csv(path, parsed) if output == "csv" else format_ndjson(path, parsed)
+    return DecodeResult(text, frames, reads, errors)
+
+
+def format_ndjson(path: str, parsed: list[tuple[ReadType, float, Any]]) -> str:
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    return "".join(
+        encode({"file": path, "type": read_type, "offset": offset, "data": data}) + "\n"
+        for read_type, offset, data in parsed
+    )
+
+
+def format_csv(path: str, parsed: list[tuple[ReadType, float, Any]]) -> str:
+    # history reads have no place in status columns, they are only in ndjson output
+    batch = StatusBatch()
+    for read_type, offset, data in parsed:
+        if read_type == "status":
+            batch.append(data, offset)
+
+    columns = [batch.column(name) for name in CSV_COLUMNS[6:]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for index in range(len(batch)):
+        writer.writerow(
+            [
+                path,
+                batch.column("time")[index],
+                *batch.identities[batch.identity[index]],
+                *[column[index] for column in columns],
+            ]
+        )
+    return buffer.getvalue()
+
+
+# Decodes capture files in a process pool, one task per file. Returns number of failed files or
+# reads and writes throughput summary to log stream.
+def decode_files(
+    paths: list[str],
+    output: DecodeOutputType,
+    stream: IO[str],
+    log: IO[str],
+    jobs: int | None = None,
+) -> int:
+    started = time.perf_counter()
+    frames = 0
+    reads = 0
+    errors = 0
+
+    if output == "csv":
+        stream.write(",".join(CSV_COLUMNS) + "\r\n")
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # map keeps file order, so output is the same for every run
+        for result in executor.map(decode_file, paths, [output] * len(paths)):
+            stream.write(result.text)
+            frames += result.frames
+            reads += result.reads
+            errors += len(result.errors)
+            for error in result.errors:
+                log.write(f"error\t{error}\n")
+
+    elapsed = time.perf_counter() - started
+    rate = frames / elapsed if elapsed > 0 else 0
+    log.write(f"decoded {frames} frames ({reads} reads) in {elapsed:.3f}s, {rate:.0f} frames/s\n")
+    return errors
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any
+
+from radoneye.httpserver import HttpRequest, HttpResponse, HttpServer, parse_listen
+from radoneye.model import RadonEyeStatus
+from radoneye.output import RadonEyeEvent, RadonEyeOutput
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# status key, metric name, help
+STATUS_METRICS = [
+    ("latest_bq_m3", "radoneye_latest_bq_m3", "Latest radon level in Bq/m3"),
+    ("day_avg_bq_m3", "radoneye_day_avg_bq_m3", "Day average radon level in Bq/m3"),
+    ("month_avg_bq_m3", "radoneye_month_avg_bq_m3", "Month average radon level in Bq/m3"),
+    ("peak_bq_m3", "radoneye_peak_bq_m3", "Peak radon level in Bq/m3"),
+    ("counts_current", "radoneye_counts_current", "Current raw particle count"),
+    ("counts_previous", "radoneye_counts_previous", "Previous raw particle count"),
+    ("uptime_minutes", "radoneye_uptime_minutes", "Device uptime in minutes"),
+    ("alarm_enabled", "radoneye_alarm_enabled", "Alarm enabled (1) or disabled (0)"),
+    ("alarm_level_bq_m3", "radoneye_alarm_level_bq_m3", "Alarm level in Bq/m3"),
+    ("alarm_interval_minutes", "radoneye_alarm_interval_minutes", "Alarm interval in minutes"),
+]
+
+INFO_KEYS = ["serial", "model", "firmware_version", "display_unit"]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    return ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items())
+
+
+def format_value(value: float) -> str:
+    return repr(float(value))
+
+
+class DeviceMetrics:
+    def __init__(self, address: str, name: str) -> None:
+        self.labels = format_labels({"address": address, "name": name})
+        self.status: RadonEyeStatus | None = None
+        self.polls_total = 0
+        self.errors_total = 0
+        self.up = 0
+        self.last_poll_time = 0.0
+        self.last_success_time = 0.0
+
+
+# Keeps last known state of every device and renders it in Prometheus text format.
+# Rendered body is cached until next update, so scrapes never wait for bluetooth.
+class PrometheusOutput(RadonEyeOutput):
+    def __init__(self, listen: str | None = None, textfile: str | None = None) -> None:
+        self.listen = listen
+        self.textfile = textfile
+        self.devices: dict[str, DeviceMetrics] = {}
+        self.body: bytes | None = None
+        self.server: HttpServer | None = None
+
+    async def start(self) -> None:
+        if self.listen is not None:
+            self.server = HttpServer(self.handle)
+            await self.server.start(*parse_listen(self.listen))
+
+    async def close(self) -> None:
+        if self.server is not None:
+            await self.server.close()
+            self.server = None
+
+    async def emit(self, event: RadonEyeEvent) -> None:
+        if event["type"] == "history":
+            return
+
+        device = self.devices.get(event["address"])
+        if device is None or device.labels != format_labels(
+            {"address": event["address"], "name": event["name"]}
+        ):
+            device = DeviceMetrics(event["address"], event["name"])
+            self.devices[event["address"]] = device
+
+        device.polls_total += 1
+        device.last_poll_time = event["time"]
+        if event["type"] in ("status", "poll"):
+            if event["type"] == "status":
+                device.status = event["data"]
+            device.up = 1
+            device.last_success_time = event["time"]
+        else:
+            device.errors_total += 1
+            device.up = 0
+
+        self.body = None
+        if self.textfile is not None:
+            write_atomic(self.textfile, self.render())
+
+    def render(self) -> bytes:
+        if self.body is not None:
+            return self.body
+
+        devices = [self.devices[address] for address in sorted(self.devices.keys())]
+        lines: list[str] = []
+
+        def family(
+            name: str, help_text: str, metric_type: str, samples: list[tuple[str, Any]]
+        ) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{{{labels}}} {format_value(value)}")
+
+        with_status = [(device, device.status) for device in devices if device.status is not None]
+
+        family(
+            "radoneye_info",
+            "Device information",
+            "gauge",
+            [
+                (
+                    device.labels
+                    + ","
+                    + format_labels({key: str(status[key]) for key in INFO_KEYS}),
+                    1,
+                )
+                for device, status in with_status
+            ],
+        )
+        for key, name, help_text in STATUS_METRICS:
+            family(
+                name,
+                help_text,
+                "gauge",
+                [(device.labels, status[key]) for device, status in with_status],
+            )
+
+        family(
+            "radoneye_up",
+            "Last poll succeeded (1) or failed (0)",
+            "gauge",
+            [(device.labels, device.up) for device in devices],
+        )
+        family(
+            "radoneye_polls_total",
+            "Number of polls",
+            "counter",
+            [(device.labels, device.polls_total) for device in devices],
+        )
+        family(
+            "radoneye_poll_errors_total",
+            "Number of failed polls",
+            "counter",
+            [(device.labels, device.errors_total) for device in devices],
+        )
+        family(
+            "radoneye_last_poll_timestamp_seconds",
+            "Time of last poll",
+            "gauge",
+            [(device.labels, device.last_poll_time) for device in devices],
+        )
+        family(
+            "radoneye_last_success_timestamp_seconds",
+            "Time of last successful poll",
+            "gauge",
+            [(device.labels, device.last_success_time) for device in devices],
+        )
+
+        self.body = ("\n".join(lines) + "\n").encode()
+        return self.body
+
+    def handle(self, request: HttpRequest) -> HttpResponse:
+        if request.path != "/metrics":
+            return HttpResponse(404, {"Content-Type": "text/plain"}, b"Not Found\n")
+        return HttpResponse(200, {"Content-Type": CONTENT_TYPE}, self.render())
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    # textfile collector must never see partially written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
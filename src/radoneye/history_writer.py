@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+from typing import IO, Literal
+
+from radoneye.model import RadonEyeHistory
+
+HISTORY_INTERVAL = 3600  # sec, device stores hourly averages
+
+CHUNK_ROWS = 4096  # rows formatted per write
+
+HistoryRowFormat = Literal["ndjson", "csv"]
+
+
+def format_timestamp(value: float) -> str:
+    return datetime.fromtimestamp(value, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# Writes history as one row per value. Rows are formatted in chunks and written to the stream with
+# one call per chunk, so large histories don't pay per row write and don't need whole output to be
+# built in memory. Device doesn't report time of values, it is reconstructed backwards from read
+# time (last value is the most recent one).
+class HistoryWriter:
+    def __init__(
+        self,
+        stream: IO[str],
+        row_format: HistoryRowFormat,
+        timestamps: bool = False,
+        with_address: bool = False,
+    ) -> None:
+        self.stream = stream
+        self.row_format = row_format
+        self.timestamps = timestamps
+        self.with_address = with_address
+
+    def write_header(self) -> None:
+        if self.row_format != "csv":
+            return
+        columns = ["index", "bq_m3", "pci_l"]
+        if self.timestamps:
+            columns.append("time")
+        if self.with_address:
+            columns.insert(0, "address")
+        self.stream.write(",".join(columns) + "\r\n")
+
+    def write(
+        self,
+        history: RadonEyeHistory,
+        address: str | None = None,
+        end_time: float | None = None,
+    ) -> None:
+        values_bq_m3 = history["values_bq_m3"]
+        values_pci_l = history["values_pci_l"]
+        count = len(values_bq_m3)
+        if end_time is None:
+            end_time = time.time()
+        for start in range(0, count, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, count)
+            times: list[str] | None = None
+            if self.timestamps:
+                times = [
+                    format_timestamp(end_time - (count - 1 - index) * HISTORY_INTERVAL)
+                    for index in range(start, stop)
+                ]
+            if self.row_format == "csv":
+                chunk = self.format_csv(
+                    values_bq_m3[start:stop], values_pci_l[start:stop], start, times, address
+                )
+            else:
+                chunk = self.format_ndjson(
+                    values_bq_m3[start:stop], values_pci_l[start:stop], start, times, address
+                )
+            self.stream.write(chunk)
+        self.stream.flush()
+
+    def format_csv(
+        self,
+        values_bq_m3: list[float],
+        values_pci_l: list[float],
+        offset: int,
+        times: list[str] | None,
+        address: str | None,
+    ) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        rows: list[list[object]] = [
+            [offset + index + 1, value_bq_m3, values_pci_l[index]]
+            for index, value_bq_m3 in enumerate(values_bq_m3)
+        ]
+        if times is not None:
+            for row, timestamp in zip(rows, times):
+                row.append(timestamp)
+        if self.with_address:
+            for row in rows:
+                row.insert(0, address or "")
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    def format_ndjson(
+        self,
+        values_bq_m3: list[float],
+        values_pci_l: list[float],
+        offset: int,
+        times: list[str] | None,
+        address: str | None,
+    ) -> str:
+        # values are plain numbers, so rows are formatted directly instead of json.dumps per row
+        prefix = '{"address":' + json.dumps(address) + "," if self.with_address else "{"
+        lines = [
+            f'{prefix}"index":{offset + index + 1},"bq_m3":{value_bq_m3!r},'
+            f'"pci_l":{values_pci_l[index]!r}'
+            for index, value_bq_m3 in enumerate(values_bq_m3)
+        ]
+        if times is not None:
+            lines = [f'{line},"time":"{timestamp}"' for line, timestamp in zip(lines, times)]
+        return "".join(f"{line}}}\n" for line in lines)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, NamedTuple
+
+MAX_HEADER_SIZE = 16 * 1024
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class HttpRequest(NamedTuple):
+    method: str
+    path: str
+    headers: dict[str, str]  # lower case names
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+HttpHandler = Callable[[HttpRequest], HttpResponse]
+
+
+def parse_listen(value: str) -> tuple[str, int]:
+    # "127.0.0.1:9546", ":9546" (all interfaces) or "[::1]:9546"
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid listen address: {value}")
+    return host.strip("[]") or "0.0.0.0", int(port)
+
+
+def encode_response(response: HttpResponse, head: bool = False) -> bytes:
+    lines = [f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}"]
+    lines += [f"{name}: {value}" for name, value in response.headers.items()]
+    lines.append(f"Content-Length: {len(response.body)}")
+    head_bytes = ("\r\n".join(lines) + "\r\n\r\n").encode()
+    return head_bytes if head or response.status == 304 else head_bytes + response.body
+
+
+# Minimal HTTP/1.1 server for serving cached data, handler is synchronous and must not block.
+class HttpServer:
+    def __init__(self, handler: HttpHandler) -> None:
+        self.handler = handler
+        self.server: asyncio.Server | None = None
+        self.writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str, port: int) -> None:
+        self.server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_HEADER_SIZE
+        )
+
+    @property
+    def port(self) -> int | None:
+        if self.server is None or not self.server.sockets:
+            return None
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            # idle keep-alive connections would otherwise keep server from closing
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3:
+                    writer.write(encode_response(HttpResponse(400, {"Connection": "close"}, b"")))
+                    break
+                method, target, version = parts
+
+                headers: dict[str, str] = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                request = HttpRequest(method, target.split("?", 1)[0], headers)
+                if method not in ["GET", "HEAD"]:
+                    response = HttpResponse(405, {"Allow": "GET, HEAD"}, b"")
+                else:
+                    response = self.handler(request)
+                writer.write(encode_response(response, head=method == "HEAD"))
+                await writer.drain()
+
+                connection = headers.get("connection", "").lower()
+                if connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive"):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
@@ -2,30 +2,37 @@ from __future__ import annotations
 
 import asyncio
 import math
-
-from bleak import BleakClient
-from bleak.backends.characteristic import BleakGATTCharacteristic
-
-from radoneye.debug import dump_in, dump_out
-from radoneye.model import RadonEyeHistory, RadonEyeInterface, RadonEyeStatus, RadonUnit
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.codec import MessageField, MessageSpec
+from radoneye.debug import FrameLog, dump_in, dump_out
+from radoneye.memo import FrameMemo
+from radoneye.model import (
+    HistoryProgressCallback,
+    RadonEyeFrame,
+    RadonEyeHistory,
+    RadonEyeHistoryProgress,
+    RadonEyeHistoryTransfer,
+    RadonEyeInterface,
+    RadonEyeRawData,
+    RadonEyeStatus,
+    RadonEyeTransport,
+    RadonUnit,
+)
 from radoneye.util import (
-    encode_bool,
-    encode_byte,
-    encode_float,
     format_counts,
     format_uptime,
-    read_bool,
-    read_byte,
-    read_float,
-    read_int,
-    read_short,
     read_short_list,
-    read_str_wl,
     round_pci_l,
     to_bq_m3,
     to_pci_l,
 )
 
+if TYPE_CHECKING:
+    from bleak.backends.characteristic import BleakGATTCharacteristic
+
 SERVICE_UUID = "00001523-1212-efde-1523-785feabcd123"
 
 CHAR_COMMAND = "00001524-1212-efde-1523-785feabcd123"
@@ -52,8 +59,74 @@ MSG_PREAMBLE_AC = 0xAC  # alarm settings
 MSG_PREAMBLE_AF = 0xAF  # software version
 MSG_PREAMBLE_E8 = 0xE8  # history size
 
+# status messages in parse_status() argument order
+STATUS_PREAMBLES = [
+    MSG_PREAMBLE_50,
+    MSG_PREAMBLE_51,
+    MSG_PREAMBLE_A4,
+    MSG_PREAMBLE_A6,
+    MSG_PREAMBLE_A8,
+    MSG_PREAMBLE_AC,
+    MSG_PREAMBLE_AF,
+]
+
 INVOKE_DELAY = 0.2  # sec
 
+MSG_SIZE = 20  # every message has 20 bytes, unused part can contain "trash"
+
+# strings are prefixed with length byte, "p" format reads only that many bytes
+MSG_A4_SPEC = MessageSpec([MessageField("serial", 1, f"{MSG_SIZE - 1}p")])
+MSG_A6_SPEC = MessageSpec([MessageField("series", 1, f"{MSG_SIZE - 1}p")])
+MSG_A8_SPEC = MessageSpec([MessageField("model", 2, f"{MSG_SIZE - 2}p")])
+MSG_AF_SPEC = MessageSpec([MessageField("firmware_version", 1, f"{MSG_SIZE - 1}p")])
+
+# radon values are floats in pci/l
+MSG_50_SPEC = MessageSpec(
+    [
+        MessageField("latest", 2, "f"),
+        MessageField("day_avg", 6, "f"),
+        MessageField("month_avg", 10, "f"),
+        MessageField("counts_current", 14, "H"),
+        MessageField("counts_previous", 16, "H"),
+    ]
+)
+
+MSG_51_SPEC = MessageSpec(
+    [
+        MessageField("uptime_minutes", 4, "I"),
+        MessageField("peak", 12, "f"),
+    ]
+)
+
+MSG_AC_SPEC = MessageSpec(
+    [
+        MessageField("display_unit", 2, "B"),
+        MessageField("alarm_enabled", 3, "B"),
+        MessageField("alarm_level", 4, "f"),
+        MessageField("alarm_interval", 8, "B"),  # in 10 mins
+    ]
+)
+
+MSG_E8_SPEC = MessageSpec([MessageField("history_size", 2, "H")])
+
+SET_ALARM_SPEC = MessageSpec(
+    [
+        MessageField("command", 0, "B"),
+        MessageField("data_size", 1, "B"),  # RadonEye app always sends 0x11
+        MessageField("enabled", 2, "B"),
+        MessageField("level_pci_l", 3, "f"),
+        MessageField("interval", 7, "B"),  # in 10 mins
+    ]
+)
+
+SET_UNIT_SPEC = MessageSpec(
+    [
+        MessageField("command", 0, "B"),
+        MessageField("data_size", 1, "B"),  # RadonEye app always sends 0x11
+        MessageField("unit_bq_m3", 2, "B"),
+    ]
+)
+
 
 def parse_status(
     msg_50: bytearray,
@@ -67,45 +140,48 @@ def parse_status(
     # Most messages start with command code followed by byte representing length of data inside buffer
     # buffer has at most 20 bytes (including command code), unused buffer part can contain "trash".
 
-    serial_part1 = read_str_wl(msg_a6, 1)  # series?
-    serial_part2 = read_str_wl(msg_a4, 1)[2:8]  # manufacturing date (YYMMDD)?
-    serial_part3 = read_str_wl(msg_a4, 1)[-4:]  # serial within manufacturing date?
+    (series,) = MSG_A6_SPEC.unpack(msg_a6)
+    (serial_a4,) = MSG_A4_SPEC.unpack(msg_a4)
+    serial_a4 = serial_a4.decode()
+    serial_part1 = series.decode()  # series?
+    serial_part2 = serial_a4[2:8]  # manufacturing date (YYMMDD)?
+    serial_part3 = serial_a4[-4:]  # serial within manufacturing date?
     serial = serial_part1 + serial_part2 + serial_part3  # example: {RU2}{201202}{0159}
 
-    model = read_str_wl(msg_a8, 2)
+    (model,) = MSG_A8_SPEC.unpack(msg_a8)
+    model = model.decode()
+
+    (firmware_version,) = MSG_AF_SPEC.unpack(msg_af)
+    firmware_version = firmware_version.decode().rstrip()  # value has useless trailing new line
 
-    firmware_version = read_str_wl(msg_af, 1).rstrip()  # value has useless trailing new line
+    latest_value, day_avg_value, month_avg_value, counts_current, counts_previous = (
+        MSG_50_SPEC.unpack(msg_50)
+    )
 
-    latest_value = read_float(msg_50, 2)
     latest_pci_l = round_pci_l(latest_value)
     latest_bq_m3 = to_bq_m3(latest_value)
 
-    day_avg_value = read_float(msg_50, 6)
     day_avg_pci_l = round_pci_l(day_avg_value)
     day_avg_bq_m3 = to_bq_m3(day_avg_value)
 
-    month_avg_value = read_float(msg_50, 10)
     month_avg_pci_l = round_pci_l(month_avg_value)
     month_avg_bq_m3 = to_bq_m3(month_avg_value)
 
-    counts_current = read_short(msg_50, 14)
-    counts_previous = read_short(msg_50, 16)
     counts_str = format_counts(counts_current, counts_previous)
 
-    uptime_minutes = read_int(msg_51, 4)
+    uptime_minutes, peak_value = MSG_51_SPEC.unpack(msg_51)
     uptime_str = format_uptime(uptime_minutes)
 
-    peak_value = read_float(msg_51, 12)
     peak_pci_l = round_pci_l(peak_value)
     peak_bq_m3 = to_bq_m3(peak_value)
 
-    display_unit = "bq/m3" if read_bool(msg_ac, 2) else "pci/l"
+    display_unit, alarm_enabled, alarm_level_value, alarm_interval = MSG_AC_SPEC.unpack(msg_ac)
 
-    alarm_enabled = read_bool(msg_ac, 3)
-    alarm_level_value = read_float(msg_ac, 4)
+    display_unit = "bq/m3" if display_unit == 0x01 else "pci/l"
+
+    alarm_enabled = alarm_enabled == 0x01
     alarm_level_pci_l = round_pci_l(alarm_level_value)
     alarm_level_bq_m3 = to_bq_m3(alarm_level_pci_l)
-    alarm_interval = read_byte(msg_ac, 8)
     alarm_interval_minutes = alarm_interval * 10
 
     return {
@@ -134,7 +210,7 @@ def parse_status(
 
 
 def parse_history_size(msg_e8: bytearray) -> int:
-    return read_short(msg_e8, 2)
+    return MSG_E8_SPEC.unpack(msg_e8)[0]
 
 
 def parse_history_data(msg_e9: bytearray, size: int) -> RadonEyeHistory:
@@ -147,139 +223,219 @@ def parse_history_data(msg_e9: bytearray, size: int) -> RadonEyeHistory:
     }
 
 
+def parse_status_frames(frames: list[bytes]) -> RadonEyeStatus:
+    # the last message of every type is used, frames can be in any order
+    messages = {frame[0]: frame for frame in frames}
+    return parse_status(*[bytearray(messages[preamble]) for preamble in STATUS_PREAMBLES])
+
+
+def parse_history_frames(frames: list[bytes]) -> RadonEyeHistory:
+    # first frame is E8 message with history size, followed by E9 history data (if any)
+    size = parse_history_size(bytearray(frames[0]))
+    if size == 0:
+        return RadonEyeHistory(values_bq_m3=[], values_pci_l=[])
+    return parse_history_data(bytearray(b"".join(frames[1:])), size)
+
+
+# History data has no sequence numbers, so chunks are keyed by byte offset within the stream. Chunk
+# that differs from the one received at the same offset before means one of attempts lost a
+# notification, chunks after it are not trusted anymore and newer attempt replaces them.
+class HistoryTransferV1(RadonEyeHistoryTransfer):
+    def __init__(self) -> None:
+        self.size_frame: RadonEyeFrame | None = None
+        self.size = -1  # values, from E8 message
+        self.chunks: dict[int, RadonEyeFrame] = {}
+        self.received = 0  # bytes received without gaps from the beginning
+        self.offset = 0  # offset of next chunk of current attempt
+
+    def start(self) -> None:
+        self.offset = 0
+
+    def add_size(self, frame: RadonEyeFrame) -> None:
+        size = parse_history_size(bytearray(frame.data))
+        if size != self.size:
+            # new value was recorded since previous attempt
+            self.chunks.clear()
+            self.received = 0
+            self.size = size
+        self.size_frame = frame
+
+    def add(self, frame: RadonEyeFrame) -> None:
+        offset = self.offset
+        self.offset += len(frame.data)
+        known = self.chunks.get(offset)
+        if known is not None and known.data != frame.data:
+            self.chunks = {key: chunk for key, chunk in self.chunks.items() if key < offset}
+            self.received = min(self.received, offset)
+        self.chunks[offset] = frame
+        while (chunk := self.chunks.get(self.received)) is not None:
+            self.received += len(chunk.data)
+
+    @property
+    def complete(self) -> bool:
+        return self.size_frame is not None and self.received >= self.size * 2
+
+    def frames(self) -> list[RadonEyeFrame]:
+        frames = [self.size_frame] if self.size_frame is not None else []
+        offset = 0
+        while offset < self.received:
+            chunk = self.chunks[offset]
+            frames.append(chunk)
+            offset += len(chunk.data)
+        return frames
+
+    def progress(self, bytes: int, elapsed: float) -> RadonEyeHistoryProgress:
+        size = max(self.size, 0)
+        return RadonEyeHistoryProgress(min(self.received // 2, size), size, bytes, elapsed)
+
+
 class InterfaceV1(RadonEyeInterface):
+    version = 1
+
     def __init__(
         self,
-        client: BleakClient,
+        client: RadonEyeTransport,
         status_read_timeout: float | None = None,
         history_read_timeout: float | None = None,
-        debug: bool = False,
+        debug: bool = False,  # same as frame_log for client address
+        *,
+        frame_log: FrameLog | None = None,  # frame dumps for debugging
+        memo: FrameMemo[RadonEyeStatus] | None = None,
+        clock: Clock = SYSTEM_CLOCK,
     ):
         self.client = client
         self.status_read_timeout = status_read_timeout
         self.history_read_timeout = history_read_timeout
-        self.debug = debug
+        if frame_log is None and debug:
+            frame_log = FrameLog(str(getattr(client, "address", "")), clock=clock)
+        self.frame_log = frame_log
+        self.memo = memo if memo is not None else FrameMemo[RadonEyeStatus]()
+        self.clock = clock
 
     def supports(self) -> bool:
         return bool(self.client.services.get_service(SERVICE_UUID))
 
     async def status(self) -> RadonEyeStatus:
+        raw = await self.status_raw()
+        frames = [frame.data for frame in raw["frames"]]
+        return self.memo.parse(tuple(frames), lambda: parse_status_frames(frames))
+
+    async def history(self, progress: HistoryProgressCallback | None = None) -> RadonEyeHistory:
+        raw = await self.history_raw(progress=progress)
+        return parse_history_frames([frame.data for frame in raw["frames"]])
+
+    async def status_raw(self) -> RadonEyeRawData:
         loop = asyncio.get_running_loop()
 
         future = loop.create_future()
 
-        msg_50: bytearray | None = None
-        msg_51: bytearray | None = None
-        msg_a4: bytearray | None = None
-        msg_a6: bytearray | None = None
-        msg_a8: bytearray | None = None
-        msg_ac: bytearray | None = None
-        msg_af: bytearray | None = None
+        messages: dict[int, RadonEyeFrame] = {}
 
         def callback(char: BleakGATTCharacteristic, data: bytearray) -> None:
-            nonlocal msg_50
-            nonlocal msg_51
-            nonlocal msg_a4
-            nonlocal msg_a6
-            nonlocal msg_a8
-            nonlocal msg_ac
-            nonlocal msg_af
-
             # Early exit if already complete
             if future.done():
                 return
 
-            if data[0] == MSG_PREAMBLE_50:
-                msg_50 = dump_in(data, self.debug)
-            elif data[0] == MSG_PREAMBLE_51:
-                msg_51 = dump_in(data, self.debug)
-            elif data[0] == MSG_PREAMBLE_A4:
-                msg_a4 = dump_in(data, self.debug)
-            elif data[0] == MSG_PREAMBLE_A6:
-                msg_a6 = dump_in(data, self.debug)
-            elif data[0] == MSG_PREAMBLE_A8:
-                msg_a8 = dump_in(data, self.debug)
-            elif data[0] == MSG_PREAMBLE_AC:
-                msg_ac = dump_in(data, self.debug)
-            elif data[0] == MSG_PREAMBLE_AF:
-                msg_af = dump_in(data, self.debug)
-
-            if msg_50 and msg_51 and msg_a4 and msg_a6 and msg_a8 and msg_ac and msg_af:
-                status = parse_status(
-                    msg_50,
-                    msg_51,
-                    msg_a4,
-                    msg_a6,
-                    msg_a8,
-                    msg_ac,
-                    msg_af,
+            if data[0] in STATUS_PREAMBLES:
+                messages[data[0]] = RadonEyeFrame(
+                    self.clock.time(), bytes(dump_in(data, self.frame_log))
                 )
-                future.set_result(status)
+
+            if len(messages) == len(STATUS_PREAMBLES):
+                # same order for every read, so identical reads have identical frames
+                future.set_result([messages[preamble] for preamble in STATUS_PREAMBLES])
 
         await self.client.start_notify(CHAR_STATUS, callback)  # type: ignore
         await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_10]), self.debug)
+            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_10]), self.frame_log)
         )
         await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_AF]), self.debug)
+            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_AF]), self.frame_log)
         )
         await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_A6]), self.debug)
+            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_A6]), self.frame_log)
         )
-        result = await asyncio.wait_for(future, self.status_read_timeout)
+        frames = await self.clock.wait_for(future, self.status_read_timeout)
         await self.client.stop_notify(CHAR_STATUS)
-        return result
+        return {"interface": self.version, "frames": frames}
+
+    def history_transfer(self) -> HistoryTransferV1:
+        return HistoryTransferV1()
 
-    async def history(self) -> RadonEyeHistory:
+    async def history_raw(
+        self,
+        transfer: RadonEyeHistoryTransfer | None = None,
+        progress: HistoryProgressCallback | None = None,
+    ) -> RadonEyeRawData:
         loop = asyncio.get_running_loop()
 
         size_future = loop.create_future()
         result_future = loop.create_future()
 
-        result_size: int = -1
-        result_data = bytearray()
+        history = transfer if isinstance(transfer, HistoryTransferV1) else HistoryTransferV1()
+        history.start()
+        received_bytes = 0
+        started = self.clock.monotonic()
+
+        def report_progress(data: bytearray) -> None:
+            nonlocal received_bytes
+
+            received_bytes += len(data)
+            if progress is not None:
+                progress(history.progress(received_bytes, self.clock.monotonic() - started))
 
         def callback_status(char: BleakGATTCharacteristic, data: bytearray) -> None:
             # Early exit if already complete
             if size_future.done():
                 return
             if data[0] == MSG_PREAMBLE_E8:
-                size_future.set_result(parse_history_size(dump_in(data, self.debug)))
+                history.add_size(
+                    RadonEyeFrame(self.clock.time(), bytes(dump_in(data, self.frame_log)))
+                )
+                report_progress(data)
+                size_future.set_result(None)
 
         def callback_history(char: BleakGATTCharacteristic, data: bytearray) -> None:
             # Early exit if already complete
             if result_future.done():
                 return
-            result_data.extend(dump_in(data, self.debug))
-            if len(result_data) >= result_size * 2:
-                result_future.set_result(parse_history_data(result_data, result_size))
+            history.add(RadonEyeFrame(self.clock.time(), bytes(dump_in(data, self.frame_log))))
+            report_progress(data)
+            if history.complete:
+                result_future.set_result(None)
 
         await self.client.start_notify(CHAR_STATUS, callback_status)  # type: ignore
-        await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_E8]), self.debug)
-        )
-        result_size = await asyncio.wait_for(size_future, self.status_read_timeout)
-        await self.client.stop_notify(CHAR_STATUS)
-
-        if result_size == 0:
-            result = RadonEyeHistory(values_bq_m3=[], values_pci_l=[])
-        else:
-            await self.client.start_notify(CHAR_HISTORY, callback_history)  # type: ignore
+        try:
             await self.client.write_gatt_char(
-                CHAR_COMMAND, dump_out(bytearray([COMMAND_HISTORY]), self.debug)
+                CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS_E8]), self.frame_log)
             )
-            result = await asyncio.wait_for(result_future, self.history_read_timeout)
-            await self.client.stop_notify(CHAR_HISTORY)
+            await self.clock.wait_for(size_future, self.status_read_timeout)
+        finally:
+            with suppress(Exception):
+                await self.client.stop_notify(CHAR_STATUS)
+
+        # device sends the whole history again, data of previous attempts fills what is lost
+        if not history.complete:
+            await self.client.start_notify(CHAR_HISTORY, callback_history)  # type: ignore
+            try:
+                await self.client.write_gatt_char(
+                    CHAR_COMMAND, dump_out(bytearray([COMMAND_HISTORY]), self.frame_log)
+                )
+                await self.clock.wait_for(result_future, self.history_read_timeout)
+            finally:
+                # also after timeout, so retry on the same connection can subscribe again
+                with suppress(Exception):
+                    await self.client.stop_notify(CHAR_HISTORY)
 
-        return result
+        return {"interface": self.version, "frames": history.frames()}
 
     async def beep(self) -> None:
         # RadonEye app writes longer command, but it is actually enough to send one byte to beep
         await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_BEEP]), self.debug)
+            CHAR_COMMAND, dump_out(bytearray([COMMAND_BEEP]), self.frame_log)
         )
         # there is some delay needed before you can do next beep, otherwise it will be just one beep
-        await asyncio.sleep(INVOKE_DELAY)
+        await self.clock.sleep(INVOKE_DELAY)
 
     async def set_alarm(
         self,
@@ -288,18 +444,21 @@ class InterfaceV1(RadonEyeInterface):
         unit: RadonUnit,
         interval: int,
     ) -> None:
-        command = (
-            bytearray([COMMAND_SET_ALARM, 0x11])
-            + encode_bool(enabled)
-            + encode_float(level if unit == "pci/l" else to_pci_l(level))
-            + encode_byte(math.ceil(interval / 10))
+        command = SET_ALARM_SPEC.pack(
+            command=COMMAND_SET_ALARM,
+            data_size=0x11,
+            enabled=0x01 if enabled else 0x00,
+            level_pci_l=level if unit == "pci/l" else to_pci_l(level),
+            interval=math.ceil(interval / 10),
         )
-        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.debug))
-        await asyncio.sleep(INVOKE_DELAY)  # doesn't work without delay
+        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.frame_log))
+        await self.clock.sleep(INVOKE_DELAY)  # doesn't work without delay
 
     async def set_unit(self, unit: RadonUnit) -> None:
-        command = bytearray([COMMAND_SET_UNIT, 0x11]) + encode_bool(
-            False if unit == "pci/l" else True
+        command = SET_UNIT_SPEC.pack(
+            command=COMMAND_SET_UNIT,
+            data_size=0x11,
+            unit_bq_m3=0x00 if unit == "pci/l" else 0x01,
         )
-        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.debug))
-        await asyncio.sleep(INVOKE_DELAY)  # doesn't work without delay
+        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.frame_log))
+        await self.clock.sleep(INVOKE_DELAY)  # doesn't work without delay
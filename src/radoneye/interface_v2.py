@@ -2,29 +2,36 @@ from __future__ import annotations
 
 import asyncio
 import math
-from typing import TypedDict
-
-from bleak import BleakClient
-from bleak.backends.characteristic import BleakGATTCharacteristic
-
-from radoneye.debug import dump_in, dump_out
-from radoneye.model import RadonEyeHistory, RadonEyeInterface, RadonEyeStatus, RadonUnit
+from contextlib import suppress
+from typing import TYPE_CHECKING, TypedDict
+
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.codec import MessageField, MessageSpec
+from radoneye.debug import FrameLog, dump_in, dump_out
+from radoneye.memo import FrameMemo
+from radoneye.model import (
+    HistoryProgressCallback,
+    RadonEyeFrame,
+    RadonEyeHistory,
+    RadonEyeHistoryProgress,
+    RadonEyeHistoryTransfer,
+    RadonEyeInterface,
+    RadonEyeRawData,
+    RadonEyeStatus,
+    RadonEyeTransport,
+    RadonUnit,
+)
 from radoneye.util import (
-    encode_bool,
-    encode_byte,
-    encode_short,
     format_counts,
     format_uptime,
-    read_bool,
-    read_byte,
-    read_int,
-    read_short,
     read_short_list,
-    read_str,
     to_bq_m3,
     to_pci_l,
 )
 
+if TYPE_CHECKING:
+    from bleak.backends.characteristic import BleakGATTCharacteristic
+
 SERVICE_UUID = "00001523-0000-1000-8000-00805f9b34fb"
 
 CHAR_COMMAND = "00001524-0000-1000-8000-00805f9b34fb"
@@ -39,6 +46,64 @@ COMMAND_SET_UNIT = 0xA2
 
 INVOKE_DELAY = 0.2  # sec
 
+# 0x40 status message fields that are the same for all firmware versions
+STATUS_FIELDS = [
+    MessageField("firmware_version", 22, "6s"),
+    MessageField("display_unit", 28, "B"),
+    MessageField("alarm_enabled", 29, "B"),
+    MessageField("alarm_level_bq_m3", 30, "H"),
+    MessageField("alarm_interval", 32, "B"),  # in 10 mins
+    MessageField("latest_bq_m3", 33, "H"),
+    MessageField("day_avg_bq_m3", 35, "H"),
+    MessageField("month_avg_bq_m3", 37, "H"),
+    MessageField("counts_current", 39, "H"),
+    MessageField("counts_previous", 41, "H"),
+    MessageField("uptime_minutes", 43, "I"),
+    MessageField("peak_bq_m3", 51, "H"),
+    MessageField("history_size", 57, "H"),  # values in history
+]
+
+# v2 (byte 15 is 0x06)
+STATUS_V2_SPEC = MessageSpec(
+    [
+        MessageField("serial_part2", 2, "6s"),  # manufacturing date (YYMMDD)?
+        MessageField("serial_part1", 8, "3s"),  # series?
+        MessageField("serial_part3", 11, "4s"),  # serial within manufacturing date?
+        MessageField("model", 16, "6s"),
+        *STATUS_FIELDS,
+    ]
+)
+
+# v3 (byte 14 is 0x07)
+STATUS_V3_SPEC = MessageSpec(
+    [
+        MessageField("serial", 2, "12s"),
+        MessageField("model", 15, "7s"),
+        *STATUS_FIELDS,
+    ]
+)
+
+# unknown version, only common fields
+STATUS_SPEC = MessageSpec(STATUS_FIELDS)
+
+SET_ALARM_SPEC = MessageSpec(
+    [
+        MessageField("command", 0, "B"),
+        MessageField("data_size", 1, "B"),  # RadonEye app always sends 0x11
+        MessageField("enabled", 2, "B"),
+        MessageField("level_bq_m3", 3, "H"),
+        MessageField("interval", 5, "B"),  # in 10 mins
+    ]
+)
+
+SET_UNIT_SPEC = MessageSpec(
+    [
+        MessageField("command", 0, "B"),
+        MessageField("data_size", 1, "B"),  # RadonEye app always sends 0x11
+        MessageField("unit_bq_m3", 2, "B"),
+    ]
+)
+
 
 class RadonEyeHistoryPage(TypedDict):
     page_count: int
@@ -49,46 +114,48 @@ class RadonEyeHistoryPage(TypedDict):
 
 
 def parse_status(data: bytearray) -> RadonEyeStatus:
-    if read_byte(data, 15) == 0x06:  # v2
-        serial_part1 = read_str(data, 8, 3)  # series?
-        serial_part2 = read_str(data, 2, 6)  # manufacturing date (YYMMDD)?
-        serial_part3 = read_str(data, 11, 4)  # serial within manufacturing date?
-        serial = serial_part1 + serial_part2 + serial_part3
-        model = read_str(data, 16, 6)
-    elif read_byte(data, 14) == 0x07:  # v3
-        serial = read_str(data, 2, 12)
-        model = read_str(data, 15, 7)
+    if data[15] == 0x06:  # v2
+        serial_part2, serial_part1, serial_part3, model, *values = STATUS_V2_SPEC.unpack(data)
+        serial = serial_part1.decode() + serial_part2.decode() + serial_part3.decode()
+        model = model.decode()
+    elif data[14] == 0x07:  # v3
+        serial, model, *values = STATUS_V3_SPEC.unpack(data)
+        serial = serial.decode()
+        model = model.decode()
     else:
         serial = "unknown"
         model = "unknown"
-
-    firmware_version = read_str(data, 22, 6)
-
-    display_unit = "bq/m3" if read_bool(data, 28) else "pci/l"
-
-    alarm_enabled = read_bool(data, 29)
-    alarm_level_bq_m3 = read_short(data, 30)
+        values = STATUS_SPEC.unpack(data)
+
+    (
+        firmware_version,
+        display_unit,
+        alarm_enabled,
+        alarm_level_bq_m3,
+        alarm_interval,
+        latest_bq_m3,
+        day_avg_bq_m3,
+        month_avg_bq_m3,
+        counts_current,
+        counts_previous,
+        uptime_minutes,
+        peak_bq_m3,
+        _,  # history size, used by history read
+    ) = values
+
+    firmware_version = firmware_version.decode()
+
+    display_unit = "bq/m3" if display_unit == 0x01 else "pci/l"
+
+    alarm_enabled = alarm_enabled == 0x01
     alarm_level_pci_l = to_pci_l(alarm_level_bq_m3)
-    alarm_interval = read_byte(data, 32)
     alarm_interval_minutes = alarm_interval * 10
 
-    latest_bq_m3 = read_short(data, 33)
     latest_pci_l = to_pci_l(latest_bq_m3)
-
-    day_avg_bq_m3 = read_short(data, 35)
     day_avg_pci_l = to_pci_l(day_avg_bq_m3)
-
-    month_avg_bq_m3 = read_short(data, 37)
     month_avg_pci_l = to_pci_l(month_avg_bq_m3)
-
-    counts_current = read_short(data, 39)
-    counts_previous = read_short(data, 41)
     counts_str = format_counts(counts_current, counts_previous)
-
-    uptime_minutes = read_int(data, 43)
     uptime_str = format_uptime(uptime_minutes)
-
-    peak_bq_m3 = read_short(data, 51)
     peak_pci_l = to_pci_l(peak_bq_m3)
 
     return {
@@ -134,7 +201,12 @@ def parse_history_page(data: bytearray) -> RadonEyeHistoryPage:
     }
 
 
-def merge_history(pages: list[RadonEyeHistoryPage]) -> RadonEyeHistory:
+def parse_history_size(data: bytearray) -> int:
+    # values in history, from status message
+    return STATUS_SPEC.unpack(data)[-1]
+
+
+def merge_history(pages: list[RadonEyeHistoryPage], size: int = 0) -> RadonEyeHistory:
     pages = sorted(pages, key=lambda page: page["page_no"])
     if pages:
         for index, page in enumerate(pages):
@@ -142,29 +214,123 @@ def merge_history(pages: list[RadonEyeHistoryPage]) -> RadonEyeHistory:
                 raise ValueError("History page order mismatch")
         if pages[0]["page_count"] != len(pages):
             raise ValueError("History page count mismatch")
-    return {
-        "values_bq_m3": [value for page in pages for value in page["values_bq_m3"]],
-        "values_pci_l": [value for page in pages for value in page["values_pci_l"]],
-    }
+    # result is pre-sized from history size announced by status message (if known), value
+    # recorded after status was read extends it
+    values_bq_m3: list[float] = [0] * size
+    values_pci_l: list[float] = [0.0] * size
+    offset = 0
+    for page in pages:
+        end = offset + len(page["values_bq_m3"])
+        values_bq_m3[offset:end] = page["values_bq_m3"]
+        values_pci_l[offset:end] = page["values_pci_l"]
+        offset = end
+    del values_bq_m3[offset:], values_pci_l[offset:]
+    return {"values_bq_m3": values_bq_m3, "values_pci_l": values_pci_l}
+
+
+def parse_status_frames(frames: list[bytes]) -> RadonEyeStatus:
+    return parse_status(bytearray(frames[-1]))
+
+
+def parse_history_frames(frames: list[bytes]) -> RadonEyeHistory:
+    # status message with history size goes first (frames archived before it was added don't
+    # have it), followed by history pages
+    size = 0
+    if frames and frames[0][0] == COMMAND_STATUS:
+        size = parse_history_size(bytearray(frames[0]))
+        frames = frames[1:]
+    return merge_history([parse_history_page(bytearray(frame)) for frame in frames], size)
+
+
+# Pages keyed by page number, page received again (by retry) replaces earlier copy. Pages of
+# different page count are from different history, so they are not mixed.
+class HistoryTransferV2(RadonEyeHistoryTransfer):
+    def __init__(self) -> None:
+        self.status_frame: RadonEyeFrame | None = None
+        self.size = -1  # values, from status message
+        self.pages: dict[int, RadonEyeFrame] = {}
+        self.page_count = 0
+        self.values = 0  # values in received pages
+        self.ended = False  # last page of current attempt was received
+
+    def start(self) -> None:
+        self.ended = False
+
+    def add_status(self, frame: RadonEyeFrame) -> None:
+        size = parse_history_size(bytearray(frame.data))
+        if size != self.size:
+            # new value was recorded since previous attempt
+            self.pages.clear()
+            self.values = 0
+            self.size = size
+        self.status_frame = frame
+
+    def add(self, frame: RadonEyeFrame) -> None:
+        # byte 1 is page count, byte 2 is page number, byte 3 is value count
+        page_count, page_no = frame.data[1], frame.data[2]
+        if page_count != self.page_count:
+            self.pages.clear()
+            self.values = 0
+            self.page_count = page_count
+        known = self.pages.get(page_no)
+        if known is not None:
+            self.values -= known.data[3]
+        self.pages[page_no] = frame
+        self.values += frame.data[3]
+        if page_no == page_count:
+            self.ended = True
+
+    @property
+    def complete(self) -> bool:
+        return self.page_count > 0 and len(self.pages) == self.page_count
+
+    def missing(self) -> list[int]:
+        return [no for no in range(1, self.page_count + 1) if no not in self.pages]
+
+    def frames(self) -> list[RadonEyeFrame]:
+        pages = [self.pages[page_no] for page_no in sorted(self.pages)]
+        return [self.status_frame, *pages] if self.status_frame is not None else pages
+
+    def progress(self, bytes: int, elapsed: float) -> RadonEyeHistoryProgress:
+        return RadonEyeHistoryProgress(self.values, max(self.size, 0), bytes, elapsed)
 
 
 class InterfaceV2(RadonEyeInterface):
+    version = 2
+
     def __init__(
         self,
-        client: BleakClient,
+        client: RadonEyeTransport,
         status_read_timeout: float | None = None,
         history_read_timeout: float | None = None,
-        debug: bool = False,
+        debug: bool = False,  # same as frame_log for client address
+        *,
+        frame_log: FrameLog | None = None,  # frame dumps for debugging
+        memo: FrameMemo[RadonEyeStatus] | None = None,
+        clock: Clock = SYSTEM_CLOCK,
     ):
         self.client = client
         self.status_read_timeout = status_read_timeout
         self.history_read_timeout = history_read_timeout
-        self.debug = debug
+        if frame_log is None and debug:
+            frame_log = FrameLog(str(getattr(client, "address", "")), clock=clock)
+        self.frame_log = frame_log
+        self.memo = memo if memo is not None else FrameMemo[RadonEyeStatus]()
+        self.clock = clock
 
     def supports(self) -> bool:
         return bool(self.client.services.get_service(SERVICE_UUID))
 
     async def status(self) -> RadonEyeStatus:
+        raw = await self.status_raw()
+        frames = [frame.data for frame in raw["frames"]]
+        return self.memo.parse(tuple(frames), lambda: parse_status_frames(frames))
+
+    async def history(self, progress: HistoryProgressCallback | None = None) -> RadonEyeHistory:
+        raw = await self.history_raw(progress=progress)
+        return parse_history_frames([frame.data for frame in raw["frames"]])
+
+    async def status_raw(self) -> RadonEyeRawData:
         loop = asyncio.get_running_loop()
         future = loop.create_future()
 
@@ -173,46 +339,95 @@ class InterfaceV2(RadonEyeInterface):
             if future.done():
                 return
             if data[0] == COMMAND_STATUS:
-                future.set_result(parse_status(dump_in(data, self.debug)))
+                future.set_result(
+                    [RadonEyeFrame(self.clock.time(), bytes(dump_in(data, self.frame_log)))]
+                )
 
         await self.client.start_notify(CHAR_STATUS, callback)  # type: ignore
         await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS]), self.debug)
+            CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS]), self.frame_log)
         )
-        result = await asyncio.wait_for(future, self.status_read_timeout)
+        frames = await self.clock.wait_for(future, self.status_read_timeout)
         await self.client.stop_notify(CHAR_STATUS)
-        return result
+        return {"interface": self.version, "frames": frames}
+
+    def history_transfer(self) -> HistoryTransferV2:
+        return HistoryTransferV2()
 
-    async def history(self) -> RadonEyeHistory:
+    async def history_raw(
+        self,
+        transfer: RadonEyeHistoryTransfer | None = None,
+        progress: HistoryProgressCallback | None = None,
+    ) -> RadonEyeRawData:
         loop = asyncio.get_running_loop()
         future = loop.create_future()
-        pages: list[RadonEyeHistoryPage] = []
+        pages = transfer if isinstance(transfer, HistoryTransferV2) else HistoryTransferV2()
+        pages.start()
+        status_future = loop.create_future()
+        received_bytes = 0
+        started = self.clock.monotonic()
+
+        def report_progress(data: bytearray) -> None:
+            nonlocal received_bytes
+
+            received_bytes += len(data)
+            if progress is not None:
+                progress(pages.progress(received_bytes, self.clock.monotonic() - started))
+
+        def callback_status(char: BleakGATTCharacteristic, data: bytearray) -> None:
+            # Early exit if already complete
+            if status_future.done():
+                return
+            if data[0] == COMMAND_STATUS:
+                frame = bytes(dump_in(data, self.frame_log))
+                pages.add_status(RadonEyeFrame(self.clock.time(), frame))
+                report_progress(data)
+                status_future.set_result(None)
 
         def callback(char: BleakGATTCharacteristic, data: bytearray) -> None:
             # Early exit if already complete
             if future.done():
                 return
             if data[0] == COMMAND_HISTORY:
-                page = parse_history_page(dump_in(data, self.debug))
-                pages.append(page)
-                if page["page_count"] == page["page_no"]:
-                    future.set_result(merge_history(pages))
+                pages.add(RadonEyeFrame(self.clock.time(), bytes(dump_in(data, self.frame_log))))
+                report_progress(data)
+                # pages missing from this attempt could be received by previous one, otherwise
+                # the last page ends the transfer anyway, lost pages are not sent again
+                if pages.complete or pages.ended:
+                    future.set_result(None)
+
+        # history size from status message, so progress knows it before the first page, it costs
+        # extra round trip, so it is requested only for progress
+        if progress is not None:
+            await self.client.start_notify(CHAR_STATUS, callback_status)  # type: ignore
+            try:
+                await self.client.write_gatt_char(
+                    CHAR_COMMAND, dump_out(bytearray([COMMAND_STATUS]), self.frame_log)
+                )
+                await self.clock.wait_for(status_future, self.status_read_timeout)
+            finally:
+                with suppress(Exception):
+                    await self.client.stop_notify(CHAR_STATUS)
 
         await self.client.start_notify(CHAR_HISTORY, callback)  # type: ignore
-        await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_HISTORY]), self.debug)
-        )
-        result = await asyncio.wait_for(future, self.history_read_timeout)
-        await self.client.stop_notify(CHAR_HISTORY)
-        return result
+        try:
+            await self.client.write_gatt_char(
+                CHAR_COMMAND, dump_out(bytearray([COMMAND_HISTORY]), self.frame_log)
+            )
+            await self.clock.wait_for(future, self.history_read_timeout)
+        finally:
+            # also after timeout, so retry on the same connection can subscribe again
+            with suppress(Exception):
+                await self.client.stop_notify(CHAR_HISTORY)
+        return {"interface": self.version, "frames": pages.frames()}
 
     async def beep(self) -> None:
         # RadonEye app writes longer command, but it is actually enough to send one byte to beep
         await self.client.write_gatt_char(
-            CHAR_COMMAND, dump_out(bytearray([COMMAND_BEEP]), self.debug)
+            CHAR_COMMAND, dump_out(bytearray([COMMAND_BEEP]), self.frame_log)
         )
         # there is some delay needed before you can do next beep, otherwise it will be just one beep
-        await asyncio.sleep(INVOKE_DELAY)
+        await self.clock.sleep(INVOKE_DELAY)
 
     async def set_alarm(
         self,
@@ -221,18 +436,21 @@ class InterfaceV2(RadonEyeInterface):
         unit: RadonUnit,
         interval: int,
     ) -> None:
-        command = (
-            bytearray([COMMAND_SET_ALARM, 0x11])
-            + encode_bool(enabled)
-            + encode_short(to_bq_m3(level) if unit == "pci/l" else level)
-            + encode_byte(math.ceil(interval / 10))
+        command = SET_ALARM_SPEC.pack(
+            command=COMMAND_SET_ALARM,
+            data_size=0x11,
+            enabled=0x01 if enabled else 0x00,
+            level_bq_m3=round(to_bq_m3(level) if unit == "pci/l" else level),
+            interval=math.ceil(interval / 10),
         )
-        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.debug))
-        await asyncio.sleep(INVOKE_DELAY)  # doesn't work without delay
+        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.frame_log))
+        await self.clock.sleep(INVOKE_DELAY)  # doesn't work without delay
 
     async def set_unit(self, unit: RadonUnit) -> None:
-        command = bytearray([COMMAND_SET_UNIT, 0x11]) + encode_bool(
-            False if unit == "pci/l" else True
+        command = SET_UNIT_SPEC.pack(
+            command=COMMAND_SET_UNIT,
+            data_size=0x11,
+            unit_bq_m3=0x00 if unit == "pci/l" else 0x01,
         )
-        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.debug))
-        await asyncio.sleep(INVOKE_DELAY)  # doesn't work without delay
+        await self.client.write_gatt_char(CHAR_COMMAND, dump_out(command, self.frame_log))
+        await self.clock.sleep(INVOKE_DELAY)  # doesn't work without delay
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from copy import copy
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+# Remembers raw frames of the last read together with the parsed result. When the device sends
+# byte-identical frames again, previous result is returned without parsing and "unchanged" is set,
+# so callers can skip conversion and writes too. Frames include device uptime (in minutes), so
+# hits are reads within the same minute. Every caller gets its own shallow copy of the result, so
+# callers (like daemon outputs) can modify it.
+class FrameMemo(Generic[T]):
+    def __init__(self) -> None:
+        self.frames: tuple[bytes, ...] | None = None
+        self.result: T | None = None
+        self.unchanged = False
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, frames: tuple[bytes, ...], parse: Callable[[], T]) -> T:
+        if self.result is not None and frames == self.frames:
+            self.unchanged = True
+            self.hits += 1
+            return copy(self.result)
+
+        result = parse()
+        self.frames = frames
+        self.result = result
+        self.unchanged = False
+        self.misses += 1
+        return copy(result)
+
+    def clear(self) -> None:
+        self.frames = None
+        self.result = None
+        self.unchanged = False
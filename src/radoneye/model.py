@@ -1,10 +1,12 @@
 from abc import abstractmethod
-from typing import Literal, TypedDict
+from typing import Any, Callable, Literal, NamedTuple, Protocol, TypedDict
 
 RadonUnit = Literal["bq/m3", "pci/l"]
 
 OutputType = Literal["text", "json"]
 
+HistoryOutputType = Literal["text", "json", "ndjson", "csv"]
+
 
 class RadonEyeStatus(TypedDict):
     serial: str
@@ -35,7 +37,81 @@ class RadonEyeHistory(TypedDict):
     values_pci_l: list[float]
 
 
+class RadonEyeFrame(NamedTuple):
+    time: float  # unix timestamp when frame was received
+    data: bytes  # notification payload as sent by device
+
+
+# exact device payloads of one read, parsed later with radoneye.raw functions
+class RadonEyeRawData(TypedDict):
+    interface: Literal[1, 2]  # interface version that received frames
+    frames: list[RadonEyeFrame]
+
+
+# Progress of history read, reported after every received history notification.
+class RadonEyeHistoryProgress(NamedTuple):
+    received: int  # values received so far, including previous attempts
+    expected: int  # values announced by device (v1 E8 message, v2 status), 0 until it is known
+    bytes: int  # notification bytes received by current attempt
+    elapsed: float  # sec since current attempt requested history
+
+    @property
+    def throughput(self) -> float:
+        # bytes per second
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+HistoryProgressCallback = Callable[[RadonEyeHistoryProgress], None]
+
+
+# History frames received so far, kept by RadonEyeClient between attempts of history read with
+# retries, so frames already received are not lost when a notification is dropped or link fails.
+class RadonEyeHistoryTransfer:
+    @abstractmethod
+    def start(self) -> None:
+        # called before every attempt, device sends the whole history again on every request
+        raise NotImplementedError("Not supported method start()")
+
+    @property
+    @abstractmethod
+    def complete(self) -> bool:
+        raise NotImplementedError("Not supported property complete")
+
+    @abstractmethod
+    def frames(self) -> list[RadonEyeFrame]:
+        # frames in history order, duplicates received by several attempts are included once
+        raise NotImplementedError("Not supported method frames()")
+
+    @abstractmethod
+    def progress(self, bytes: int, elapsed: float) -> RadonEyeHistoryProgress:
+        raise NotImplementedError("Not supported method progress()")
+
+
+# Subset of BleakClient used by interfaces, implemented by BleakClient itself and by capture and
+# replay clients from radoneye.capture.
+class RadonEyeTransport(Protocol):
+    @property
+    def services(self) -> Any: ...
+
+    @property
+    def is_connected(self) -> bool: ...
+
+    async def connect(self) -> None: ...
+
+    async def disconnect(self) -> None: ...
+
+    async def start_notify(
+        self, char_specifier: str, callback: Callable[[Any, bytearray], None]
+    ) -> None: ...
+
+    async def stop_notify(self, char_specifier: str) -> None: ...
+
+    async def write_gatt_char(self, char_specifier: str, data: bytearray) -> None: ...
+
+
 class RadonEyeInterface:
+    version: Literal[1, 2]
+
     @abstractmethod
     def supports(self) -> bool:
         raise NotImplementedError("Not supported method supports()")
@@ -45,9 +121,25 @@ class RadonEyeInterface:
         raise NotImplementedError("Not supported method status()")
 
     @abstractmethod
-    async def history(self) -> RadonEyeHistory:
+    async def history(self, progress: HistoryProgressCallback | None = None) -> RadonEyeHistory:
         raise NotImplementedError("Not supported method history()")
 
+    @abstractmethod
+    async def status_raw(self) -> RadonEyeRawData:
+        raise NotImplementedError("Not supported method status_raw()")
+
+    @abstractmethod
+    async def history_raw(
+        self,
+        transfer: RadonEyeHistoryTransfer | None = None,
+        progress: HistoryProgressCallback | None = None,
+    ) -> RadonEyeRawData:
+        raise NotImplementedError("Not supported method history_raw()")
+
+    @abstractmethod
+    def history_transfer(self) -> RadonEyeHistoryTransfer:
+        raise NotImplementedError("Not supported method history_transfer()")
+
     @abstractmethod
     async def beep(self) -> None:
         raise NotImplementedError("Not supported method beep()")
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, NamedTuple
+
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.model import RadonEyeTransport
+
+logger = logging.getLogger(__name__)
+
+
+# timings are in seconds, notification times are relative to the first command write
+class RadonEyeOperation(NamedTuple):
+    name: str  # client method: status, history, status_raw, history_raw, beep, set_alarm, set_unit
+    interface: int
+    duration: float
+    subscribe: float  # total time spent in start_notify
+    write: float  # total time spent in write_gatt_char
+    writes: int
+    first_notification: float | None  # None if nothing was received
+    transfer: float | None  # from first to last notification
+    frames: int
+    bytes: int
+    timeout: bool
+    error: str | None
+
+
+# Receives timings from RadonEyeClient, override the methods you need. Observer is called on the
+# event loop, so it should only record and return (like incrementing metrics).
+class RadonEyeObserver:
+    def on_connect(self, address: str, duration: float, error: str | None) -> None:
+        pass
+
+    def on_detect(self, address: str, interface: int, duration: float) -> None:
+        # interface detection, bleak discovers services during connect
+        pass
+
+    def on_operation(self, address: str, operation: RadonEyeOperation) -> None:
+        pass
+
+
+def describe_error(error: BaseException) -> str:
+    return str(error) or type(error).__name__
+
+
+class OperationTracker:
+    def __init__(self, clock: Clock) -> None:
+        self.clock = clock
+        self.subscribe = 0.0
+        self.write = 0.0
+        self.writes = 0
+        self.first_write: float | None = None
+        self.first_notification: float | None = None
+        self.last_notification: float | None = None
+        self.frames = 0
+        self.bytes = 0
+
+    def notification(self, size: int) -> None:
+        now = self.clock.monotonic()
+        if self.first_notification is None:
+            self.first_notification = now
+        self.last_notification = now
+        self.frames += 1
+        self.bytes += size
+
+    def result(
+        self, name: str, interface: int, duration: float, error: BaseException | None
+    ) -> RadonEyeOperation:
+        first_notification = None
+        transfer = None
+        if self.first_notification is not None and self.last_notification is not None:
+            first_notification = self.first_notification - (self.first_write or 0.0)
+            transfer = self.last_notification - self.first_notification
+        return RadonEyeOperation(
+            name=name,
+            interface=interface,
+            duration=duration,
+            subscribe=self.subscribe,
+            write=self.write,
+            writes=self.writes,
+            first_notification=first_notification,
+            transfer=transfer,
+            frames=self.frames,
+            bytes=self.bytes,
+            timeout=isinstance(error, asyncio.TimeoutError),
+            error=describe_error(error) if error is not None else None,
+        )
+
+
+# Wraps client and times notify subscriptions, writes and notifications of the current operation.
+# It is installed only when observer is set, so there is no overhead without observer.
+class ObservedTransport:
+    def __init__(
+        self,
+        client: RadonEyeTransport,
+        address: str,
+        observer: RadonEyeObserver,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        self.client = client
+        self.address = address
+        self.observer = observer
+        self.clock = clock
+        self.tracker: OperationTracker | None = None
+
+    @asynccontextmanager
+    async def operation(self, name: str, interface: int) -> AsyncIterator[None]:
+        # operations don't interleave, client is used by one operation at a time
+        tracker = self.tracker = OperationTracker(self.clock)
+        started = self.clock.monotonic()
+        error: BaseException | None = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.tracker = None
+            duration = self.clock.monotonic() - started
+            operation = tracker.result(name, interface, duration, error)
+            # failing observer must not replace result or error of the operation
+            self.notify(name, self.observer.on_operation, operation)
+
+    def notify(self, event: str, callback: Callable[..., None], *args: Any) -> None:
+        # failing observer must not fail the client, it is only logged
+        try:
+            callback(self.address, *args)
+        except Exception:
+            logger.exception("Observer failed on %s of %s", event, self.address)
+
+    def detected(self, interface: int, duration: float) -> None:
+        self.notify("detect", self.observer.on_detect, interface, duration)
+
+    @property
+    def services(self) -> Any:
+        return self.client.services
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client.is_connected
+
+    async def connect(self) -> None:
+        started = self.clock.monotonic()
+        try:
+            await self.client.connect()
+        except BaseException as e:
+            duration = self.clock.monotonic() - started
+            self.notify("connect", self.observer.on_connect, duration, describe_error(e))
+            raise
+        duration = self.clock.monotonic() - started
+        self.notify("connect", self.observer.on_connect, duration, None)
+
+    async def disconnect(self) -> None:
+        await self.client.disconnect()
+
+    async def start_notify(
+        self, char_specifier: str, callback: Callable[[Any, bytearray], None]
+    ) -> None:
+        tracker = self.tracker
+        if tracker is None:
+            await self.client.start_notify(char_specifier, callback)
+            return
+
+        def observed_callback(char: Any, data: bytearray) -> None:
+            tracker.notification(len(data))
+            callback(char, data)
+
+        started = self.clock.monotonic()
+        await self.client.start_notify(char_specifier, observed_callback)
+        tracker.subscribe += self.clock.monotonic() - started
+
+    async def stop_notify(self, char_specifier: str) -> None:
+        await self.client.stop_notify(char_specifier)
+
+    async def write_gatt_char(self, char_specifier: str, data: bytearray) -> None:
+        tracker = self.tracker
+        if tracker is None:
+            await self.client.write_gatt_char(char_specifier, data)
+            return
+
+        started = self.clock.monotonic()
+        if tracker.first_write is None:
+            tracker.first_write = started
+        await self.client.write_gatt_char(char_specifier, data)
+        tracker.write += self.clock.monotonic() - started
+        tracker.writes += 1
+
+
+# OpenTelemetry style adapter, reports every connect, detection and operation as span. Spans are
+# created when event is complete, with start time reconstructed from duration. Tracer is
+# opentelemetry.trace.Tracer or anything with the same start_span() and span.end() signatures.
+class SpanObserver(RadonEyeObserver):
+    def __init__(self, tracer: Any, prefix: str = "radoneye") -> None:
+        self.tracer = tracer
+        self.prefix = prefix
+
+    def span(
+        self, name: str, duration: float, attributes: dict[str, Any], error: str | None
+    ) -> None:
+        end_time = time.time_ns()
+        start_time = end_time - int(duration * 1e9)
+        span = self.tracer.start_span(
+            f"{self.prefix}.{name}",
+            start_time=start_time,
+            attributes={key: value for key, value in attributes.items() if value is not None},
+        )
+        if error is not None:
+            span.set_attribute("error.type", error)
+        span.end(end_time=end_time)
+
+    def on_connect(self, address: str, duration: float, error: str | None) -> None:
+        self.span("connect", duration, {f"{self.prefix}.address": address}, error)
+
+    def on_detect(self, address: str, interface: int, duration: float) -> None:
+        attributes = {f"{self.prefix}.address": address, f"{self.prefix}.interface": interface}
+        self.span("detect", duration, attributes, None)
+
+    def on_operation(self, address: str, operation: RadonEyeOperation) -> None:
+        attributes = {
+            f"{self.prefix}.address": address,
+            **{
+                f"{self.prefix}.{key}": value
+                for key, value in operation._asdict().items()
+                if key not in ("name", "duration", "error")
+            },
+        }
+        self.span(operation.name, operation.duration, attributes, operation.error)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Literal, TextIO, TypedDict
+
+
+# "poll" is successful poll that got the same status as the previous one, it has no data
+class RadonEyeEvent(TypedDict):
+    type: Literal["status", "history", "error", "poll"]
+    address: str
+    name: str
+    time: float  # unix timestamp
+    data: Any
+
+
+class RadonEyeOutput:
+    async def start(self) -> None:
+        pass
+
+    async def emit(self, event: RadonEyeEvent) -> None:
+        raise NotImplementedError("Not supported method emit()")
+
+    async def close(self) -> None:
+        pass
+
+
+class StreamOutput(RadonEyeOutput):
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+
+    async def emit(self, event: RadonEyeEvent) -> None:
+        if event["type"] == "poll":
+            return  # stream already has this status
+        self.stream.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self.stream.flush()
+
+
+class FileOutput(StreamOutput):
+    def __init__(self, path: str) -> None:
+        super().__init__(open(path, "a", buffering=1))
+
+    async def close(self) -> None:
+        self.stream.close()
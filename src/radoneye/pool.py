@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from radoneye.client import RadonEyeClient
+from radoneye.clock import SYSTEM_CLOCK, Clock
+from radoneye.observer import RadonEyeObserver
+
+
+# Keeps connected clients around so repeated operations don't pay connect on every call. When
+# max_connections is reached and every pooled client is busy, acquire of another device waits until
+# some client is released, so the limit is never exceeded.
+class RadonEyeConnectionPool:
+    def __init__(
+        self,
+        connect_timeout: float = 30,
+        status_read_timeout: float = 5,
+        history_read_timeout: float = 60,
+        adapter: str | None = None,
+        debug: bool = False,
+        max_connections: int | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+        observer: RadonEyeObserver | None = None,
+    ) -> None:
+        self.connect_timeout = connect_timeout
+        self.status_read_timeout = status_read_timeout
+        self.history_read_timeout = history_read_timeout
+        self.adapter = adapter
+        self.debug = debug
+        self.max_connections = max_connections
+        self.clock = clock
+        self.observer = observer
+        self.clients: OrderedDict[str, RadonEyeClient] = OrderedDict()
+        self.locks: dict[str, asyncio.Lock] = {}
+        self.released = asyncio.Condition()  # notified when busy client becomes idle or dropped
+
+    def create_client(self, address: str) -> RadonEyeClient:
+        return RadonEyeClient(
+            address,
+            connect_timeout=self.connect_timeout,
+            status_read_timeout=self.status_read_timeout,
+            history_read_timeout=self.history_read_timeout,
+            adapter=self.adapter,
+            debug=self.debug,
+            clock=self.clock,
+            observer=self.observer,
+        )
+
+    @asynccontextmanager
+    async def acquire(self, address: str) -> AsyncIterator[RadonEyeClient]:
+        # one operation at a time per device, the device can't handle interleaved commands
+        lock = self.locks.setdefault(address, asyncio.Lock())
+        try:
+            async with lock:
+                client = self.clients.get(address)
+                if client is None:
+                    await self.__reserve()
+                    client = self.create_client(address)
+                    self.clients[address] = client
+                self.clients.move_to_end(address)
+
+                try:
+                    if not client.is_connected:
+                        await client.connect()
+                    yield client
+                except BaseException:
+                    # connection state is unknown after failure or cancellation, next acquire
+                    # reconnects from scratch
+                    await self.__drop(address)
+                    raise
+        finally:
+            await self.__notify_released()
+
+    async def release(self, address: str) -> None:
+        lock = self.locks.setdefault(address, asyncio.Lock())
+        async with lock:
+            await self.__drop(address)
+        await self.__notify_released()
+
+    async def close(self) -> None:
+        for address in list(self.clients.keys()):
+            await self.release(address)
+
+    async def __drop(self, address: str) -> None:
+        client = self.clients.pop(address, None)
+        if client is not None:
+            await client.disconnect()
+
+    async def __notify_released(self) -> None:
+        async with self.released:
+            self.released.notify_all()
+
+    async def __reserve(self) -> None:
+        # makes room for one more client, waits while all pooled clients are busy
+        async with self.released:
+            while not await self.__evict():
+                await self.released.wait()
+
+    async def __evict(self) -> bool:
+        if self.max_connections is None:
+            return True
+        # least recently used idle clients go first
+        for address in list(self.clients.keys()):
+            if len(self.clients) < self.max_connections:
+                break
+            if not self.locks[address].locked():
+                await self.__drop(address)
+        return len(self.clients) < self.max_connections
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import math
+from typing import Callable, Iterable, TypeVar
+
+from radoneye import interface_v1, interface_v2
+from radoneye.memo import FrameMemo
+from radoneye.model import RadonEyeHistory, RadonEyeRawData, RadonEyeStatus
+from radoneye.record import StatusBatch
+
+T = TypeVar("T")
+
+# interface version -> frames parser
+STATUS_PARSERS: dict[int, Callable[[list[bytes]], RadonEyeStatus]] = {
+    1: interface_v1.parse_status_frames,
+    2: interface_v2.parse_status_frames,
+}
+
+HISTORY_PARSERS: dict[int, Callable[[list[bytes]], RadonEyeHistory]] = {
+    1: interface_v1.parse_history_frames,
+    2: interface_v2.parse_history_frames,
+}
+
+
+def get_parser(
+    parsers: dict[int, Callable[[list[bytes]], T]], raw: RadonEyeRawData
+) -> Callable[[list[bytes]], T]:
+    parser = parsers.get(raw["interface"])
+    if parser is None:
+        raise ValueError(f"Unsupported interface version: {raw['interface']}")
+    if not raw["frames"]:
+        raise ValueError("No frames to parse")
+    return parser
+
+
+def read_time(raw: RadonEyeRawData) -> float:
+    # receive time of the last frame, when read was complete
+    return raw["frames"][-1].time if raw["frames"] else math.nan
+
+
+def parse_status_raw(raw: RadonEyeRawData) -> RadonEyeStatus:
+    parser = get_parser(STATUS_PARSERS, raw)
+    return parser([frame.data for frame in raw["frames"]])
+
+
+def parse_history_raw(raw: RadonEyeRawData) -> RadonEyeHistory:
+    parser = get_parser(HISTORY_PARSERS, raw)
+    return parser([frame.data for frame in raw["frames"]])
+
+
+def parse_status_batch(raws: Iterable[RadonEyeRawData]) -> StatusBatch:
+    # every read is stored with its receive time, repeated identical reads are parsed once
+    batch = StatusBatch()
+    memo = FrameMemo[RadonEyeStatus]()
+    for raw in raws:
+        parser = get_parser(STATUS_PARSERS, raw)
+        frames = [frame.data for frame in raw["frames"]]
+        batch.append(memo.parse(tuple(frames), lambda: parser(frames)), read_time(raw))
+    return batch
+
+
+def parse_history_batch(raws: Iterable[RadonEyeRawData]) -> list[RadonEyeHistory]:
+    return [parse_history_raw(raw) for raw in raws]
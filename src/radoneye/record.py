@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import math
+import sys
+from array import array
+from typing import Any, Iterator
+
+from radoneye.model import RadonEyeStatus, RadonUnit
+from radoneye.util import format_counts, format_uptime, to_pci_l
+
+# status keys with radon levels, every level has bq/m3 and pci/l keys
+RADON_LEVELS = ["latest", "day_avg", "month_avg", "peak", "alarm_level"]
+
+
+# Compact alternative to RadonEyeStatus dict. Identity strings are interned (shared between all
+# records of the same device). Formatted strings and pCi/L values are not stored, they are computed
+# on every access (pCi/L from Bq/m3 unless device reported them differently, V1 reports pCi/L), so
+# read them once when they are needed repeatedly.
+class StatusRecord:
+    __slots__ = (
+        "serial",
+        "model",
+        "firmware_version",
+        "display_unit",
+        "latest_bq_m3",
+        "day_avg_bq_m3",
+        "month_avg_bq_m3",
+        "peak_bq_m3",
+        "counts_current",
+        "counts_previous",
+        "uptime_minutes",
+        "alarm_enabled",
+        "alarm_level_bq_m3",
+        "alarm_interval_minutes",
+        "pci_l",
+    )
+
+    def __init__(
+        self,
+        serial: str,
+        model: str,
+        firmware_version: str,
+        display_unit: RadonUnit,
+        latest_bq_m3: float,
+        day_avg_bq_m3: float,
+        month_avg_bq_m3: float,
+        peak_bq_m3: float,
+        counts_current: int,
+        counts_previous: int,
+        uptime_minutes: int,
+        alarm_enabled: int,
+        alarm_level_bq_m3: float,
+        alarm_interval_minutes: int,
+        pci_l: tuple[float, ...] | None = None,  # values in RADON_LEVELS order, None if computed
+    ) -> None:
+        self.serial = sys.intern(serial)
+        self.model = sys.intern(model)
+        self.firmware_version = sys.intern(firmware_version)
+        self.display_unit: RadonUnit = display_unit
+        self.latest_bq_m3 = latest_bq_m3
+        self.day_avg_bq_m3 = day_avg_bq_m3
+        self.month_avg_bq_m3 = month_avg_bq_m3
+        self.peak_bq_m3 = peak_bq_m3
+        self.counts_current = counts_current
+        self.counts_previous = counts_previous
+        self.uptime_minutes = uptime_minutes
+        self.alarm_enabled = alarm_enabled
+        self.alarm_level_bq_m3 = alarm_level_bq_m3
+        self.alarm_interval_minutes = alarm_interval_minutes
+        self.pci_l = pci_l
+
+    @classmethod
+    def from_status(cls, status: RadonEyeStatus) -> StatusRecord:
+        values: dict[str, Any] = dict(status)
+        pci_l = tuple(values[f"{level}_pci_l"] for level in RADON_LEVELS)
+        computed = tuple(to_pci_l(values[f"{level}_bq_m3"]) for level in RADON_LEVELS)
+        return cls(
+            serial=status["serial"],
+            model=status["model"],
+            firmware_version=status["firmware_version"],
+            display_unit=status["display_unit"],
+            latest_bq_m3=status["latest_bq_m3"],
+            day_avg_bq_m3=status["day_avg_bq_m3"],
+            month_avg_bq_m3=status["month_avg_bq_m3"],
+            peak_bq_m3=status["peak_bq_m3"],
+            counts_current=status["counts_current"],
+            counts_previous=status["counts_previous"],
+            uptime_minutes=status["uptime_minutes"],
+            alarm_enabled=status["alarm_enabled"],
+            alarm_level_bq_m3=status["alarm_level_bq_m3"],
+            alarm_interval_minutes=status["alarm_interval_minutes"],
+            pci_l=None if pci_l == computed else pci_l,
+        )
+
+    @property
+    def latest_pci_l(self) -> float:
+        return self.pci_l[0] if self.pci_l is not None else to_pci_l(self.latest_bq_m3)
+
+    @property
+    def day_avg_pci_l(self) -> float:
+        return self.pci_l[1] if self.pci_l is not None else to_pci_l(self.day_avg_bq_m3)
+
+    @property
+    def month_avg_pci_l(self) -> float:
+        return self.pci_l[2] if self.pci_l is not None else to_pci_l(self.month_avg_bq_m3)
+
+    @property
+    def peak_pci_l(self) -> float:
+        return self.pci_l[3] if self.pci_l is not None else to_pci_l(self.peak_bq_m3)
+
+    @property
+    def alarm_level_pci_l(self) -> float:
+        return self.pci_l[4] if self.pci_l is not None else to_pci_l(self.alarm_level_bq_m3)
+
+    @property
+    def counts_str(self) -> str:
+        return format_counts(self.counts_current, self.counts_previous)
+
+    @property
+    def uptime_str(self) -> str:
+        return format_uptime(self.uptime_minutes)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StatusRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    # compared by value, but fields can be changed, so records can't be set items or dict keys
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"StatusRecord({self.serial}, uptime_minutes={self.uptime_minutes})"
+
+    def to_status(self) -> RadonEyeStatus:
+        # same key order as parsers produce
+        return {
+            "serial": self.serial,
+            "model": self.model,
+            "firmware_version": self.firmware_version,
+            "latest_bq_m3": self.latest_bq_m3,
+            "latest_pci_l": self.latest_pci_l,
+            "day_avg_bq_m3": self.day_avg_bq_m3,
+            "day_avg_pci_l": self.day_avg_pci_l,
+            "month_avg_bq_m3": self.month_avg_bq_m3,
+            "month_avg_pci_l": self.month_avg_pci_l,
+            "peak_bq_m3": self.peak_bq_m3,
+            "peak_pci_l": self.peak_pci_l,
+            "counts_current": self.counts_current,
+            "counts_previous": self.counts_previous,
+            "counts_str": self.counts_str,
+            "uptime_minutes": self.uptime_minutes,
+            "uptime_str": self.uptime_str,
+            "display_unit": self.display_unit,
+            "alarm_enabled": self.alarm_enabled,
+            "alarm_level_bq_m3": self.alarm_level_bq_m3,
+            "alarm_level_pci_l": self.alarm_level_pci_l,
+            "alarm_interval_minutes": self.alarm_interval_minutes,
+        }
+
+
+# column name, array type code
+STATUS_COLUMNS = [
+    ("time", "d"),
+    ("latest_bq_m3", "d"),
+    ("latest_pci_l", "d"),
+    ("day_avg_bq_m3", "d"),
+    ("day_avg_pci_l", "d"),
+    ("month_avg_bq_m3", "d"),
+    ("month_avg_pci_l", "d"),
+    ("peak_bq_m3", "d"),
+    ("peak_pci_l", "d"),
+    ("counts_current", "I"),
+    ("counts_previous", "I"),
+    ("uptime_minutes", "I"),
+    ("alarm_enabled", "B"),
+    ("alarm_level_bq_m3", "d"),
+    ("alarm_level_pci_l", "d"),
+    ("alarm_interval_minutes", "H"),
+]
+
+BQ_M3_KEYS = [f"{level}_bq_m3" for level in RADON_LEVELS]
+
+
+# Many status snapshots stored as one typed array per field (struct of arrays), a snapshot takes
+# about 120 bytes instead of a dict with 21 boxed values. Identity strings (serial, model,
+# firmware, display unit) are stored once per distinct combination and referenced by index.
+class StatusBatch:
+    def __init__(self) -> None:
+        self.columns: dict[str, array[Any]] = {
+            name: array(typecode) for name, typecode in STATUS_COLUMNS
+        }
+        self.identity = array("I")
+        self.identities: list[tuple[str, str, str, RadonUnit]] = []
+        self.identity_index: dict[tuple[str, str, str, RadonUnit], int] = {}
+        # V2 reports Bq/m3 as integers, flag keeps them integers when converting back
+        self.bq_m3_int = array("B")
+
+    def __len__(self) -> int:
+        return len(self.identity)
+
+    def __iter__(self) -> Iterator[RadonEyeStatus]:
+        for index in range(len(self)):
+            yield self.status(index)
+
+    def append(self, status: RadonEyeStatus | StatusRecord, time: float = math.nan) -> None:
+        if isinstance(status, StatusRecord):
+            status = status.to_status()
+
+        identity = (
+            status["serial"],
+            status["model"],
+            status["firmware_version"],
+            status["display_unit"],
+        )
+        identity_id = self.identity_index.get(identity)
+        if identity_id is None:
+            identity_id = len(self.identities)
+            self.identities.append(identity)
+            self.identity_index[identity] = identity_id
+        self.identity.append(identity_id)
+
+        self.columns["time"].append(time)
+        for name, _ in STATUS_COLUMNS[1:]:
+            self.columns[name].append(status[name])  # type: ignore
+        self.bq_m3_int.append(
+            all(isinstance(status[key], int) for key in BQ_M3_KEYS)  # type: ignore
+        )
+
+    def column(self, name: str) -> array[Any]:
+        return self.columns[name]
+
+    def status(self, index: int) -> RadonEyeStatus:
+        serial, model, firmware_version, display_unit = self.identities[self.identity[index]]
+        columns = self.columns
+        to_bq_m3 = int if self.bq_m3_int[index] else float
+        counts_current = columns["counts_current"][index]
+        counts_previous = columns["counts_previous"][index]
+        uptime_minutes = columns["uptime_minutes"][index]
+        return {
+            "serial": serial,
+            "model": model,
+            "firmware_version": firmware_version,
+            "latest_bq_m3": to_bq_m3(columns["latest_bq_m3"][index]),
+            "latest_pci_l": columns["latest_pci_l"][index],
+            "day_avg_bq_m3": to_bq_m3(columns["day_avg_bq_m3"][index]),
+            "day_avg_pci_l": columns["day_avg_pci_l"][index],
+            "month_avg_bq_m3": to_bq_m3(columns["month_avg_bq_m3"][index]),
+            "month_avg_pci_l": columns["month_avg_pci_l"][index],
+            "peak_bq_m3": to_bq_m3(columns["peak_bq_m3"][index]),
+            "peak_pci_l": columns["peak_pci_l"][index],
+            "counts_current": counts_current,
+            "counts_previous": counts_previous,
+            "counts_str": format_counts(counts_current, counts_previous),
+            "uptime_minutes": uptime_minutes,
+            "uptime_str": format_uptime(uptime_minutes),
+            "display_unit": display_unit,
+            "alarm_enabled": bool(columns["alarm_enabled"][index]),
+            "alarm_level_bq_m3": to_bq_m3(columns["alarm_level_bq_m3"][index]),
+            "alarm_level_pci_l": columns["alarm_level_pci_l"][index],
+            "alarm_interval_minutes": columns["alarm_interval_minutes"][index],
+        }
+
+    def record(self, index: int) -> StatusRecord:
+        return StatusRecord.from_status(self.status(index))
+
+    def nbytes(self) -> int:
+        arrays = [*self.columns.values(), self.identity, self.bq_m3_int]
+        return sum(len(values) * values.itemsize for values in arrays)
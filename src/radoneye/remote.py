@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+from typing import Any, Awaitable, Callable
+
+from radoneye.model import RadonEyeHistory, RadonEyeStatus, RadonUnit
+
+logger = logging.getLogger(__name__)
+
+STREAM_LIMIT = 16 * 1024 * 1024  # history responses can be large
+
+# Executes one request against a device, the callable gets request and returns JSON serializable
+# result. Daemon provides one that uses its connection pool.
+RemoteHandler = Callable[[dict[str, Any]], Awaitable[Any]]
+
+
+def default_socket_path() -> str | None:
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "radoneye.sock")
+    return os.path.join(tempfile.gettempdir(), f"radoneye-{os.getuid()}.sock")
+
+
+async def execute_command(client: Any, request: dict[str, Any]) -> Any:
+    # client is RadonEyeClient or anything with the same methods
+    command = request.get("command")
+    if command == "status":
+        return await client.status()
+    if command == "history":
+        return await client.history()
+    if command == "beep":
+        return await client.beep()
+    if command == "set_alarm":
+        return await client.set_alarm(
+            enabled=bool(request["enabled"]),
+            level=float(request["level"]),
+            unit=request["unit"],
+            interval=int(request["interval"]),
+        )
+    if command == "set_unit":
+        return await client.set_unit(request["unit"])
+    raise ValueError(f"Unsupported command: {command}")
+
+
+class RadonEyeRemoteError(Exception):
+    pass
+
+
+# Same interface as RadonEyeClient, but operations are executed by running daemon that already
+# has connection to the device.
+class RadonEyeRemoteClient:
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        address: str,
+        max_age: float | None = None,  # sec, status cached by daemon can be that old
+        timeout: float | None = None,  # sec, how long to wait for daemon response
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.address = address
+        self.max_age = max_age
+        self.timeout = timeout
+
+    @classmethod
+    async def open(
+        cls,
+        path: str,
+        address: str,
+        max_age: float | None = None,
+        timeout: float | None = None,
+    ) -> RadonEyeRemoteClient:
+        reader, writer = await asyncio.open_unix_connection(path, limit=STREAM_LIMIT)
+        return cls(reader, writer, address, max_age, timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):  # type: ignore
+        await self.disconnect()
+
+    async def disconnect(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def request(self, command: str, **kwargs: Any) -> Any:
+        request = {"command": command, "address": self.address, **kwargs}
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+        if not line:
+            raise RadonEyeRemoteError("Daemon closed connection")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RadonEyeRemoteError(response.get("error") or "Unknown error")
+        return response.get("result")
+
+    async def beep(self) -> None:
+        await self.request("beep")
+
+    async def status(self) -> RadonEyeStatus:
+        return await self.request("status", max_age=self.max_age)
+
+    async def history(self) -> RadonEyeHistory:
+        return await self.request("history")
+
+    async def set_alarm(
+        self,
+        enabled: bool,
+        level: float,
+        unit: RadonUnit,
+        interval: int,
+    ) -> None:
+        await self.request("set_alarm", enabled=enabled, level=level, unit=unit, interval=interval)
+
+    async def set_unit(self, unit: RadonUnit) -> None:
+        await self.request("set_unit", unit=unit)
+
+
+async def open_remote_client(
+    path: str | None,
+    address: str,
+    max_age: float | None = None,
+    timeout: float | None = None,
+) -> RadonEyeRemoteClient | None:
+    # returns None when daemon is not running, so caller can talk to the device directly
+    if not path or not os.path.exists(path):
+        return None
+    # socket in shared temp dir could be created by another user to intercept commands
+    if os.stat(path).st_uid != os.getuid():
+        logger.warning("Ignoring daemon socket %s owned by another user", path)
+        return None
+    try:
+        return await RadonEyeRemoteClient.open(path, address, max_age, timeout)
+    except OSError:
+        return None  # stale socket file left after daemon crash
+
+
+class RadonEyeSocketServer:
+    def __init__(self, path: str, handler: RemoteHandler) -> None:
+        self.path = path
+        self.handler = handler
+        self.server: asyncio.Server | None = None
+        self.writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            client = await open_remote_client(self.path, "")
+            if client is not None:
+                await client.disconnect()
+                raise RuntimeError(f"Another daemon is already listening on {self.path}")
+            os.unlink(self.path)  # stale socket file
+        # socket is created with owner only permissions, chmod after bind would leave a window
+        umask = os.umask(0o177)
+        try:
+            self.server = await asyncio.start_unix_server(
+                self.handle_connection, self.path, limit=STREAM_LIMIT
+            )
+        finally:
+            os.umask(umask)
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.writers.add(writer)
+        try:
+            while line := await reader.readline():
+                try:
+                    result = await self.handler(json.loads(line))
+                    response = {"ok": True, "result": result}
+                except Exception as e:
+                    response = {"ok": False, "error": str(e) or type(e).__name__}
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.debug("Socket connection closed: %s", e)
+        finally:
+            self.writers.discard(writer)
+            writer.close()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from bleak import BleakScanner
-from bleak.backends.device import BLEDevice
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bleak.backends.device import BLEDevice
 
 RADONEYE_NAME_PREFIX = "FR:"
 
@@ -13,5 +15,7 @@ class RadonEyeScanner:
         timeout: float = 30,
         adapter: str | None = None,
     ) -> list[BLEDevice]:
+        from bleak import BleakScanner
+
         devices = await BleakScanner.discover(timeout=timeout, adapter=adapter)  # type: ignore
         return [dev for dev in devices if dev.name and dev.name.startswith(RADONEYE_NAME_PREFIX)]
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+
+from radoneye.model import RadonEyeStatus
+
+MEASUREMENT_CYCLE = 600  # sec, device refreshes measurement every 10 minutes
+
+
+class RadonEyeSchedule:
+    def observe(self, now: float, status: RadonEyeStatus) -> None:
+        pass
+
+    def priority(self) -> float:
+        return 0
+
+    def next_delay(self, now: float) -> float:
+        raise NotImplementedError("Not supported method next_delay()")
+
+
+class IntervalSchedule(RadonEyeSchedule):
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+
+    def next_delay(self, now: float) -> float:
+        return self.interval
+
+
+# Reads the device once per measurement cycle, just after the measurement is refreshed.
+#
+# Boot time is derived from uptime (minute resolution). Reads made at different seconds narrow
+# boot time down to a few seconds. Update time is assumed to be a multiple of the measurement
+# cycle since boot plus an offset, the offset is learned from pairs of reads less than one cycle
+# apart where the second one observed changed values. Reads once per cycle never form such pair,
+# so while the offset is known less precisely than `precision`, every other cycle gets one extra
+# probe read in the middle of the window where the update is expected, which halves the window
+# (bisection). Until the offset is learned, reads are aligned to boot time. All times are
+# monotonic seconds (event loop time).
+class CycleAlignedSchedule(RadonEyeSchedule):
+    def __init__(
+        self,
+        cycle: float = MEASUREMENT_CYCLE,
+        margin: float = 5,  # sec, delay after expected update to let device settle
+        fallback_interval: float = MEASUREMENT_CYCLE,
+        precision: float = 30,  # sec, offset window that is good enough to stop probing
+    ) -> None:
+        self.cycle = cycle
+        self.margin = margin
+        self.fallback_interval = fallback_interval
+        self.precision = precision
+        self.boot: tuple[float, float] | None = None
+        self.offset: tuple[float, float] | None = None  # None until the first update is observed
+        self.previous_time: float | None = None
+        self.previous_values: tuple[float, int, int] | None = None
+        self.probed = False  # last scheduled read was probe
+
+    def observe(self, now: float, status: RadonEyeStatus) -> None:
+        uptime = status["uptime_minutes"] * 60
+        boot = (now - uptime - 60, now - uptime)
+        if self.boot is None:
+            self.boot = boot
+        else:
+            merged = (max(self.boot[0], boot[0]), min(self.boot[1], boot[1]))
+            # empty intersection means reboot or clock drift, start over from this read
+            self.boot = merged if merged[0] <= merged[1] else boot
+
+        values = (status["latest_bq_m3"], status["counts_current"], status["counts_previous"])
+        if (
+            self.previous_time is not None
+            and self.previous_values is not None
+            and values != self.previous_values
+        ):
+            self.observe_update(self.previous_time, now)
+
+        self.previous_time = now
+        self.previous_values = values
+
+    def observe_update(self, after: float, before: float) -> None:
+        # measurement was refreshed somewhere in (after, before]
+        assert self.boot is not None
+        candidate = (after - self.boot[1], before - self.boot[0])
+        if candidate[1] - candidate[0] >= self.cycle:
+            return  # no information, reads are too far apart
+        if self.offset is None:
+            self.offset = candidate
+            return
+
+        # move candidate to the cycle closest to current estimate
+        shift = round(
+            ((self.offset[0] + self.offset[1]) - (candidate[0] + candidate[1])) / 2 / self.cycle
+        )
+        candidate = (candidate[0] + shift * self.cycle, candidate[1] + shift * self.cycle)
+
+        merged = (max(self.offset[0], candidate[0]), min(self.offset[1], candidate[1]))
+        self.offset = merged if merged[0] <= merged[1] else candidate
+
+    def next_update(self, now: float) -> float | None:
+        # earliest time after now when refreshed measurement is guaranteed to be available
+        if self.boot is None:
+            return None
+        latest = self.boot[1] + (self.offset[1] if self.offset is not None else 0)
+        return latest + (math.floor((now - latest) / self.cycle) + 1) * self.cycle
+
+    def next_probe(self, now: float) -> float | None:
+        # middle of the window where update is expected, None if window is narrow enough
+        if self.boot is None:
+            return None
+        offset = self.offset if self.offset is not None else (0, self.cycle)
+        if offset[1] - offset[0] <= self.precision:
+            return None
+        middle = (self.boot[0] + self.boot[1] + offset[0] + offset[1]) / 2
+        return middle + (math.floor((now - middle) / self.cycle) + 1) * self.cycle
+
+    def next_delay(self, now: float) -> float:
+        # probe and regular read alternate, so probe is compared with the regular read before it
+        # and the one after it
+        probe = None if self.probed else self.next_probe(now)
+        self.probed = probe is not None
+        if probe is not None:
+            return probe - now
+
+        next_update = self.next_update(now)
+        if next_update is None:
+            return self.fallback_interval
+        return next_update + self.margin - now
+
+
+# Polls more often when level is rising or getting close to alarm level and backs off when flat.
+class AdaptiveSchedule(RadonEyeSchedule):
+    def __init__(
+        self,
+        min_interval: float = MEASUREMENT_CYCLE,
+        max_interval: float = MEASUREMENT_CYCLE * 6,
+        backoff: float = 2,
+        rise_rate: float = 10,  # bq/m3 per hour, smoothed trend above it is considered rising
+        alarm_ratio: float = 0.8,  # level above this share of alarm level is considered close
+        smoothing: float = 0.5,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.rise_rate = rise_rate
+        self.alarm_ratio = alarm_ratio
+        self.smoothing = smoothing
+        self.interval = min_interval
+        self.trend = 0.0  # bq/m3 per hour
+        self.level = 0.0
+        self.alarm_level = 0.0
+        self.previous_time: float | None = None
+
+    @property
+    def rising(self) -> bool:
+        return self.trend > self.rise_rate
+
+    @property
+    def near_alarm(self) -> bool:
+        return self.alarm_level > 0 and self.level >= self.alarm_level * self.alarm_ratio
+
+    def observe(self, now: float, status: RadonEyeStatus) -> None:
+        level = status["latest_bq_m3"]
+        if self.previous_time is not None and now > self.previous_time:
+            rate = (level - self.level) / (now - self.previous_time) * 3600
+            self.trend = self.smoothing * rate + (1 - self.smoothing) * self.trend
+        self.previous_time = now
+        self.level = level
+        self.alarm_level = status["alarm_level_bq_m3"]
+
+        if self.rising or self.near_alarm:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def priority(self) -> float:
+        # more urgent devices get airtime first when budget is exhausted
+        closeness = self.level / self.alarm_level if self.alarm_level > 0 else 0
+        return closeness + (1 if self.rising else 0)
+
+    def next_delay(self, now: float) -> float:
+        return self.interval
+
+
+# Shared limit on device reads per hour so whole fleet fits into fixed BLE capacity.
+# When tokens are exhausted, waiting reads are granted by priority (highest first).
+class AirtimeBudget:
+    def __init__(self, reads_per_hour: float, burst: int = 1) -> None:
+        self.rate = reads_per_hour / 3600
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated: float | None = None
+        self.waiters: list[tuple[float, int, asyncio.Future[None]]] = []
+        self.counter = 0
+        self.timer: asyncio.TimerHandle | None = None
+
+    def __refill(self, now: float) -> None:
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: float = 0) -> None:
+        loop = asyncio.get_running_loop()
+        self.__refill(loop.time())
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future: asyncio.Future[None] = loop.create_future()
+        self.counter += 1
+        heapq.heappush(self.waiters, (-priority, self.counter, future))
+        self.__schedule(loop)
+        await future
+
+    def __schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self.timer is None and self.waiters:
+            delay = max(0, (1 - self.tokens) / self.rate)
+            self.timer = loop.call_later(delay, self.__dispatch, loop)
+
+    def __dispatch(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.timer = None
+        self.__refill(loop.time())
+        while self.waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue  # waiter was cancelled
+            self.tokens -= 1
+            future.set_result(None)
+        self.__schedule(loop)
@@ -0,0 +1,6 @@
+# flake8: noqa
+
+from radoneye.simulator.client import SimulatedClient
+from radoneye.simulator.device import SimulatedDevice
+
+__all__ = ["SimulatedClient", "SimulatedDevice"]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import deque
+from typing import Any, Callable, Iterator, NamedTuple
+
+from radoneye.simulator.device import SimulatedDevice
+
+
+# service or characteristic passed to notify callbacks
+class SimulatedAttribute(NamedTuple):
+    uuid: str
+
+
+class SimulatedServices:
+    def __init__(self, uuids: list[str]) -> None:
+        self.uuids = uuids
+
+    def __iter__(self) -> Iterator[SimulatedAttribute]:
+        return iter([SimulatedAttribute(uuid) for uuid in self.uuids])
+
+    def get_service(self, specifier: str) -> SimulatedAttribute | None:
+        uuid = str(specifier).lower()
+        return SimulatedAttribute(uuid) if uuid in self.uuids else None
+
+
+# BleakClient stand-in talking to SimulatedDevice over emulated link. Every notification arrives
+# after latency plus random jitter, in the same order as device sent it (like over real
+# connection), dropped notifications are lost and reads waiting for them time out.
+class SimulatedClient:
+    def __init__(
+        self,
+        device: SimulatedDevice,
+        latency: float = 0.03,  # sec, from write to notification
+        jitter: float = 0.01,  # sec, max random delay added to latency
+        connect_latency: float = 0.5,  # sec
+        mtu: int | None = None,  # defaults to typical MTU for device version
+        drop_rate: float = 0.0,  # probability notification is lost
+        seed: int | None = None,
+        disconnect_after: int | None = None,  # link is lost once after that many notifications
+    ) -> None:
+        self.device = device
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_latency = connect_latency
+        self.mtu = mtu
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.disconnect_after = disconnect_after
+        self.services = SimulatedServices([device.service_uuid])
+        self.callbacks: dict[str, Callable[[Any, bytearray], None]] = {}
+        self.is_connected = False
+        self.next_delivery = 0.0
+        self.pending: deque[tuple[str, bytes]] = deque()
+        self.writes = 0
+        self.notifications = 0
+        self.dropped = 0
+
+    async def connect(self) -> None:
+        await asyncio.sleep(self.connect_latency)
+        self.is_connected = True
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+        self.callbacks.clear()
+
+    async def start_notify(
+        self, char_specifier: str, callback: Callable[[Any, bytearray], None]
+    ) -> None:
+        self.check_connected()
+        self.callbacks[str(char_specifier).lower()] = callback
+
+    async def stop_notify(self, char_specifier: str) -> None:
+        self.check_connected()
+        self.callbacks.pop(str(char_specifier).lower(), None)
+
+    async def write_gatt_char(self, char_specifier: str, data: bytearray) -> None:
+        self.check_connected()
+        self.writes += 1
+        loop = asyncio.get_running_loop()
+        for uuid, frame in self.device.handle(bytes(data), self.mtu):
+            if self.drop_rate and self.random.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            self.next_delivery = max(self.next_delivery, loop.time() + delay)
+            # event loop doesn't keep order of timers due at the same time, so every timer
+            # delivers the oldest pending frame instead of the one it was scheduled for
+            self.pending.append((uuid, frame))
+            loop.call_at(self.next_delivery, self.deliver)
+
+    def check_connected(self) -> None:
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+
+    def deliver(self) -> None:
+        uuid, frame = self.pending.popleft()
+        # notifications are lost when nobody listens, same as with real device
+        callback = self.callbacks.get(uuid)
+        if callback is not None and self.is_connected:
+            self.notifications += 1
+            callback(SimulatedAttribute(uuid), bytearray(frame))
+            if self.disconnect_after is not None and self.notifications >= self.disconnect_after:
+                self.disconnect_after = None
+                self.is_connected = False
+                self.callbacks.clear()
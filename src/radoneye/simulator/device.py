@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import math
+import struct
+import time
+from typing import Callable, Literal
+
+from radoneye import interface_v1, interface_v2
+from radoneye.model import RadonUnit
+from radoneye.util import to_pci_l
+
+MEASUREMENT_INTERVAL = 10  # minutes, device refreshes latest value every 10 minutes
+HISTORY_INTERVAL = 60  # minutes, device stores hourly averages
+HISTORY_MAX_VALUES = 365 * 24  # device keeps one year of history, the oldest values are dropped
+
+V2_STATUS_SIZE = 68  # 0x40 message size, bytes after the last known field are zeros
+V2_HISTORY_PAGE_VALUES = 250  # values per 0x41 page sent by real device
+V2_HISTORY_HEADER_SIZE = 4  # command, page count, page number, value count
+V2_HISTORY_MAX_PAGES = 255  # page count and number are bytes
+
+# history data is sent as pCi/L scaled by 37 * 2.7, see interface_v1.parse_history_data()
+V1_HISTORY_SCALE = 37 * 2.7
+
+ATT_HEADER_SIZE = 3  # notification payload is MTU minus ATT header
+
+DEFAULT_MTU: dict[int, int] = {1: 23, 2: 512}
+
+DEFAULT_MODELS: dict[int, str] = {1: "RD200", 2: "RD200N"}
+
+# model -> serial, firmware version (as reported by real devices)
+DEFAULTS: dict[str, tuple[str, str]] = {
+    "RD200": ("RU22012020159", "V1.2.4"),
+    "RD200N": ("RU22201030383", "V2.0.2"),
+    "RD200V3": ("IJ01RE001404", "V3.0.1"),  # 0x40 message has v3 layout
+}
+
+
+# Emulated RD200 state and its protocol. Radon level varies pseudo-randomly around level_bq_m3,
+# deterministic for given seed, so the same device gives the same values at the same uptime.
+# Uptime (and history with it) advances with clock, so device can run on virtual time too.
+class SimulatedDevice:
+    def __init__(
+        self,
+        version: Literal[1, 2] = 2,
+        serial: str | None = None,
+        model: str | None = None,
+        firmware_version: str | None = None,
+        level_bq_m3: float = 50,
+        uptime_minutes: int = 30 * 24 * 60,
+        display_unit: RadonUnit = "pci/l",
+        seed: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.version = version
+        self.model = model or DEFAULT_MODELS[version]
+        default_serial, default_firmware_version = DEFAULTS.get(self.model, DEFAULTS["RD200N"])
+        self.serial = serial or default_serial
+        self.firmware_version = firmware_version or default_firmware_version
+        self.level_bq_m3 = level_bq_m3
+        self.display_unit: RadonUnit = display_unit
+        self.alarm_enabled = True
+        self.alarm_level_bq_m3 = 148.0
+        self.alarm_interval_minutes = 60
+        self.beeps = 0
+        self.seed = seed
+        self.clock = clock
+        self.started = clock()
+        self.initial_uptime_minutes = uptime_minutes
+        self.history_bq_m3: list[float] = []
+        self.history_hours = 0
+        self.peak_bq_m3 = 0.0
+
+    @property
+    def service_uuid(self) -> str:
+        return interface_v1.SERVICE_UUID if self.version == 1 else interface_v2.SERVICE_UUID
+
+    @property
+    def uptime_minutes(self) -> int:
+        return self.initial_uptime_minutes + int((self.clock() - self.started) // 60)
+
+    def level_at(self, cycle: int) -> float:
+        # daily wave plus up to 25% noise, one value per 10 minute measurement cycle, hash of int
+        # tuple is not randomized between runs and is much cheaper than seeding random generator
+        wave = math.sin(cycle * 2 * math.pi / (24 * 60 / MEASUREMENT_INTERVAL))
+        noise = ((hash((self.seed, cycle)) & 0xFFFF) / 0xFFFF - 0.5) / 2
+        return max(0.0, round(self.level_bq_m3 * (1 + 0.3 * wave + noise)))
+
+    def history(self) -> list[float]:
+        # hourly values since power on (up to device maximum), generated when time passes
+        hours = self.uptime_minutes // HISTORY_INTERVAL
+        cycles_per_hour = HISTORY_INTERVAL // MEASUREMENT_INTERVAL
+        # older hours would be dropped anyway
+        for hour in range(max(self.history_hours, hours - HISTORY_MAX_VALUES), hours):
+            cycle = hour * cycles_per_hour
+            levels = [self.level_at(cycle + i) for i in range(cycles_per_hour)]
+            value = round(sum(levels) / cycles_per_hour)
+            self.history_bq_m3.append(value)
+            self.peak_bq_m3 = max(self.peak_bq_m3, value)
+        self.history_hours = hours
+        del self.history_bq_m3[:-HISTORY_MAX_VALUES]
+        return self.history_bq_m3
+
+    def levels(self) -> tuple[float, float, float, float, int, int]:
+        # latest, day average, month average, peak (in Bq/m3), current and previous counts
+        history = self.history()
+        cycle = self.uptime_minutes // MEASUREMENT_INTERVAL
+        latest = self.level_at(cycle)
+        previous = self.level_at(cycle - 1)
+        day = history[-24:]
+        day_avg = round(sum(day) / len(day)) if day else 0
+        # device reports month average only after 30 days of uptime
+        month = history[-30 * 24 :] if len(history) >= 30 * 24 else []
+        month_avg = round(sum(month) / len(month)) if month else 0
+        peak = max(self.peak_bq_m3, latest)
+        return latest, day_avg, month_avg, peak, int(latest // 7), int(previous // 7)
+
+    def handle(self, command: bytes, mtu: int | None = None) -> list[tuple[str, bytes]]:
+        # responds to command with (characteristic uuid, notification) pairs
+        mtu = mtu or DEFAULT_MTU[self.version]
+        if self.version == 1:
+            return self.handle_v1(command, mtu)
+        return self.handle_v2(command, mtu)
+
+    def handle_v2(self, command: bytes, mtu: int) -> list[tuple[str, bytes]]:
+        if command[0] == interface_v2.COMMAND_STATUS:
+            return [(interface_v2.CHAR_STATUS, self.status_v2())]
+        if command[0] == interface_v2.COMMAND_HISTORY:
+            return [(interface_v2.CHAR_HISTORY, page) for page in self.history_v2(mtu)]
+        if command[0] == interface_v2.COMMAND_BEEP:
+            self.beeps += 1
+        elif command[0] == interface_v2.COMMAND_SET_ALARM:
+            _, _, enabled, level_bq_m3, interval = interface_v2.SET_ALARM_SPEC.unpack(command)
+            self.alarm_enabled = enabled == 0x01
+            self.alarm_level_bq_m3 = level_bq_m3
+            self.alarm_interval_minutes = interval * 10
+        elif command[0] == interface_v2.COMMAND_SET_UNIT:
+            _, _, unit_bq_m3 = interface_v2.SET_UNIT_SPEC.unpack(command)
+            self.display_unit = "bq/m3" if unit_bq_m3 == 0x01 else "pci/l"
+        return []
+
+    def handle_v1(self, command: bytes, mtu: int) -> list[tuple[str, bytes]]:
+        status = interface_v1.CHAR_STATUS
+        if command[0] == interface_v1.COMMAND_STATUS_10:
+            return [
+                (status, self.msg_a4()),
+                (status, self.msg_a8()),
+                (status, self.msg_ac()),
+                (status, self.msg_50()),
+                (status, self.msg_51()),
+            ]
+        if command[0] == interface_v1.COMMAND_STATUS_AF:
+            return [(status, self.msg_af())]
+        if command[0] == interface_v1.COMMAND_STATUS_A6:
+            return [(status, self.msg_a6())]
+        if command[0] == interface_v1.COMMAND_STATUS_50:
+            return [(status, self.msg_50())]
+        if command[0] == interface_v1.COMMAND_STATUS_51:
+            return [(status, self.msg_51())]
+        if command[0] == interface_v1.COMMAND_STATUS_E8:
+            return [(status, self.msg_e8())]
+        if command[0] == interface_v1.COMMAND_HISTORY:
+            return [(interface_v1.CHAR_HISTORY, chunk) for chunk in self.history_v1(mtu)]
+        if command[0] == interface_v1.COMMAND_BEEP:
+            self.beeps += 1
+        elif command[0] == interface_v1.COMMAND_SET_ALARM:
+            _, _, enabled, level_pci_l, interval = interface_v1.SET_ALARM_SPEC.unpack(command)
+            self.alarm_enabled = enabled == 0x01
+            self.alarm_level_bq_m3 = level_pci_l * 37
+            self.alarm_interval_minutes = interval * 10
+            return [(status, self.msg_ac())]
+        elif command[0] == interface_v1.COMMAND_SET_UNIT:
+            _, _, unit_bq_m3 = interface_v1.SET_UNIT_SPEC.unpack(command)
+            self.display_unit = "bq/m3" if unit_bq_m3 == 0x01 else "pci/l"
+            return [(status, self.msg_ac())]
+        return []
+
+    def status_v2(self) -> bytes:
+        latest, day_avg, month_avg, peak, counts_current, counts_previous = self.levels()
+        values = {
+            "firmware_version": self.firmware_version.encode(),
+            "display_unit": 0x01 if self.display_unit == "bq/m3" else 0x00,
+            "alarm_enabled": 0x01 if self.alarm_enabled else 0x00,
+            "alarm_level_bq_m3": round(self.alarm_level_bq_m3),
+            "alarm_interval": self.alarm_interval_minutes // 10,
+            "latest_bq_m3": round(latest),
+            "day_avg_bq_m3": round(day_avg),
+            "month_avg_bq_m3": round(month_avg),
+            "counts_current": counts_current,
+            "counts_previous": counts_previous,
+            "uptime_minutes": self.uptime_minutes,
+            "peak_bq_m3": round(peak),
+            "history_size": len(self.history()),
+        }
+        if self.model.endswith("V3"):
+            message = interface_v2.STATUS_V3_SPEC.pack(
+                serial=self.serial.encode(), model=self.model.encode(), **values
+            )
+            message[14] = len(self.model)  # 0x07 marks v3 layout
+        else:
+            message = interface_v2.STATUS_V2_SPEC.pack(
+                serial_part1=self.serial[0:3].encode(),
+                serial_part2=self.serial[3:9].encode(),
+                serial_part3=self.serial[9:13].encode(),
+                model=self.model.encode(),
+                **values,
+            )
+            message[15] = len(self.model)  # 0x06 marks v2 layout
+        message[0] = interface_v2.COMMAND_STATUS
+        message[1] = V2_STATUS_SIZE - 2
+        return bytes(message.ljust(V2_STATUS_SIZE, b"\x00"))
+
+    def history_v2(self, mtu: int) -> list[bytes]:
+        values = [round(value) for value in self.history()]
+        payload_size = mtu - ATT_HEADER_SIZE - V2_HISTORY_HEADER_SIZE
+        page_size = min(V2_HISTORY_PAGE_VALUES, payload_size // 2)
+        # small MTU can't fit long history into 255 pages, pages get larger than MTU then (real
+        # device needs MTU negotiated by bleak anyway)
+        page_size = max(page_size, math.ceil(len(values) / V2_HISTORY_MAX_PAGES))
+        pages = [values[i : i + page_size] for i in range(0, len(values), page_size)] or [[]]
+        return [
+            bytes([interface_v2.COMMAND_HISTORY, len(pages), page_no, len(page)])
+            + struct.pack(f"<{len(page)}H", *page)
+            for page_no, page in enumerate(pages, 1)
+        ]
+
+    def msg_v1(self, preamble: int, size: int, message: bytearray) -> bytes:
+        message[0] = preamble
+        message[1] = size
+        return bytes(message.ljust(interface_v1.MSG_SIZE, b"\x00"))
+
+    def msg_a4(self) -> bytes:
+        # manufacturing date and serial number within date, series is in A6
+        serial = f"20{self.serial[3:9]}SN{self.serial[9:]}".encode()
+        message = interface_v1.MSG_A4_SPEC.pack(serial=serial)
+        message[0] = interface_v1.MSG_PREAMBLE_A4
+        return bytes(message.ljust(interface_v1.MSG_SIZE, b"\x00"))
+
+    def msg_a6(self) -> bytes:
+        message = interface_v1.MSG_A6_SPEC.pack(series=self.serial[0:3].encode())
+        message[0] = interface_v1.MSG_PREAMBLE_A6
+        return bytes(message.ljust(interface_v1.MSG_SIZE, b"\x00"))
+
+    def msg_a8(self) -> bytes:
+        message = interface_v1.MSG_A8_SPEC.pack(model=self.model.encode())
+        return self.msg_v1(interface_v1.MSG_PREAMBLE_A8, len(self.model) + 1, message)
+
+    def msg_af(self) -> bytes:
+        # value has trailing new line
+        firmware_version = f"{self.firmware_version}\n".encode()
+        message = interface_v1.MSG_AF_SPEC.pack(firmware_version=firmware_version)
+        message[0] = interface_v1.MSG_PREAMBLE_AF
+        return bytes(message.ljust(interface_v1.MSG_SIZE, b"\x00"))
+
+    def msg_ac(self) -> bytes:
+        message = interface_v1.MSG_AC_SPEC.pack(
+            display_unit=0x01 if self.display_unit == "bq/m3" else 0x00,
+            alarm_enabled=0x01 if self.alarm_enabled else 0x00,
+            alarm_level=to_pci_l(self.alarm_level_bq_m3),
+            alarm_interval=self.alarm_interval_minutes // 10,
+        )
+        return self.msg_v1(interface_v1.MSG_PREAMBLE_AC, 0x07, message)
+
+    def msg_50(self) -> bytes:
+        latest, day_avg, month_avg, _, counts_current, counts_previous = self.levels()
+        message = interface_v1.MSG_50_SPEC.pack(
+            latest=latest / 37,
+            day_avg=day_avg / 37,
+            month_avg=month_avg / 37,
+            counts_current=counts_current,
+            counts_previous=counts_previous,
+        )
+        return self.msg_v1(interface_v1.MSG_PREAMBLE_50, 0x10, message)
+
+    def msg_51(self) -> bytes:
+        peak = self.levels()[3]
+        message = interface_v1.MSG_51_SPEC.pack(uptime_minutes=self.uptime_minutes, peak=peak / 37)
+        return self.msg_v1(interface_v1.MSG_PREAMBLE_51, 0x0E, message)
+
+    def msg_e8(self) -> bytes:
+        message = interface_v1.MSG_E8_SPEC.pack(history_size=len(self.history()))
+        return self.msg_v1(interface_v1.MSG_PREAMBLE_E8, 0x0B, message)
+
+    def history_v1(self, mtu: int) -> list[bytes]:
+        values = [round(value / 37 * V1_HISTORY_SCALE) for value in self.history()]
+        data = struct.pack(f"<{len(values)}H", *values)
+        # every notification is as long as MTU allows, the last one is padded with zeros
+        size = mtu - ATT_HEADER_SIZE
+        return [data[i : i + size].ljust(size, b"\x00") for i in range(0, len(data), size)]
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+# Replaces RadonEyeClient class (patch with side_effect=fake_clients), every created client is a
+# MagicMock with async methods returning `status` and `history`. Reads of addresses in `delays`
+# take that long, reads of addresses in `failing` time out.
+class FakeClients:
+    def __init__(self) -> None:
+        self.status: dict[str, Any] = {
+            "latest_bq_m3": 10,
+            "uptime_minutes": 12409,
+            "display_unit": "pci/l",
+            "alarm_enabled": 1,
+            "alarm_level_bq_m3": 74.0,
+            "alarm_level_pci_l": 2.0,
+            "alarm_interval_minutes": 60,
+        }
+        self.history: dict[str, Any] = {"values_bq_m3": [37.0, 74.0], "values_pci_l": [1.0, 2.0]}
+        self.created: list[MagicMock] = []
+        self.by_address: dict[str, MagicMock] = {}  # last client created for address
+        self.delays: dict[str, float] = {}
+        self.failing: set[str] = set()
+        self.status_unchanged = False
+
+    def __call__(self, address_or_ble_device: Any, **kwargs: Any) -> MagicMock:
+        address = getattr(address_or_ble_device, "address", address_or_ble_device)
+
+        client = MagicMock()
+        client.address = address
+        client.is_connected = False
+        client.status_unchanged = self.status_unchanged
+
+        def connect():
+            client.is_connected = True
+
+        async def read() -> None:
+            await asyncio.sleep(self.delays.get(address, 0))
+            if address in self.failing:
+                raise TimeoutError()
+
+        async def status() -> dict[str, Any]:
+            await read()
+            return self.status
+
+        async def history(**kwargs: Any) -> dict[str, Any]:
+            await read()
+            return self.history
+
+        client.connect = AsyncMock(side_effect=connect)
+        client.disconnect = AsyncMock()
+        client.status = AsyncMock(side_effect=status)
+        client.history = AsyncMock(side_effect=history)
+        client.beep = AsyncMock(return_value=None)
+        client.set_alarm = AsyncMock(return_value=None)
+        client.set_unit = AsyncMock(return_value=None)
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=None)
+
+        self.created.append(client)
+        self.by_address[address] = client
+        return client
+
+
+@pytest.fixture
+def fake_clients() -> FakeClients:
+    return FakeClients()
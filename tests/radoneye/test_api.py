@@ -0,0 +1,127 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from radoneye.api import ApiOutput
+from radoneye.httpserver import HttpRequest
+from radoneye.output import RadonEyeEvent
+
+fake_status: Any = {"latest_bq_m3": 10, "uptime_minutes": 12409}
+fake_history: Any = {"values_bq_m3": [37.0, 74.0], "values_pci_l": [1.0, 2.0]}
+
+
+def event(event_type: Any, address: str, data: Any, time: float = 1700000000.0) -> RadonEyeEvent:
+    return {"type": event_type, "address": address, "name": "basement", "time": time, "data": data}
+
+
+def get(api: ApiOutput, path: str, etag: str | None = None):
+    headers = {"if-none-match": etag} if etag is not None else {}
+    return api.handle(HttpRequest("GET", path, headers))
+
+
+@pytest.mark.asyncio
+async def test_device_status_and_history():
+    api = ApiOutput("127.0.0.1:0")
+    await api.emit(event("status", "AA:BB", fake_status))
+    await api.emit(event("history", "AA:BB", fake_history))
+
+    response = get(api, "/devices/AA:BB/status")
+    assert response.status == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert json.loads(response.body) == {
+        "address": "AA:BB",
+        "name": "basement",
+        "time": 1700000000.0,
+        "status": fake_status,
+    }
+
+    # url encoded address resolves to the same resource
+    assert get(api, "/devices/AA%3ABB/history").body == get(api, "/devices/AA:BB/history").body
+    assert json.loads(get(api, "/devices/AA:BB/history").body)["history"] == fake_history
+
+    assert json.loads(get(api, "/devices").body)["devices"][0]["status"] == fake_status
+    assert json.loads(get(api, "/devices/AA:BB").body)["history_time"] == 1700000000.0
+
+
+@pytest.mark.asyncio
+async def test_poll_updates_status_time():
+    api = ApiOutput("127.0.0.1:0")
+    await api.emit(event("status", "AA:BB", fake_status))
+    response = get(api, "/devices/AA:BB/status")
+
+    # status is the same, but it was read again
+    await api.emit(event("poll", "AA:BB", None, time=1700000060.0))
+
+    assert get(api, "/devices/AA:BB/status").headers["ETag"] != response.headers["ETag"]
+    assert json.loads(get(api, "/devices/AA:BB/status").body) == {
+        "address": "AA:BB",
+        "name": "basement",
+        "time": 1700000060.0,
+        "status": fake_status,
+    }
+
+
+@pytest.mark.asyncio
+async def test_not_found():
+    api = ApiOutput("127.0.0.1:0")
+    await api.emit(event("error", "AA:BB", "TimeoutError"))
+    assert get(api, "/unknown").status == 404
+    assert get(api, "/devices/CC:DD").status == 404
+    assert get(api, "/devices/AA:BB/status").status == 404
+    assert json.loads(get(api, "/devices/AA:BB").body)["error"] == "TimeoutError"
+
+
+@pytest.mark.asyncio
+async def test_response_reused_until_data_changes():
+    api = ApiOutput("127.0.0.1:0")
+    await api.emit(event("status", "AA:BB", fake_status))
+    await api.emit(event("status", "CC:DD", fake_status))
+
+    response = get(api, "/devices/AA:BB/status")
+    fleet = get(api, "/devices")
+    assert get(api, "/devices/AA:BB/status") is response
+
+    await api.emit(event("status", "CC:DD", fake_status))
+    assert get(api, "/devices/AA:BB/status") is response
+    assert get(api, "/devices") is not fleet
+
+    await api.emit(event("status", "AA:BB", fake_status))
+    assert get(api, "/devices/AA:BB/status") is not response
+
+
+@pytest.mark.asyncio
+async def test_conditional_request():
+    api = ApiOutput("127.0.0.1:0")
+    await api.emit(event("status", "AA:BB", fake_status))
+
+    etag = get(api, "/devices/AA:BB/status").headers["ETag"]
+    response = get(api, "/devices/AA:BB/status", etag)
+    assert response.status == 304
+    assert response.body == b""
+    assert get(api, "/devices/AA:BB/status", f'"other", {etag}').status == 304
+
+    await api.emit(event("status", "AA:BB", fake_status, time=1700000600.0))
+    assert get(api, "/devices/AA:BB/status", etag).status == 200
+
+
+@pytest.mark.asyncio
+async def test_http_server():
+    api = ApiOutput("127.0.0.1:0")
+    await api.start()
+    try:
+        await api.emit(event("status", "AA:BB", fake_status))
+        assert api.server is not None and api.server.port is not None
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", api.server.port)
+        # keep-alive: two requests over one connection
+        for _ in range(2):
+            writer.write(b"GET /devices/AA:BB/status HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 200 OK")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            assert json.loads(await reader.readexactly(length))["status"] == fake_status
+        writer.close()
+    finally:
+        await api.close()
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import json
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from radoneye.batch import RadonEyeBatch
+from radoneye.pool import RadonEyeConnectionPool
+from tests.radoneye.conftest import FakeClients
+
+
+async def lines_of(commands: list[Any]):
+    for command in commands:
+        yield command if isinstance(command, str) else json.dumps(command) + "\n"
+
+
+async def run_batch(fake_clients: FakeClients, commands: list[Any], concurrency: int = 4):
+    output = io.StringIO()
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        batch = RadonEyeBatch(RadonEyeConnectionPool(), output, concurrency=concurrency)
+        failed = await batch.run(lines_of(commands))
+    return failed, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_commands(fake_clients: FakeClients):
+    failed, results = await run_batch(
+        fake_clients,
+        [
+            {"id": "a", "command": "status", "address": "addr1"},
+            {"id": "b", "command": "history", "address": "addr1"},
+            {"id": "c", "command": "beep", "address": "addr1"},
+            {"id": "d", "command": "unit", "address": "addr1", "unit": "bq/m3"},
+            {"id": "e", "command": "alarm", "address": "addr1", "interval": 10},
+        ],
+        concurrency=1,
+    )
+
+    assert failed == 0
+    assert {result["id"]: result["result"] for result in results} == {
+        "a": fake_clients.status,
+        "b": fake_clients.history,
+        "c": None,
+        "d": "bq/m3",
+        "e": {
+            "alarm_enabled": True,
+            "alarm_level_bq_m3": 74.0,
+            "alarm_level_pci_l": 2.0,
+            "alarm_interval_minutes": 10,
+        },
+    }
+    # connection to the device is reused by all commands and closed at the end
+    (client,) = fake_clients.created
+    client.connect.assert_called_once_with()
+    client.disconnect.assert_called_once_with()
+    client.set_unit.assert_called_once_with("bq/m3")
+    client.set_alarm.assert_called_once_with(enabled=True, level=2.0, unit="pci/l", interval=10)
+
+
+@pytest.mark.asyncio
+async def test_errors_are_reported_per_line(fake_clients: FakeClients):
+    failed, results = await run_batch(
+        fake_clients,
+        [
+            "not json\n",
+            "\n",
+            {"command": "status"},
+            {"command": "reboot", "address": "addr1"},
+            {"command": "status", "address": "addr1"},
+        ],
+    )
+
+    assert failed == 3
+    results.sort(key=lambda result: result["id"])
+    assert [(result["id"], result["ok"]) for result in results] == [
+        (1, False),
+        (3, False),
+        (4, False),
+        (5, True),
+    ]
+    assert results[2]["error"] == "Unsupported command: reboot"
+
+
+@pytest.mark.asyncio
+async def test_results_are_streamed_in_completion_order(fake_clients: FakeClients):
+    # 3 devices in parallel take about as long as 1 device
+    fake_clients.delays = {f"addr{i}": 0.2 for i in range(3)}
+    start = asyncio.get_running_loop().time()
+    _, results = await run_batch(
+        fake_clients,
+        [{"command": "status", "address": f"addr{i}"} for i in range(3)] + ["{}\n"],
+        concurrency=4,
+    )
+
+    assert asyncio.get_running_loop().time() - start < 0.5
+    assert results[0]["ok"] is False  # invalid line fails immediately, before slow reads
+    assert sorted(result["address"] for result in results[1:]) == ["addr0", "addr1", "addr2"]
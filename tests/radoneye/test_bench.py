@@ -0,0 +1,68 @@
+import json
+from typing import Literal
+
+import pytest
+
+from radoneye.bench import format_bench, run_bench
+from radoneye.client import RadonEyeClient
+from radoneye.clock import VirtualClock, run_virtual
+from radoneye.simulator import SimulatedClient, SimulatedDevice
+
+
+def bench_simulated(version: Literal[1, 2], drop_rate: float = 0, history: bool = True):
+    clock = VirtualClock(start_time=1700000000)
+
+    async def main():
+        device = SimulatedDevice(version, uptime_minutes=30 * 24 * 60, clock=clock.monotonic)
+        link = SimulatedClient(
+            device, latency=0.03, jitter=0, connect_latency=0.5, drop_rate=drop_rate
+        )
+        return await run_bench(
+            lambda: RadonEyeClient("simulated", status_read_timeout=5, client=link, clock=clock),
+            "simulated",
+            iterations=3,
+            interval=10,
+            history=history,
+            clock=clock,
+        )
+
+    return run_virtual(main())
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_bench(version: Literal[1, 2]):
+    report = bench_simulated(version)
+
+    assert report["interface"] == version
+    assert [result["error"] for result in report["iterations"]] == [None, None, None]
+    assert report["stats"]["connect"]["p50"] == pytest.approx(0.5)
+    assert report["stats"]["history"]["count"] == 3
+    assert report["stats"]["first_notification"]["p50"] == pytest.approx(0.03)
+    # simulated link sends the whole history at once
+    assert report["stats"]["notification_interval"]["max"] == pytest.approx(0)
+    if version == 2:
+        # 720 values in 3 pages (no status before history without progress), 2 intervals each
+        assert [result["notifications"] for result in report["iterations"]] == [3, 3, 3]
+        assert report["stats"]["notification_interval"]["count"] == 3 * 2
+
+
+def test_bench_errors():
+    report = bench_simulated(2, drop_rate=1, history=False)
+
+    assert [result["error"] for result in report["iterations"]] == ["status: TimeoutError"] * 3
+    assert set(report["stats"].keys()) == {"connect", "services", "disconnect"}
+
+
+def test_format_bench():
+    report = bench_simulated(2, history=False)
+
+    assert json.loads(format_bench(report, "json"))["interface"] == 2
+    text = format_bench(report, "text")
+    assert "model\tRD200N" in text
+    assert [line.split()[0] for line in text.splitlines()[8:]] == [
+        "connect",
+        "services",
+        "status",
+        "disconnect",
+        "total",
+    ]
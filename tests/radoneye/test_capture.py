@@ -0,0 +1,90 @@
+import io
+
+import pytest
+
+from radoneye.capture import (
+    CAPTURE_MAGIC,
+    KIND_NOTIFY,
+    KIND_SERVICE,
+    KIND_WRITE,
+    CaptureRecord,
+    CaptureWriter,
+    ReplayClient,
+    read_capture,
+)
+from radoneye.client import RadonEyeClient
+from radoneye.interface_v2 import (
+    CHAR_COMMAND,
+    CHAR_STATUS,
+    COMMAND_STATUS,
+    SERVICE_UUID,
+    parse_status,
+)
+
+# V2 status (0x40) message, see test_interface_v2.py
+msg_40 = bytes.fromhex(
+    "4042323230313033525532303338330652443230304e56322e302e3200014a00"
+    "060a00080000000300010079300000e01108001c00020000003822005c8f423f"
+    "a4709d3f"
+)
+
+
+def status_capture() -> bytes:
+    stream = io.BytesIO()
+    writer = CaptureWriter(stream)
+    writer.service(SERVICE_UUID)
+    writer.write(CHAR_COMMAND, bytes([COMMAND_STATUS]))
+    writer.notify(CHAR_STATUS, msg_40)
+    return stream.getvalue()
+
+
+def test_read_capture():
+    data = status_capture()
+    assert data.startswith(CAPTURE_MAGIC)
+
+    records = list(read_capture(data))
+    assert [(record.kind, record.uuid, record.data) for record in records] == [
+        (KIND_SERVICE, SERVICE_UUID, SERVICE_UUID.encode()),
+        (KIND_WRITE, CHAR_COMMAND, bytes([COMMAND_STATUS])),
+        (KIND_NOTIFY, CHAR_STATUS, msg_40),
+    ]
+    assert records[0].time <= records[1].time <= records[2].time
+
+
+def test_read_capture_errors():
+    with pytest.raises(ValueError, match="Not a capture file"):
+        list(read_capture(b"garbage"))
+    with pytest.raises(ValueError, match="Truncated"):
+        list(read_capture(status_capture()[:-1]))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("speed", [0, 1000])
+async def test_replay_status(speed: float):
+    replay = ReplayClient(list(read_capture(status_capture())), speed=speed)
+
+    async with RadonEyeClient("replay", client=replay) as client:
+        assert await client.status() == parse_status(bytearray(msg_40))
+
+
+@pytest.mark.asyncio
+async def test_capture_replayed_status():
+    # capturing replayed session produces the same records again
+    replay = ReplayClient(list(read_capture(status_capture())), speed=0)
+    stream = io.BytesIO()
+
+    async with RadonEyeClient("replay", client=replay, capture=stream) as client:
+        await client.status()
+
+    records = list(read_capture(stream.getvalue()))
+    assert [(record.kind, record.uuid, record.data) for record in records] == [
+        (record.kind, record.uuid, record.data) for record in read_capture(status_capture())
+    ]
+
+
+@pytest.mark.asyncio
+async def test_replay_unexpected_write():
+    replay = ReplayClient([CaptureRecord(KIND_WRITE, CHAR_COMMAND, 0.0, b"\x40")], speed=0)
+
+    with pytest.raises(ValueError, match="Unexpected write"):
+        await replay.write_gatt_char(CHAR_COMMAND, bytearray([0xA1]))
@@ -1,3 +1,10 @@
+import asyncio
+import logging
+import os
+import stat
+import sys
+from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -6,7 +13,17 @@ from inline_snapshot import snapshot
 
 from radoneye.cli import main
 from radoneye.model import OutputType
+from radoneye.remote import RadonEyeRemoteClient, RadonEyeSocketServer
 from radoneye.util import serialize_object, to_bq_m3, to_pci_l
+from tests.radoneye.conftest import FakeClients
+
+
+@pytest.fixture(autouse=True)
+def socket_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> str:
+    # running daemon of the developer must not receive commands from tests
+    path = str(tmp_path / "radoneye.sock")
+    monkeypatch.setenv("RADONEYE_SOCKET", path)
+    return path
 
 
 @patch("radoneye.cli.RadonEyeClient")
@@ -467,6 +484,81 @@ async def test_get_history(
         assert out_content == serialize_object(fake_history, output)
 
 
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+async def test_get_history_csv(RadonEyeClient: AsyncMock, capsys: pytest.CaptureFixture[str]):
+    radoneye_client = RadonEyeClient.return_value.__aenter__.return_value
+    radoneye_client.history.return_value = {
+        "values_bq_m3": [37.0, 74.0],
+        "values_pci_l": [1.0, 2.0],
+    }
+
+    await main(["radoneye", "history", "address", "--output", "csv"])
+
+    assert capsys.readouterr().out.splitlines() == ["index,bq_m3,pci_l", "1,37.0,1.0", "2,74.0,2.0"]
+
+
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+async def test_status_multiple_addresses(
+    RadonEyeClient: AsyncMock,
+    capsys: pytest.CaptureFixture[str],
+    fake_clients: FakeClients,
+):
+    fake_clients.delays = {"addr1": 0.1}
+    RadonEyeClient.side_effect = fake_clients
+
+    await main(["radoneye", "status", "addr1", "addr2", "--output", "json"])
+
+    # streamed in completion order, not in input order
+    assert capsys.readouterr().out.splitlines() == [
+        serialize_object({"address": address, "status": fake_clients.status}, "json")
+        for address in ["addr2", "addr1"]
+    ]
+
+
+@patch("radoneye.cli.RadonEyeScanner.discover")
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+async def test_history_all(
+    RadonEyeClient: AsyncMock,
+    discover_mock: AsyncMock,
+    capsys: pytest.CaptureFixture[str],
+    fake_clients: FakeClients,
+):
+    dev = BLEDevice("addr2", "FR:RU22201030383", None)
+    discover_mock.return_value = [dev]
+    fake_clients.delays = {"addr1": 0.1}
+    fake_clients.failing = {"fail"}
+    RadonEyeClient.side_effect = fake_clients
+
+    with pytest.raises(SystemExit):
+        await main(["radoneye", "history", "--all", "addr1", "fail", "--concurrency", "1"])
+
+    discover_mock.assert_called_once_with(adapter=None, timeout=30)
+    # discovered device is passed to the client as is, without address lookup
+    assert [call.args[0] for call in RadonEyeClient.call_args_list] == ["addr1", "fail", dev]
+
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "address\t#\tBq/m3\tpCi/L",
+        "addr1\t1\t37.0\t1.0",
+        "addr1\t2\t74.0\t2.0",
+        "addr2\t1\t37.0\t1.0",
+        "addr2\t2\t74.0\t2.0",
+    ]
+    assert captured.err.splitlines() == ["fail\terror\tTimeoutError"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", [["status", "addr1"], ["history", "addr1"], ["batch"]])
+async def test_invalid_concurrency(args: list[str], capsys: pytest.CaptureFixture[str]):
+    with pytest.raises(SystemExit):
+        await main(["radoneye", *args, "--concurrency", "0"])
+
+    assert "must be a positive integer: 0" in capsys.readouterr().err
+
+
 @patch("radoneye.cli.RadonEyeScanner.discover")
 @pytest.mark.asyncio
 @pytest.mark.parametrize("output", ["text", "json"])
@@ -500,3 +592,186 @@ async def test_list(
             ],
             output,
         )
+
+
+@patch("radoneye.daemon.RadonEyeDaemon")
+@pytest.mark.asyncio
+async def test_daemon(RadonEyeDaemon: AsyncMock):
+    RadonEyeDaemon.return_value.run = AsyncMock()
+
+    await main(["radoneye", "--socket", "radoneye.sock", "daemon", "--config", "inventory.json"])
+
+    RadonEyeDaemon.assert_called_once_with(
+        "inventory.json", adapter=None, debug=False, socket_path="radoneye.sock"
+    )
+    RadonEyeDaemon.return_value.run.assert_called_once_with()
+
+
+@patch("radoneye.cli.RadonEyeConnectionPool")
+@patch("radoneye.cli.RadonEyeBatch")
+@pytest.mark.asyncio
+async def test_batch(RadonEyeBatch: AsyncMock, RadonEyeConnectionPool: AsyncMock):
+    RadonEyeBatch.return_value.run = AsyncMock(return_value=1)
+
+    with pytest.raises(SystemExit):
+        await main(["radoneye", "--socket", "radoneye.sock", "batch", "--concurrency", "2"])
+
+    RadonEyeConnectionPool.assert_called_once_with(
+        connect_timeout=30,
+        status_read_timeout=5,
+        history_read_timeout=60,
+        adapter=None,
+        debug=False,
+        max_connections=2,
+    )
+    RadonEyeBatch.assert_called_once_with(
+        RadonEyeConnectionPool.return_value,
+        sys.stdout,
+        concurrency=2,
+        socket_path="radoneye.sock",
+    )
+
+
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+async def test_status_forwarded_to_daemon(
+    RadonEyeClient: AsyncMock,
+    capsys: pytest.CaptureFixture[str],
+    tmp_path: Path,
+):
+    requests: list[dict[str, Any]] = []
+
+    async def handler(request: dict[str, Any]):
+        requests.append(request)
+        return {"display_unit": "pci/l"}
+
+    server = RadonEyeSocketServer(str(tmp_path / "radoneye.sock"), handler)
+    await server.start()
+    try:
+        await main(
+            [
+                "radoneye",
+                "--socket",
+                str(tmp_path / "radoneye.sock"),
+                "status",
+                "address",
+                "--max-age",
+                "60",
+                "--output",
+                "json",
+            ]
+        )
+    finally:
+        await server.close()
+
+    RadonEyeClient.assert_not_called()
+    assert requests == [{"command": "status", "address": "address", "max_age": 60.0}]
+    assert capsys.readouterr().out.rstrip() == serialize_object({"display_unit": "pci/l"}, "json")
+
+
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+@pytest.mark.parametrize("option", [["--debug"], ["--adapter", "1"]])
+async def test_daemon_not_used_with_direct_options(
+    RadonEyeClient: AsyncMock, socket_path: str, option: list[str]
+):
+    radoneye_client = RadonEyeClient.return_value.__aenter__.return_value
+    radoneye_client.status.return_value = {"display_unit": "pci/l"}
+    requests: list[dict[str, Any]] = []
+
+    async def handler(request: dict[str, Any]):
+        requests.append(request)
+
+    server = RadonEyeSocketServer(socket_path, handler)
+    await server.start()
+    level = logging.getLogger("radoneye").level
+    try:
+        await main(["radoneye", *option, "unit", "address"])
+    finally:
+        logging.getLogger("radoneye").setLevel(level)  # --debug enables message dumps globally
+        await server.close()
+
+    assert requests == []
+    radoneye_client.status.assert_called_once_with()
+
+
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+async def test_foreign_daemon_socket_ignored(RadonEyeClient: AsyncMock, socket_path: str):
+    radoneye_client = RadonEyeClient.return_value.__aenter__.return_value
+    radoneye_client.status.return_value = {"display_unit": "pci/l"}
+    requests: list[dict[str, Any]] = []
+
+    async def handler(request: dict[str, Any]):
+        requests.append(request)
+
+    server = RadonEyeSocketServer(socket_path, handler)
+    await server.start()
+    try:
+        with patch("radoneye.remote.os.getuid", return_value=os.getuid() + 1):
+            await main(["radoneye", "unit", "address"])
+    finally:
+        await server.close()
+
+    assert requests == []
+    radoneye_client.status.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_daemon_response_timeout(socket_path: str):
+    async def handler(request: dict[str, Any]):
+        await asyncio.Event().wait()
+
+    server = RadonEyeSocketServer(socket_path, handler)
+    await server.start()
+    try:
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        async with await RadonEyeRemoteClient.open(socket_path, "address", timeout=0.1) as client:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.status()
+    finally:
+        await server.close()
+
+
+@patch("radoneye.cli.RadonEyeClient")
+@pytest.mark.asyncio
+async def test_stale_daemon_socket_ignored(RadonEyeClient: AsyncMock, tmp_path: Path):
+    radoneye_client = RadonEyeClient.return_value.__aenter__.return_value
+    radoneye_client.status.return_value = {"display_unit": "pci/l"}
+
+    (tmp_path / "radoneye.sock").write_text("")
+    await main(["radoneye", "--socket", str(tmp_path / "radoneye.sock"), "unit", "address"])
+
+    radoneye_client.status.assert_called_once_with()
+
+
+@patch("radoneye.decode.decode_files")
+@pytest.mark.asyncio
+async def test_decode(decode_files: AsyncMock):
+    decode_files.return_value = 0
+
+    await main(["radoneye", "decode", "a.cap", "b.cap", "--output", "csv", "--jobs", "2"])
+
+    decode_files.assert_called_once_with(["a.cap", "b.cap"], "csv", sys.stdout, sys.stderr, jobs=2)
+
+
+@patch("radoneye.bench.run_bench")
+@pytest.mark.asyncio
+async def test_bench(run_bench: AsyncMock, capsys: pytest.CaptureFixture[str]):
+    run_bench.return_value = {
+        "address": "address",
+        "interface": 2,
+        "model": "RD200N",
+        "firmware_version": "V2.0.2",
+        "iterations": [{"iteration": 1, "timings": {}, "notifications": 0, "error": None}],
+        "stats": {},
+    }
+
+    await main(
+        ["radoneye", "bench", "address", "--iterations", "5", "--no-history", "--output", "json"]
+    )
+
+    _, address, iterations = run_bench.call_args.args
+    assert (address, iterations) == ("address", 5)
+    assert run_bench.call_args.kwargs["history"] is False
+    assert capsys.readouterr().out.rstrip() == serialize_object(run_bench.return_value, "json")
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from radoneye.client import RadonEyeClient
+from radoneye.clock import VirtualClock, run_virtual
+from radoneye.simulator import SimulatedClient, SimulatedDevice
+
+
+def test_virtual_sleep():
+    clock = VirtualClock(start_time=1700000000)
+
+    async def main():
+        await clock.sleep(24 * 3600)
+        return clock.monotonic(), clock.time()
+
+    assert run_virtual(main()) == (24 * 3600, 1700000000 + 24 * 3600)
+
+
+def test_virtual_timeout():
+    clock = VirtualClock()
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await clock.wait_for(asyncio.Event().wait(), 5)
+        return clock.monotonic()
+
+    assert run_virtual(main()) == 5
+
+
+def test_simulated_device_on_virtual_time():
+    clock = VirtualClock(start_time=1700000000)
+
+    async def main():
+        device = SimulatedDevice(version=2, uptime_minutes=60, clock=clock.monotonic)
+        link = SimulatedClient(device, seed=1)
+        async with RadonEyeClient("simulated", client=link, clock=clock) as client:
+            first = await client.status_raw()
+            await clock.sleep(3 * 3600)
+            status = await client.status()
+        return first, status
+
+    first, status = run_virtual(main())
+
+    assert first["frames"][0].time > 1700000000
+    assert status["uptime_minutes"] == 60 + 3 * 60
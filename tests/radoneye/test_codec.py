@@ -0,0 +1,53 @@
+import pytest
+
+from radoneye.codec import MessageField, MessageSpec
+from radoneye.interface_v1 import MSG_A8_SPEC
+from radoneye.util import read_float, read_short, read_str_wl
+
+
+def test_compiled_format():
+    spec = MessageSpec(
+        [
+            MessageField("peak", 12, "f"),
+            MessageField("counts", 4, "H"),
+            MessageField("command", 0, "B"),
+        ]
+    )
+
+    assert spec.struct.format == "<B3xH6xf"
+    assert spec.names == ("command", "counts", "peak")
+    assert spec.size == 16
+
+
+def test_overlapping_fields():
+    with pytest.raises(ValueError):
+        MessageSpec([MessageField("a", 0, "H"), MessageField("b", 1, "B")])
+
+
+def test_unpack_matches_field_readers():
+    data = bytearray(
+        b"\x50\x10\xe1\x7a\x14\x3f\xf6\x28\xbc\x3f\x00\x00\x00\x00\x01\x00\x04\x00\x00"
+    )
+    spec = MessageSpec([MessageField("latest", 2, "f"), MessageField("counts", 14, "H")])
+
+    assert spec.unpack(data) == (read_float(data, 2), read_short(data, 14))
+    assert spec.unpack_dict(data) == {"latest": read_float(data, 2), "counts": 1}
+
+
+def test_length_prefixed_string():
+    msg_a8 = bytearray(
+        b"\xa8\x06\x05\x52\x44\x32\x30\x30\x30\x32\x53\x4e\x30\x31\x35\x39\x08\x00\x00\x00"
+    )
+
+    assert MSG_A8_SPEC.unpack(msg_a8)[0].decode() == read_str_wl(msg_a8, 2) == "RD200"
+
+
+def test_pack():
+    spec = MessageSpec(
+        [
+            MessageField("command", 0, "B"),
+            MessageField("level", 3, "H"),
+        ]
+    )
+
+    assert spec.pack(command=0xAA, level=74) == bytearray(b"\xaa\x00\x00\x4a\x00")
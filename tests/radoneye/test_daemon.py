@@ -0,0 +1,293 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from radoneye.clock import VirtualClock, run_virtual
+from radoneye.daemon import RadonEyeDaemon, parse_inventory
+from radoneye.remote import open_remote_client
+from tests.radoneye.conftest import FakeClients
+
+
+def write_inventory(path: Path, devices: list[dict[str, Any]], output: Path):
+    path.write_text(
+        json.dumps({"devices": devices, "outputs": [{"type": "file", "path": str(output)}]})
+    )
+
+
+def read_events(path: Path) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def run_daemon_for(daemon: RadonEyeDaemon, seconds: float):
+    task = asyncio.create_task(daemon.run())
+    await asyncio.sleep(seconds)
+    daemon.stop()
+    await task
+
+
+def test_parse_inventory_defaults():
+    inventory = parse_inventory({"devices": [{"address": "addr1"}]})
+    assert inventory["devices"] == [
+        {
+            "address": "addr1",
+            "name": "addr1",
+            "poll_interval": 600,
+            "schedule": "interval",
+            "max_poll_interval": 3600,
+            "history_interval": None,
+        }
+    ]
+    assert inventory["outputs"] == [{"type": "stdout"}]
+    assert inventory["max_connections"] is None
+    assert inventory["max_reads_per_hour"] is None
+    assert inventory["history_retries"] == 2
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        [],
+        {"devices": [{"name": "no address"}]},
+        {"devices": [{"address": "addr1"}, {"address": "addr1"}]},
+        {"devices": [], "outputs": [{"type": "unknown"}]},
+        {"devices": [{"address": "addr1", "schedule": "unknown"}]},
+        {"devices": [], "max_reads_per_hour": 0},
+        {"devices": [], "max_connections": 0},
+        {"devices": [], "history_retries": -1},
+        {"devices": [], "retry_interval": 0},
+        {"devices": [{"address": "addr1", "poll_interval": 0}]},
+        {"devices": [{"address": "addr1", "max_poll_interval": -600}]},
+        {"devices": [{"address": "addr1", "history_interval": -5}]},
+        {"devices": [], "outputs": ["stdout"]},
+        {"devices": [], "outputs": [{"type": "file"}]},
+        {"devices": [], "outputs": [{"type": "api"}]},
+        {"devices": [], "outputs": [{"type": "prometheus"}]},
+    ],
+)
+def test_parse_inventory_invalid(obj: Any):
+    with pytest.raises(ValueError):
+        parse_inventory(obj)
+
+
+def test_daemon_polls_devices(tmp_path: Path, fake_clients: FakeClients):
+    fake_clients.failing.add("addr2")
+    write_inventory(
+        tmp_path / "inventory.json",
+        [
+            {
+                "address": "addr1",
+                "name": "basement",
+                "poll_interval": 600,
+                "history_interval": 3600,
+            },
+            {"address": "addr2", "poll_interval": 600},
+        ],
+        tmp_path / "events.ndjson",
+    )
+
+    daemon = RadonEyeDaemon(str(tmp_path / "inventory.json"), clock=VirtualClock())
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        run_virtual(run_daemon_for(daemon, 1530))
+
+    events = read_events(tmp_path / "events.ndjson")
+    addr1_events = [(e["time"], e["type"], e["name"]) for e in events if e["address"] == "addr1"]
+    addr2_events = [(e["time"], e["type"]) for e in events if e["address"] == "addr2"]
+
+    assert addr1_events == [
+        (0, "status", "basement"),
+        (0, "history", "basement"),
+        (600, "status", "basement"),
+        (1200, "status", "basement"),
+    ]
+    # failed polls are retried after retry_interval
+    assert addr2_events == [(time, "error") for time in range(0, 1530, 60)]
+
+    # connection is reused between polls and closed on shutdown
+    fake_clients.by_address["addr1"].connect.assert_called_once_with()
+    fake_clients.by_address["addr1"].disconnect.assert_called_once_with()
+    fake_clients.by_address["addr1"].history.assert_called_once_with(retries=2)
+    assert events[0]["data"] == fake_clients.status
+
+
+def test_daemon_skips_unchanged_status(tmp_path: Path, fake_clients: FakeClients):
+    fake_clients.status_unchanged = True  # every read after the first one returns the same frames
+    write_inventory(
+        tmp_path / "inventory.json",
+        [{"address": "addr1", "poll_interval": 600}],
+        tmp_path / "events.ndjson",
+    )
+
+    daemon = RadonEyeDaemon(str(tmp_path / "inventory.json"), clock=VirtualClock())
+    emit = daemon.emit
+    emitted: list[str] = []
+
+    async def record_emit(event: Any) -> None:
+        emitted.append(event["type"])
+        await emit(event)
+
+    daemon.emit = record_emit  # type: ignore
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        run_virtual(run_daemon_for(daemon, 1530))
+
+    assert fake_clients.by_address["addr1"].status.call_count == 3
+    assert [e["type"] for e in read_events(tmp_path / "events.ndjson")] == ["status"]
+    # repeated polls are still recorded (for metrics and API)
+    assert emitted == ["status", "poll", "poll"]
+
+
+def test_daemon_reload(tmp_path: Path, fake_clients: FakeClients):
+    inventory_path = tmp_path / "inventory.json"
+    events_path = tmp_path / "events.ndjson"
+    write_inventory(inventory_path, [{"address": "addr1", "poll_interval": 600}], events_path)
+    daemon = RadonEyeDaemon(str(inventory_path), clock=VirtualClock())
+
+    async def main():
+        task = asyncio.create_task(daemon.run())
+        await asyncio.sleep(300)
+
+        write_inventory(inventory_path, [{"address": "addr2", "poll_interval": 600}], events_path)
+        await daemon.reload_inventory()
+        assert list(daemon.tasks.keys()) == ["addr2"]
+
+        # broken inventory keeps previous configuration running
+        inventory_path.write_text("{")
+        await daemon.reload_inventory()
+        assert list(daemon.tasks.keys()) == ["addr2"]
+
+        await asyncio.sleep(300)
+        daemon.stop()
+        await task
+
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        run_virtual(main())
+
+    assert [(e["time"], e["address"]) for e in read_events(events_path)] == [
+        (0, "addr1"),
+        (300, "addr2"),
+    ]
+
+
+def test_daemon_reload_output_fails(tmp_path: Path, fake_clients: FakeClients):
+    inventory_path = tmp_path / "inventory.json"
+    events_path = tmp_path / "events.ndjson"
+    write_inventory(inventory_path, [{"address": "addr1", "poll_interval": 600}], events_path)
+    daemon = RadonEyeDaemon(str(inventory_path), clock=VirtualClock())
+
+    async def main():
+        task = asyncio.create_task(daemon.run())
+        await asyncio.sleep(300)
+        inventory = daemon.inventory
+
+        # file output is replaced by exporter that can't listen
+        inventory_path.write_text(
+            json.dumps(
+                {
+                    "devices": [{"address": "addr2", "poll_interval": 600}],
+                    "outputs": [{"type": "prometheus", "listen": "127.0.0.1:9090"}],
+                }
+            )
+        )
+        with patch("radoneye.daemon.PrometheusOutput.start", side_effect=OSError("Address in use")):
+            await daemon.reload_inventory()
+        assert daemon.inventory is inventory
+        assert list(daemon.tasks.keys()) == ["addr1"]
+        assert len(daemon.outputs) == 1
+
+        await asyncio.sleep(600)
+        daemon.stop()
+        await task
+
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        run_virtual(main())
+
+    # file output is started again and keeps receiving events
+    assert [(e["time"], e["address"]) for e in read_events(events_path)] == [
+        (0, "addr1"),
+        (600, "addr1"),
+    ]
+
+
+def test_daemon_reload_signals(tmp_path: Path, fake_clients: FakeClients):
+    inventory_path = tmp_path / "inventory.json"
+    events_path = tmp_path / "events.ndjson"
+    write_inventory(inventory_path, [{"address": "addr1", "poll_interval": 600}], events_path)
+    daemon = RadonEyeDaemon(str(inventory_path), clock=VirtualClock())
+
+    async def main():
+        task = asyncio.create_task(daemon.run())
+        await asyncio.sleep(300)
+
+        # reloads triggered one after another are applied one at a time
+        write_inventory(inventory_path, [{"address": "addr2", "poll_interval": 600}], events_path)
+        daemon.reload()
+        daemon.reload()
+        assert len(daemon.reload_tasks) == 2
+        await asyncio.gather(*daemon.reload_tasks)
+        assert list(daemon.tasks.keys()) == ["addr2"]
+        assert list(daemon.pool.clients.keys()) == ["addr2"]  # type: ignore
+
+        # pending reload doesn't start devices again after shutdown
+        write_inventory(inventory_path, [{"address": "addr3", "poll_interval": 600}], events_path)
+        daemon.reload()
+        daemon.stop()
+        await task
+
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        run_virtual(main())
+
+    assert daemon.tasks == {}
+    assert daemon.reload_tasks == set()
+
+
+def test_daemon_forwarded_requests(tmp_path: Path, fake_clients: FakeClients):
+    write_inventory(
+        tmp_path / "inventory.json",
+        [{"address": "addr1", "poll_interval": 600}],
+        tmp_path / "events.ndjson",
+    )
+    socket_path = str(tmp_path / "radoneye.sock")
+    daemon = RadonEyeDaemon(
+        str(tmp_path / "inventory.json"), socket_path=socket_path, clock=VirtualClock()
+    )
+
+    async def main():
+        task = asyncio.create_task(daemon.run())
+        await asyncio.sleep(60)
+        device = fake_clients.by_address["addr1"]
+
+        client = await open_remote_client(socket_path, "addr1", max_age=60)
+        assert client is not None
+        async with client:
+            # answered from status cached by polling
+            assert await client.status() == fake_clients.status
+            assert device.status.call_count == 1
+
+            await client.set_unit("bq/m3")
+            device.set_unit.assert_called_once_with("bq/m3")
+            assert await client.history() == fake_clients.history
+
+        client = await open_remote_client(socket_path, "addr1")
+        assert client is not None
+        async with client:
+            assert await client.status() == fake_clients.status
+            assert device.status.call_count == 2
+
+        # device not in inventory is disconnected after request
+        client = await open_remote_client(socket_path, "addr2")
+        assert client is not None
+        async with client:
+            assert await client.status() == fake_clients.status
+        assert list(daemon.pool.clients.keys()) == ["addr1"]  # type: ignore
+        fake_clients.by_address["addr2"].disconnect.assert_called_once_with()
+
+        daemon.stop()
+        await task
+
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        run_virtual(main())
+
+    assert not Path(socket_path).exists()
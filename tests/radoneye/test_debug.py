@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+
+from radoneye.client import RadonEyeClient
+from radoneye.debug import FrameLog, HexDump
+from radoneye.interface_v1 import InterfaceV1
+from radoneye.interface_v2 import InterfaceV2
+from radoneye.simulator import SimulatedClient, SimulatedDevice
+
+
+def test_hex_dump():
+    assert str(HexDump(b"@B220103RU20383\x06RD200N")) == (
+        "40 42 32 32 30 31 30 33 52 55 32 30 33 38 33 06 # @B220103RU20383.\n"
+        "   52 44 32 30 30 4e                               # RD200N"
+    )
+
+
+def test_frame_log(caplog: pytest.LogCaptureFixture):
+    frame_log = FrameLog("address", size=2)
+
+    with caplog.at_level(logging.DEBUG, logger="radoneye.debug"):
+        frame_log.record("->", bytearray(b"\x40"))
+    frame_log.record("<-", bytearray(b"\x41"))  # not emitted, but still kept
+    frame_log.record("<-", bytearray(b"\x42"))
+
+    (record,) = caplog.records
+    assert record.getMessage() == "address -> " + "40".ljust(48) + "# @"
+    # structured fields for handlers
+    fields = (record.address, record.direction, record.frame)  # type: ignore
+    assert fields == ("address", "->", b"\x40")
+    assert [frame.data for frame in frame_log.frames] == [b"\x41", b"\x42"]
+
+
+@pytest.mark.asyncio
+async def test_dump_on_error(caplog: pytest.LogCaptureFixture):
+    device = SimulatedDevice(version=2)
+    link = SimulatedClient(device, latency=0, jitter=0, connect_latency=0, drop_rate=1)
+
+    async with RadonEyeClient(
+        "simulated", status_read_timeout=0.1, client=link, debug=True
+    ) as client:
+        with pytest.raises(asyncio.TimeoutError):
+            await client.status()
+
+    (record,) = caplog.records
+    assert record.levelno == logging.WARNING
+    assert record.getMessage().startswith("simulated status failed: TimeoutError, recent frames:\n")
+    assert record.getMessage().endswith(" -> " + "40".ljust(48) + "# @")
+
+
+@pytest.mark.parametrize("InterfaceClass", [InterfaceV1, InterfaceV2])
+def test_interface_debug_flag(InterfaceClass: type[InterfaceV1] | type[InterfaceV2]):
+    # positional debug flag of older versions still enables frame log
+    interface = InterfaceClass(MagicMock(address="address"), 1, 1, True)
+
+    assert interface.frame_log is not None
+    assert interface.frame_log.address == "address"
+    assert InterfaceClass(MagicMock(), 1, 1, False).frame_log is None
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+from pathlib import Path
+
+from radoneye import interface_v1, interface_v2
+from radoneye.capture import CaptureWriter, read_capture
+from radoneye.decode import CSV_COLUMNS, assemble_reads, decode_file, decode_files
+
+# V2 status (0x40) message, see test_interface_v2.py
+msg_40 = bytes.fromhex(
+    "4042323230313033525532303338330652443230304e56322e302e3200014a00"
+    "060a00080000000300010079300000e01108001c00020000003822005c8f423f"
+    "a4709d3f"
+)
+
+# V2 history (0x41) messages, 2 pages with 2 values each
+msg_41 = [bytes.fromhex("41020102" "0a001400"), bytes.fromhex("41020202" "1e002800")]
+
+# V1 status messages, see test_interface_v1.py
+msg_v1 = [
+    b"\xa4\x0e\x32\x30\x32\x30\x31\x32\x30\x32\x53\x4e\x30\x31\x35\x39\x08\x00\x00\x00",
+    b"\xa8\x06\x05\x52\x44\x32\x30\x30\x30\x32\x53\x4e\x30\x31\x35\x39\x08\x00\x00\x00",
+    b"\xac\x07\x00\x01\x00\x00\x40\x40\x06\x32\x53\x4e\x30\x31\x35\x39\x08\x00\x00\x00",
+    b"\x50\x10\xe1\x7a\x14\x3f\xf6\x28\xbc\x3f\x00\x00\x00\x00\x01\x00\x04\x00\x00\x00",
+    b"\x51\x0e\x02\x00\xc1\x2d\x00\x00\x3e\x40\x08\x00\x50\xb1\x0c\x40\x04\x00\x00\x00",
+    b"\xaf\x07\x56\x31\x2e\x32\x2e\x34\x0a\x66\x66\x86\x3f\xb1\x0c\x40\x04\x00\x00\x00",
+    b"\xa6\x03\x52\x55\x32\x32\x2e\x34\x0a\x66\x66\x86\x3f\xb1\x0c\x40\x04\x00\x00\x00",
+]
+
+# V1 history size (2 values) and data
+msg_e8 = b"\xe8\x0b\x02\x00" + bytes(16)
+msg_e9 = bytes.fromhex("85 00 46 00")
+
+
+def write_capture(path: Path) -> None:
+    with open(path, "wb") as file:
+        writer = CaptureWriter(file)
+        writer.write(interface_v2.CHAR_COMMAND, bytes([interface_v2.COMMAND_STATUS]))
+        writer.notify(interface_v2.CHAR_STATUS, msg_40)
+        # history with progress reads status first
+        writer.write(interface_v2.CHAR_COMMAND, bytes([interface_v2.COMMAND_STATUS]))
+        writer.notify(interface_v2.CHAR_STATUS, msg_40)
+        writer.write(interface_v2.CHAR_COMMAND, bytes([interface_v2.COMMAND_HISTORY]))
+        for msg in msg_41:
+            writer.notify(interface_v2.CHAR_HISTORY, msg)
+        for msg in msg_v1:
+            writer.notify(interface_v1.CHAR_STATUS, msg)
+        writer.notify(interface_v1.CHAR_STATUS, msg_e8)
+        writer.notify(interface_v1.CHAR_HISTORY, msg_e9)
+
+
+def test_assemble_reads(tmp_path: Path):
+    write_capture(tmp_path / "session.cap")
+    reads = list(assemble_reads(read_capture((tmp_path / "session.cap").read_bytes())))
+
+    assert [(read_type, raw["interface"], len(raw["frames"])) for read_type, raw in reads] == [
+        ("status", 2, 1),
+        ("history", 2, 3),  # status with history size is part of history read
+        ("status", 1, 7),
+        ("history", 1, 2),
+    ]
+
+
+def test_decode_file_ndjson(tmp_path: Path):
+    path = str(tmp_path / "session.cap")
+    write_capture(tmp_path / "session.cap")
+
+    result = decode_file(path, "ndjson")
+
+    assert result.frames == 13
+    assert result.reads == 4
+    assert result.errors == []
+    rows = [json.loads(line) for line in result.text.splitlines()]
+    assert [row["type"] for row in rows] == ["status", "history", "status", "history"]
+    assert rows[0]["data"]["serial"] == "RU22201030383"
+    assert rows[1]["data"]["values_bq_m3"] == [10, 20, 30, 40]
+    assert rows[2]["data"]["serial"] == "RU22012020159"
+    assert len(rows[3]["data"]["values_bq_m3"]) == 2
+    assert rows[0]["offset"] <= rows[3]["offset"]
+
+
+def test_decode_files_csv(tmp_path: Path):
+    write_capture(tmp_path / "a.cap")
+    (tmp_path / "b.cap").write_bytes(b"garbage")
+    stream = io.StringIO()
+    log = io.StringIO()
+
+    failed = decode_files(
+        [str(tmp_path / "a.cap"), str(tmp_path / "b.cap")], "csv", stream, log, jobs=2
+    )
+
+    assert failed == 1
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert list(rows[0].keys()) == CSV_COLUMNS
+    assert [row["serial"] for row in rows] == ["RU22201030383", "RU22012020159"]
+    assert rows[0]["latest_bq_m3"] == "10.0"
+    assert "b.cap: Not a capture file" in log.getvalue()
+    assert "decoded 13 frames (4 reads)" in log.getvalue()
+
+
+def test_decode_file_bad_read(tmp_path: Path):
+    path = str(tmp_path / "session.cap")
+    with open(path, "wb") as file:
+        writer = CaptureWriter(file)
+        writer.notify(interface_v2.CHAR_STATUS, msg_40[:20])  # truncated
+        writer.notify(interface_v2.CHAR_STATUS, msg_40)
+
+    result = decode_file(path, "ndjson")
+
+    assert result.reads == 2
+    (error,) = result.errors
+    assert error.startswith(f"{path}: status at 0.000s: unpack_from requires a buffer")
+    (row,) = [json.loads(line) for line in result.text.splitlines()]
+    assert row["data"]["serial"] == "RU22201030383"
@@ -0,0 +1,193 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+from inline_snapshot import snapshot
+
+from radoneye.exporter import PrometheusOutput
+from radoneye.httpserver import parse_listen
+from radoneye.output import RadonEyeEvent
+
+fake_status: Any = {
+    "serial": "RU22201030383",
+    "model": "RD200N",
+    "firmware_version": "V2.0.2",
+    "latest_bq_m3": 10,
+    "latest_pci_l": 0.27,
+    "day_avg_bq_m3": 8,
+    "day_avg_pci_l": 0.22,
+    "month_avg_bq_m3": 0,
+    "month_avg_pci_l": 0.0,
+    "peak_bq_m3": 28,
+    "peak_pci_l": 0.76,
+    "counts_current": 3,
+    "counts_previous": 1,
+    "counts_str": "3/1",
+    "uptime_minutes": 12409,
+    "uptime_str": "8d14h49m",
+    "display_unit": "pci/l",
+    "alarm_enabled": 1,
+    "alarm_level_bq_m3": 74,
+    "alarm_level_pci_l": 2.0,
+    "alarm_interval_minutes": 60,
+}
+
+status_event: RadonEyeEvent = {
+    "type": "status",
+    "address": "addr1",
+    "name": 'base"ment',
+    "time": 1700000000.0,
+    "data": fake_status,
+}
+
+error_event: RadonEyeEvent = {
+    "type": "error",
+    "address": "addr2",
+    "name": "attic",
+    "time": 1700000001.0,
+    "data": "TimeoutError",
+}
+
+
+poll_event: RadonEyeEvent = {
+    "type": "poll",
+    "address": "addr1",
+    "name": 'base"ment',
+    "time": 1700000002.0,
+    "data": None,
+}
+
+
+async def http_get(port: int, path: str) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_parse_listen():
+    assert parse_listen("127.0.0.1:9546") == ("127.0.0.1", 9546)
+    assert parse_listen(":9546") == ("0.0.0.0", 9546)
+    assert parse_listen("[::1]:9546") == ("::1", 9546)
+    with pytest.raises(ValueError):
+        parse_listen("localhost")
+
+
+@pytest.mark.asyncio
+async def test_render():
+    output = PrometheusOutput()
+    await output.emit(status_event)
+    await output.emit(error_event)
+
+    assert output.render().decode() == snapshot("""\
+# HELP radoneye_info Device information
+# TYPE radoneye_info gauge
+radoneye_info{address="addr1",name="base\\"ment",serial="RU22201030383",model="RD200N",firmware_version="V2.0.2",display_unit="pci/l"} 1.0
+# HELP radoneye_latest_bq_m3 Latest radon level in Bq/m3
+# TYPE radoneye_latest_bq_m3 gauge
+radoneye_latest_bq_m3{address="addr1",name="base\\"ment"} 10.0
+# HELP radoneye_day_avg_bq_m3 Day average radon level in Bq/m3
+# TYPE radoneye_day_avg_bq_m3 gauge
+radoneye_day_avg_bq_m3{address="addr1",name="base\\"ment"} 8.0
+# HELP radoneye_month_avg_bq_m3 Month average radon level in Bq/m3
+# TYPE radoneye_month_avg_bq_m3 gauge
+radoneye_month_avg_bq_m3{address="addr1",name="base\\"ment"} 0.0
+# HELP radoneye_peak_bq_m3 Peak radon level in Bq/m3
+# TYPE radoneye_peak_bq_m3 gauge
+radoneye_peak_bq_m3{address="addr1",name="base\\"ment"} 28.0
+# HELP radoneye_counts_current Current raw particle count
+# TYPE radoneye_counts_current gauge
+radoneye_counts_current{address="addr1",name="base\\"ment"} 3.0
+# HELP radoneye_counts_previous Previous raw particle count
+# TYPE radoneye_counts_previous gauge
+radoneye_counts_previous{address="addr1",name="base\\"ment"} 1.0
+# HELP radoneye_uptime_minutes Device uptime in minutes
+# TYPE radoneye_uptime_minutes gauge
+radoneye_uptime_minutes{address="addr1",name="base\\"ment"} 12409.0
+# HELP radoneye_alarm_enabled Alarm enabled (1) or disabled (0)
+# TYPE radoneye_alarm_enabled gauge
+radoneye_alarm_enabled{address="addr1",name="base\\"ment"} 1.0
+# HELP radoneye_alarm_level_bq_m3 Alarm level in Bq/m3
+# TYPE radoneye_alarm_level_bq_m3 gauge
+radoneye_alarm_level_bq_m3{address="addr1",name="base\\"ment"} 74.0
+# HELP radoneye_alarm_interval_minutes Alarm interval in minutes
+# TYPE radoneye_alarm_interval_minutes gauge
+radoneye_alarm_interval_minutes{address="addr1",name="base\\"ment"} 60.0
+# HELP radoneye_up Last poll succeeded (1) or failed (0)
+# TYPE radoneye_up gauge
+radoneye_up{address="addr1",name="base\\"ment"} 1.0
+radoneye_up{address="addr2",name="attic"} 0.0
+# HELP radoneye_polls_total Number of polls
+# TYPE radoneye_polls_total counter
+radoneye_polls_total{address="addr1",name="base\\"ment"} 1.0
+radoneye_polls_total{address="addr2",name="attic"} 1.0
+# HELP radoneye_poll_errors_total Number of failed polls
+# TYPE radoneye_poll_errors_total counter
+radoneye_poll_errors_total{address="addr1",name="base\\"ment"} 0.0
+radoneye_poll_errors_total{address="addr2",name="attic"} 1.0
+# HELP radoneye_last_poll_timestamp_seconds Time of last poll
+# TYPE radoneye_last_poll_timestamp_seconds gauge
+radoneye_last_poll_timestamp_seconds{address="addr1",name="base\\"ment"} 1700000000.0
+radoneye_last_poll_timestamp_seconds{address="addr2",name="attic"} 1700000001.0
+# HELP radoneye_last_success_timestamp_seconds Time of last successful poll
+# TYPE radoneye_last_success_timestamp_seconds gauge
+radoneye_last_success_timestamp_seconds{address="addr1",name="base\\"ment"} 1700000000.0
+radoneye_last_success_timestamp_seconds{address="addr2",name="attic"} 0.0
+""")
+
+
+@pytest.mark.asyncio
+async def test_render_is_cached_until_update():
+    output = PrometheusOutput()
+    await output.emit(status_event)
+    body = output.render()
+    assert output.render() is body
+
+    await output.emit(error_event)
+    assert output.render() is not body
+
+
+@pytest.mark.asyncio
+async def test_poll_counts_as_success():
+    output = PrometheusOutput()
+    await output.emit(status_event)
+    await output.emit(poll_event)
+
+    body = output.render().decode()
+    labels = '{address="addr1",name="base\\"ment"}'
+    assert f"radoneye_polls_total{labels} 2.0" in body
+    assert f"radoneye_up{labels} 1.0" in body
+    assert f"radoneye_last_success_timestamp_seconds{labels} 1700000002.0" in body
+    # status is kept
+    assert f"radoneye_latest_bq_m3{labels} 10.0" in body
+
+
+@pytest.mark.asyncio
+async def test_textfile(tmp_path: Path):
+    textfile = tmp_path / "radoneye.prom"
+    output = PrometheusOutput(textfile=str(textfile))
+    await output.emit(status_event)
+    assert textfile.read_bytes() == output.render()
+    assert [p.name for p in tmp_path.iterdir()] == ["radoneye.prom"]
+
+
+@pytest.mark.asyncio
+async def test_http_server():
+    output = PrometheusOutput(listen="127.0.0.1:0")
+    await output.start()
+    try:
+        await output.emit(status_event)
+        assert output.server is not None and output.server.port is not None
+
+        response = await http_get(output.server.port, "/metrics")
+        head, body = response.split(b"\r\n\r\n", 1)
+        assert head.startswith(b"HTTP/1.1 200 OK")
+        assert b"Content-Type: text/plain; version=0.0.4" in head
+        assert body == output.render()
+
+        response = await http_get(output.server.port, "/other")
+        assert response.startswith(b"HTTP/1.1 404 Not Found")
+    finally:
+        await output.close()
@@ -0,0 +1,55 @@
+import io
+
+from inline_snapshot import snapshot
+
+from radoneye.history_writer import HistoryWriter
+from radoneye.model import RadonEyeHistory
+
+fake_history: RadonEyeHistory = {
+    "values_bq_m3": [37.0, 74.0, 111.0],
+    "values_pci_l": [1.0, 2.0, 3.0],
+}
+
+
+def test_csv():
+    stream = io.StringIO()
+    writer = HistoryWriter(stream, "csv", timestamps=True)
+    writer.write_header()
+    writer.write(fake_history, end_time=1700000000.0)
+
+    assert stream.getvalue() == snapshot(
+        "index,bq_m3,pci_l,time\r\n"
+        "1,37.0,1.0,2023-11-14T20:13:20Z\r\n"
+        "2,74.0,2.0,2023-11-14T21:13:20Z\r\n"
+        "3,111.0,3.0,2023-11-14T22:13:20Z\r\n"
+    )
+
+
+def test_ndjson_with_address():
+    stream = io.StringIO()
+    writer = HistoryWriter(stream, "ndjson", with_address=True)
+    writer.write_header()
+    writer.write(fake_history, address="AA:BB")
+
+    assert stream.getvalue() == snapshot(
+        '{"address":"AA:BB","index":1,"bq_m3":37.0,"pci_l":1.0}\n'
+        '{"address":"AA:BB","index":2,"bq_m3":74.0,"pci_l":2.0}\n'
+        '{"address":"AA:BB","index":3,"bq_m3":111.0,"pci_l":3.0}\n'
+    )
+
+
+def test_large_history_is_written_in_chunks():
+    count = 10000
+    history: RadonEyeHistory = {"values_bq_m3": [37.0] * count, "values_pci_l": [1.0] * count}
+    stream = io.StringIO()
+    writes: list[str] = []
+    stream.write = writes.append  # type: ignore
+
+    HistoryWriter(stream, "ndjson", timestamps=True).write(history, end_time=1700000000.0)
+
+    assert len(writes) == 3
+    lines = "".join(writes).splitlines()
+    assert len(lines) == count
+    assert lines[-1] == snapshot(
+        '{"index":10000,"bq_m3":37.0,"pci_l":1.0,"time":"2023-11-14T22:13:20Z"}'
+    )
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import pytest
+
+# cumulative import time budgets in microseconds, generous to not fail on slow machines, but still
+# far below what importing bleak with its platform backend takes
+IMPORT_BUDGETS = {
+    "radoneye": 100_000,
+    "radoneye.cli": 300_000,
+}
+
+
+def import_times(statement: str) -> dict[str, int]:
+    # -X importtime prints "import time: self [us] | cumulative | imported package" to stderr
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS.keys()))
+def test_import_does_not_load_bleak(module: str):
+    times = import_times(f"import {module}")
+    assert module in times
+    assert [name for name in times if name == "bleak" or name.startswith("bleak.")] == []
+    assert times[module] < IMPORT_BUDGETS[module]
+
+
+def test_lazy_attributes():
+    statement = (
+        "import sys, radoneye; radoneye.RadonEyeClient; radoneye.RadonEyeScanner; "
+        "print(sorted(name for name in sys.modules if name.split('.')[0] in ['radoneye', 'bleak']))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", statement], capture_output=True, text=True, check=True
+    )
+    # client module is loaded on attribute access, bleak is still loaded only on connect/scan
+    modules = result.stdout.strip()
+    assert "'radoneye.client'" in modules
+    assert "'radoneye.scanner'" in modules
+    assert "'bleak'" not in modules
@@ -18,11 +18,15 @@ from radoneye.interface_v1 import (
     COMMAND_STATUS_A6,
     COMMAND_STATUS_AF,
     COMMAND_STATUS_E8,
+    HistoryTransferV1,
     InterfaceV1,
     parse_history_data,
+    parse_history_frames,
     parse_history_size,
     parse_status,
+    parse_status_frames,
 )
+from radoneye.model import RadonEyeFrame
 
 # triggered by command 0x10
 msg_a4 = b"\xa4\x0e\x32\x30\x32\x30\x31\x32\x30\x32\x53\x4e\x30\x31\x35\x39\x08\x00\x00\x00"  # ??20201202SN0159????
@@ -188,6 +192,17 @@ async def test_retrieve_status(bleak_client: Any, radoneye_interface: InterfaceV
     )
 
 
+@pytest.mark.asyncio
+async def test_retrieve_status_unchanged(radoneye_interface: InterfaceV1):
+    first = await radoneye_interface.status()
+    assert not radoneye_interface.memo.unchanged
+
+    # device sends the same frames again, previous result is reused (as a copy)
+    second = await radoneye_interface.status()
+    assert second == first
+    assert radoneye_interface.memo.unchanged
+
+
 @pytest.mark.asyncio
 async def test_retrieve_history(bleak_client: Any, radoneye_interface: InterfaceV1):
     result = await radoneye_interface.history()
@@ -210,6 +225,74 @@ async def test_retrieve_history(bleak_client: Any, radoneye_interface: Interface
     assert result["values_pci_l"] == expected_result["values_pci_l"]
 
 
+def test_parse_status_frames():
+    # frames can come in any order
+    frames = [msg_af, msg_a6, msg_a4, msg_a8, msg_ac, msg_50, msg_51]
+    assert parse_status_frames(frames) == parse_status(
+        bytearray(msg_50),
+        bytearray(msg_51),
+        bytearray(msg_a4),
+        bytearray(msg_a6),
+        bytearray(msg_a8),
+        bytearray(msg_ac),
+        bytearray(msg_af),
+    )
+
+
+def test_parse_history_frames_empty():
+    msg_e8_empty = msg_e8[:2] + b"\x00\x00" + msg_e8[4:]
+    assert parse_history_frames([msg_e8_empty]) == {"values_bq_m3": [], "values_pci_l": []}
+
+
+@pytest.mark.asyncio
+async def test_retrieve_status_raw(radoneye_interface: InterfaceV1):
+    raw = await radoneye_interface.status_raw()
+
+    assert raw["interface"] == 1
+    # frames are ordered by message type, not by arrival
+    assert [frame.data for frame in raw["frames"]] == [
+        msg_50,
+        msg_51,
+        msg_a4,
+        msg_a6,
+        msg_a8,
+        msg_ac,
+        msg_af,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_retrieve_history_raw(radoneye_interface: InterfaceV1):
+    raw = await radoneye_interface.history_raw()
+
+    assert raw["interface"] == 1
+    assert [frame.data for frame in raw["frames"]] == [msg_e8, *msg_e9]
+
+
+def test_history_transfer():
+    transfer = HistoryTransferV1()
+    transfer.start()
+    transfer.add_size(RadonEyeFrame(0, msg_e8))
+    for chunk in msg_e9[:2]:
+        transfer.add(RadonEyeFrame(0, chunk))
+    assert not transfer.complete
+
+    # next attempt starts from the beginning, lost frame shifts data after it
+    transfer.start()
+    transfer.add_size(RadonEyeFrame(1, msg_e8))
+    for chunk in [msg_e9[0], *msg_e9[2:4]]:
+        transfer.add(RadonEyeFrame(1, chunk))
+    # it can't be told which attempt lost it, newer one wins
+    assert [frame.data for frame in transfer.frames()] == [msg_e8, msg_e9[0], *msg_e9[2:4]]
+
+    transfer.start()
+    transfer.add_size(RadonEyeFrame(2, msg_e8))
+    for chunk in msg_e9:
+        transfer.add(RadonEyeFrame(2, chunk))
+    assert transfer.complete
+    assert [frame.data for frame in transfer.frames()] == [msg_e8, *msg_e9]
+
+
 @pytest.mark.asyncio
 async def test_beep(bleak_client: Any, radoneye_interface: InterfaceV1):
     await radoneye_interface.beep()
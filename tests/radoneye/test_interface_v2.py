@@ -14,11 +14,15 @@ from radoneye.interface_v2 import (
     COMMAND_BEEP,
     COMMAND_HISTORY,
     COMMAND_STATUS,
+    HistoryTransferV2,
     InterfaceV2,
     merge_history,
+    parse_history_frames,
     parse_history_page,
+    parse_history_size,
     parse_status,
 )
+from radoneye.model import RadonEyeFrame
 
 # triggered by command 0x40
 msg_40_v2 = r"""
@@ -198,6 +202,42 @@ def test_merge_history():
     assert history["values_pci_l"] == expected_values_pci_l
 
 
+def test_parse_history_size():
+    assert parse_history_size(dump_to_bytearray(msg_40_v2)) == snapshot(8760)
+    assert parse_history_size(dump_to_bytearray(msg_40_v3)) == snapshot(75)
+
+
+def test_parse_history_frames_presized():
+    frames = [bytes(dump_to_bytearray(msg_40_v2)), *[bytes.fromhex(msg) for msg in msg_41]]
+    history = merge_history([parse_history_page(bytearray.fromhex(msg)) for msg in msg_41])
+
+    assert parse_history_frames(frames) == history
+    assert parse_history_frames(frames[1:]) == history  # archived without status message
+    # value can be recorded between status and history reads
+    pages = [parse_history_page(bytearray.fromhex(msg)) for msg in msg_41]
+    assert merge_history(pages, 8761) == history
+    assert merge_history(pages, 8759) == history
+
+
+def test_history_transfer():
+    frames = [RadonEyeFrame(0, bytes.fromhex(message)) for message in msg_41]
+    transfer = HistoryTransferV2()
+
+    # pages 10-19 are lost
+    transfer.start()
+    for frame in frames[:9] + frames[19:]:
+        transfer.add(frame)
+    assert transfer.ended and not transfer.complete
+    assert transfer.missing() == list(range(10, 20))
+
+    # next attempt gets pages in different order and some pages twice
+    transfer.start()
+    for frame in frames[19:5:-1] + frames[12:14]:
+        transfer.add(frame)
+    assert transfer.complete and not transfer.ended
+    assert transfer.frames() == frames
+
+
 @pytest.mark.asyncio
 async def test_retrieve_status(bleak_client: Any, radoneye_interface: InterfaceV2):
     result = await radoneye_interface.status()
@@ -212,14 +252,47 @@ async def test_retrieve_status(bleak_client: Any, radoneye_interface: InterfaceV
     assert result == parse_status(dump_to_bytearray(msg_40_v2))
 
 
+@pytest.mark.asyncio
+async def test_retrieve_status_unchanged(radoneye_interface: InterfaceV2):
+    first = await radoneye_interface.status()
+    assert not radoneye_interface.memo.unchanged
+
+    # device sends the same frames again, previous result is reused (as a copy)
+    second = await radoneye_interface.status()
+    assert second == first
+    assert radoneye_interface.memo.unchanged
+
+
 @pytest.mark.asyncio
 async def test_retrieve_history(bleak_client: Any, radoneye_interface: InterfaceV2):
     result = await radoneye_interface.history()
 
-    assert bleak_client.start_notify.mock_calls[0].args[0] == CHAR_HISTORY
-    assert bleak_client.stop_notify.mock_calls[0].args[0] == CHAR_HISTORY
+    # no status round trip without progress
+    assert [c.args[0] for c in bleak_client.start_notify.mock_calls] == [CHAR_HISTORY]
+    assert bleak_client.write_gatt_char.mock_calls == [
+        call(CHAR_COMMAND, bytearray([COMMAND_HISTORY])),
+    ]
+
+    pages = [parse_history_page(bytearray.fromhex(message)) for message in msg_41]
+    history = merge_history(pages)
+
+    assert result["values_bq_m3"] == history["values_bq_m3"]
+    assert result["values_pci_l"] == history["values_pci_l"]
+
+
+@pytest.mark.asyncio
+async def test_retrieve_history_progress(bleak_client: Any, radoneye_interface: InterfaceV2):
+    result = await radoneye_interface.history(progress=lambda progress: None)
+
+    # status is read first for history size
+    assert bleak_client.start_notify.mock_calls[0].args[0] == CHAR_STATUS
+    assert bleak_client.stop_notify.mock_calls[0].args[0] == CHAR_STATUS
+
+    assert bleak_client.start_notify.mock_calls[1].args[0] == CHAR_HISTORY
+    assert bleak_client.stop_notify.mock_calls[1].args[0] == CHAR_HISTORY
 
     assert bleak_client.write_gatt_char.mock_calls == [
+        call(CHAR_COMMAND, bytearray([COMMAND_STATUS])),
         call(CHAR_COMMAND, bytearray([COMMAND_HISTORY])),
     ]
 
@@ -230,6 +303,36 @@ async def test_retrieve_history(bleak_client: Any, radoneye_interface: Interface
     assert result["values_pci_l"] == history["values_pci_l"]
 
 
+@pytest.mark.asyncio
+async def test_retrieve_status_raw(radoneye_interface: InterfaceV2):
+    raw = await radoneye_interface.status_raw()
+
+    assert raw["interface"] == 2
+    assert [frame.data for frame in raw["frames"]] == [bytes(dump_to_bytearray(msg_40_v2))]
+    assert raw["frames"][0].time > 0
+
+
+@pytest.mark.asyncio
+async def test_retrieve_history_raw(radoneye_interface: InterfaceV2):
+    raw = await radoneye_interface.history_raw()
+
+    assert raw["interface"] == 2
+    assert [frame.data for frame in raw["frames"]] == [bytes.fromhex(msg) for msg in msg_41]
+    assert parse_history_frames([frame.data for frame in raw["frames"]]) == merge_history(
+        [parse_history_page(bytearray.fromhex(message)) for message in msg_41]
+    )
+
+    # with progress, status message with history size goes first
+    raw = await radoneye_interface.history_raw(progress=lambda progress: None)
+    assert [frame.data for frame in raw["frames"]] == [
+        bytes(dump_to_bytearray(msg_40_v2)),
+        *[bytes.fromhex(msg) for msg in msg_41],
+    ]
+    assert parse_history_frames([frame.data for frame in raw["frames"]]) == merge_history(
+        [parse_history_page(bytearray.fromhex(message)) for message in msg_41]
+    )
+
+
 @pytest.mark.asyncio
 async def test_beep(bleak_client: Any, radoneye_interface: InterfaceV2):
     await radoneye_interface.beep()
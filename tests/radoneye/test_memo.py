@@ -0,0 +1,27 @@
+from unittest.mock import MagicMock
+
+from radoneye.memo import FrameMemo
+
+
+def test_frame_memo():
+    memo = FrameMemo[dict[str, int]]()
+    parse = MagicMock(side_effect=[{"uptime_minutes": 1}, {"uptime_minutes": 2}])
+
+    first = memo.parse((b"\x40\x01",), parse)
+    assert not memo.unchanged
+
+    second = memo.parse((b"\x40\x01",), parse)
+    assert memo.unchanged
+    # every caller gets its own copy, modifying it doesn't change later results
+    assert second == first and second is not first
+    second["uptime_minutes"] = 0
+    assert memo.parse((b"\x40\x01",), parse) == first
+
+    assert memo.parse((b"\x40\x02",), parse) == {"uptime_minutes": 2}
+    assert not memo.unchanged
+
+    assert parse.call_count == 2
+    assert (memo.hits, memo.misses) == (2, 2)
+
+    memo.clear()
+    assert memo.result is None
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from radoneye.client import RadonEyeClient
+from radoneye.clock import VirtualClock, run_virtual
+from radoneye.observer import RadonEyeObserver, RadonEyeOperation, SpanObserver
+from radoneye.simulator import SimulatedClient, SimulatedDevice
+
+
+class RecordingObserver(RadonEyeObserver):
+    def __init__(self) -> None:
+        self.events: list[tuple[str, Any]] = []
+
+    def on_connect(self, address: str, duration: float, error: str | None) -> None:
+        self.events.append(("connect", (address, round(duration, 6), error)))
+
+    def on_detect(self, address: str, interface: int, duration: float) -> None:
+        self.events.append(("detect", (address, interface)))
+
+    def on_operation(self, address: str, operation: RadonEyeOperation) -> None:
+        self.events.append(("operation", operation))
+
+
+def observe_simulated(observer: RadonEyeObserver, drop_rate: float = 0) -> None:
+    clock = VirtualClock()
+
+    async def main():
+        device = SimulatedDevice(version=2, uptime_minutes=30 * 24 * 60, clock=clock.monotonic)
+        link = SimulatedClient(
+            device, latency=0.03, jitter=0, connect_latency=0.5, drop_rate=drop_rate
+        )
+        client = RadonEyeClient(
+            "simulated", status_read_timeout=1, client=link, clock=clock, observer=observer
+        )
+        async with client:
+            try:
+                await client.status()
+                await client.history()
+            except asyncio.TimeoutError:
+                pass
+
+    run_virtual(main())
+
+
+def test_observer():
+    observer = RecordingObserver()
+
+    observe_simulated(observer)
+
+    assert observer.events[:2] == [
+        ("connect", ("simulated", 0.5, None)),
+        ("detect", ("simulated", 2)),
+    ]
+    status, history = [event for kind, event in observer.events if kind == "operation"]
+    assert (status.name, status.interface, status.writes, status.frames) == ("status", 2, 1, 1)
+    assert status.first_notification == pytest.approx(0.03)
+    assert status.transfer == pytest.approx(0)
+    assert status.duration == pytest.approx(0.03)
+    assert (status.timeout, status.error) == (False, None)
+    # 720 values in pages of 250
+    assert (history.name, history.frames, history.bytes) == ("history", 3, 3 * 4 + 720 * 2)
+
+
+def test_observer_timeout():
+    observer = RecordingObserver()
+
+    observe_simulated(observer, drop_rate=1)
+
+    (status,) = [event for kind, event in observer.events if kind == "operation"]
+    assert (status.name, status.frames, status.timeout, status.error) == (
+        "status",
+        0,
+        True,
+        "TimeoutError",
+    )
+    assert status.first_notification is None
+    assert status.duration == pytest.approx(1)
+
+
+def test_failing_observer(caplog: pytest.LogCaptureFixture):
+    observer = RecordingObserver()
+    observer.on_operation = MagicMock(side_effect=RuntimeError("broken"))  # type: ignore
+
+    observe_simulated(observer)  # history is still read after status
+
+    assert observer.on_operation.call_count == 2
+    assert [record.getMessage() for record in caplog.records] == [
+        "Observer failed on status of simulated",
+        "Observer failed on history of simulated",
+    ]
+
+
+def test_failing_connect_observer(caplog: pytest.LogCaptureFixture):
+    observer = RecordingObserver()
+    observer.on_connect = MagicMock(side_effect=RuntimeError("broken"))  # type: ignore
+    observer.on_detect = MagicMock(side_effect=RuntimeError("broken"))  # type: ignore
+
+    observe_simulated(observer)  # connect and detection still succeed
+
+    observer.on_connect.assert_called_once()
+    observer.on_detect.assert_called_once()
+    assert [kind for kind, _ in observer.events] == ["operation", "operation"]
+    assert [record.getMessage() for record in caplog.records] == [
+        "Observer failed on connect of simulated",
+        "Observer failed on detect of simulated",
+    ]
+
+
+def test_span_observer():
+    tracer = MagicMock()
+    span = tracer.start_span.return_value
+
+    observe_simulated(SpanObserver(tracer), drop_rate=1)
+
+    assert [call.args[0] for call in tracer.start_span.call_args_list] == [
+        "radoneye.connect",
+        "radoneye.detect",
+        "radoneye.status",
+    ]
+    attributes = tracer.start_span.call_args.kwargs["attributes"]
+    assert attributes["radoneye.address"] == "simulated"
+    assert attributes["radoneye.timeout"] is True
+    assert "radoneye.first_notification" not in attributes  # None values are not valid attributes
+    span.set_attribute.assert_called_once_with("error.type", "TimeoutError")
+    assert span.end.call_count == 3
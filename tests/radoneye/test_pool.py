@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from radoneye.pool import RadonEyeConnectionPool
+from tests.radoneye.conftest import FakeClients
+
+
+@pytest.mark.asyncio
+async def test_max_connections_waits_for_busy_client(fake_clients: FakeClients):
+    pool = RadonEyeConnectionPool(max_connections=1)
+    busy = asyncio.Event()
+    done = asyncio.Event()
+
+    async def hold(address: str):
+        async with pool.acquire(address):
+            busy.set()
+            await done.wait()
+
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        holder = asyncio.create_task(hold("addr1"))
+        await busy.wait()
+
+        waiter = asyncio.create_task(hold("addr2"))
+        await asyncio.sleep(0.01)
+        # addr1 is in use, so addr2 waits instead of opening second connection
+        assert list(pool.clients.keys()) == ["addr1"]
+
+        done.set()
+        await asyncio.gather(holder, waiter)
+
+    # idle addr1 is evicted to make room for addr2
+    assert list(pool.clients.keys()) == ["addr2"]
+    fake_clients.by_address["addr1"].disconnect.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_operation_drops_client(fake_clients: FakeClients):
+    pool = RadonEyeConnectionPool()
+    fake_clients.delays = {"addr1": 60}
+
+    async def read():
+        async with pool.acquire("addr1") as client:
+            await client.status()
+
+    with patch("radoneye.pool.RadonEyeClient", side_effect=fake_clients):
+        task = asyncio.create_task(read())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # connection state is unknown after cancelled read
+    assert pool.clients == {}
+    fake_clients.by_address["addr1"].disconnect.assert_called_once_with()
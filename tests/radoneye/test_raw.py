@@ -0,0 +1,53 @@
+import pytest
+
+from radoneye.interface_v2 import parse_history_page, parse_status
+from radoneye.model import RadonEyeFrame, RadonEyeRawData
+from radoneye.raw import (
+    parse_history_batch,
+    parse_history_raw,
+    parse_status_batch,
+    parse_status_raw,
+)
+
+# V2 status (0x40) message, see test_interface_v2.py
+msg_40 = bytes.fromhex(
+    "4042323230313033525532303338330652443230304e56322e302e3200014a00"
+    "060a00080000000300010079300000e01108001c00020000003822005c8f423f"
+    "a4709d3f"
+)
+
+# V2 history (0x41) messages, 2 pages with 2 values each
+msg_41 = [bytes.fromhex("41020102" "0a001400"), bytes.fromhex("41020202" "1e002800")]
+
+
+def status_raw(time: float, data: bytes = msg_40) -> RadonEyeRawData:
+    return {"interface": 2, "frames": [RadonEyeFrame(time, data)]}
+
+
+def test_parse_status_raw():
+    assert parse_status_raw(status_raw(1000.0)) == parse_status(bytearray(msg_40))
+
+
+def test_parse_history_raw():
+    raw: RadonEyeRawData = {
+        "interface": 2,
+        "frames": [RadonEyeFrame(1000.0, msg_41[0]), RadonEyeFrame(1000.1, msg_41[1])],
+    }
+    history = parse_history_raw(raw)
+    assert history["values_bq_m3"] == [10, 20, 30, 40]
+    assert parse_history_batch([raw, raw]) == [history, history]
+    assert parse_history_page(bytearray(msg_41[0]))["values_bq_m3"] == (10, 20)
+
+
+def test_parse_status_batch():
+    batch = parse_status_batch([status_raw(1000.0), status_raw(1600.0)])
+    assert len(batch) == 2
+    assert list(batch.column("time")) == [1000.0, 1600.0]
+    assert batch.status(1) == parse_status(bytearray(msg_40))
+
+
+def test_parse_raw_errors():
+    with pytest.raises(ValueError, match="Unsupported interface version"):
+        parse_status_raw({"interface": 3, "frames": []})  # type: ignore
+    with pytest.raises(ValueError, match="No frames"):
+        parse_status_raw({"interface": 2, "frames": []})
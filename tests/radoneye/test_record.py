@@ -0,0 +1,102 @@
+import math
+import sys
+
+import pytest
+
+from radoneye.model import RadonEyeStatus
+from radoneye.record import StatusBatch, StatusRecord
+
+# parsed by InterfaceV2 (Bq/m3 integers, pCi/L computed from them)
+status_v2: RadonEyeStatus = {
+    "serial": "RU22201030383",
+    "model": "RD200N",
+    "firmware_version": "V2.0.2",
+    "latest_bq_m3": 10,
+    "latest_pci_l": 0.27,
+    "day_avg_bq_m3": 8,
+    "day_avg_pci_l": 0.22,
+    "month_avg_bq_m3": 0,
+    "month_avg_pci_l": 0.0,
+    "peak_bq_m3": 28,
+    "peak_pci_l": 0.76,
+    "counts_current": 3,
+    "counts_previous": 1,
+    "counts_str": "3/1",
+    "uptime_minutes": 12409,
+    "uptime_str": "8d14h49m",
+    "display_unit": "pci/l",
+    "alarm_enabled": True,
+    "alarm_level_bq_m3": 74,
+    "alarm_level_pci_l": 2.0,
+    "alarm_interval_minutes": 60,
+}
+
+# parsed by InterfaceV1 (pCi/L floats, Bq/m3 computed from them)
+status_v1: RadonEyeStatus = {
+    "serial": "RU22012020159",
+    "model": "RD200",
+    "firmware_version": "V1.2.4",
+    "latest_bq_m3": 21.0,
+    "latest_pci_l": 0.58,
+    "day_avg_bq_m3": 54.0,
+    "day_avg_pci_l": 1.47,
+    "month_avg_bq_m3": 0.0,
+    "month_avg_pci_l": 0.0,
+    "peak_bq_m3": 81.0,
+    "peak_pci_l": 2.2,
+    "counts_current": 1,
+    "counts_previous": 4,
+    "counts_str": "1/4",
+    "uptime_minutes": 11713,
+    "uptime_str": "8d03h13m",
+    "display_unit": "pci/l",
+    "alarm_enabled": True,
+    "alarm_level_bq_m3": 111.0,
+    "alarm_level_pci_l": 3.0,
+    "alarm_interval_minutes": 60,
+}
+
+
+def test_record_round_trip():
+    record = StatusRecord.from_status(status_v2)
+    assert record.pci_l is None  # computed on access
+    assert record.to_status() == status_v2
+    assert list(record.to_status().keys()) == list(status_v2.keys())
+
+    record = StatusRecord.from_status(status_v1)
+    assert record.pci_l == (0.58, 1.47, 0.0, 2.2, 3.0)  # can't be computed from Bq/m3
+    assert record.to_status() == status_v1
+
+
+def test_record_identity_strings_are_shared():
+    serial = "".join(["RU222", "01030383"])  # not interned literal
+    record1 = StatusRecord.from_status({**status_v2, "serial": serial})
+    record2 = StatusRecord.from_status({**status_v2, "serial": serial[:]})
+    assert record1.serial is record2.serial is sys.intern("RU22201030383")
+    assert record1 == record2
+    assert not hasattr(record1, "__dict__")
+    with pytest.raises(TypeError):
+        hash(record1)  # mutable, equal records can't be deduplicated by hash
+
+
+def test_batch_round_trip():
+    batch = StatusBatch()
+    batch.append(status_v2, time=1700000000.0)
+    batch.append(StatusRecord.from_status(status_v1))
+    batch.append({**status_v2, "uptime_minutes": 12419, "uptime_str": "8d14h59m"})
+
+    assert len(batch) == 3
+    assert list(batch) == [
+        status_v2,
+        status_v1,
+        {**status_v2, "uptime_minutes": 12419, "uptime_str": "8d14h59m"},
+    ]
+    assert isinstance(batch.status(0)["latest_bq_m3"], int)
+    assert isinstance(batch.status(1)["latest_bq_m3"], float)
+    assert batch.record(1) == StatusRecord.from_status(status_v1)
+
+    assert len(batch.identities) == 2  # same device is stored once
+    assert batch.column("uptime_minutes").tolist() == [12409, 11713, 12419]
+    assert batch.column("time")[0] == 1700000000.0
+    assert math.isnan(batch.column("time")[1])
+    assert batch.nbytes() < 3 * 128
@@ -0,0 +1,154 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from radoneye.schedule import (
+    AdaptiveSchedule,
+    AirtimeBudget,
+    CycleAlignedSchedule,
+    IntervalSchedule,
+)
+
+
+# device measurement is refreshed every 10 minutes since boot plus some offset
+def fake_status(now: float, boot: float, offset: float = 0) -> Any:
+    cycle_no = (now - boot - offset) // 600
+    return {
+        "uptime_minutes": int((now - boot) // 60),
+        "latest_bq_m3": cycle_no,
+        "counts_current": 0,
+        "counts_previous": 0,
+    }
+
+
+def test_interval_schedule():
+    schedule = IntervalSchedule(300)
+    schedule.observe(0, fake_status(0, -1000))
+    assert schedule.next_delay(0) == 300
+
+
+def test_aligned_schedule_fallback():
+    schedule = CycleAlignedSchedule(fallback_interval=123)
+    assert schedule.next_delay(0) == 123
+
+
+@pytest.mark.parametrize("boot", [-12345.6, -7.2, -100000])
+def test_aligned_schedule_from_uptime(boot: float):
+    schedule = CycleAlignedSchedule(margin=5)
+    now = 0.0
+    reads: list[float] = []
+    for _ in range(20):
+        schedule.observe(now, fake_status(now, boot))
+        reads.append(now)
+        now += schedule.next_delay(now)
+
+    # one read per cycle once offset is learned, at most uptime resolution + margin after update
+    assert all(b - a == pytest.approx(600) for a, b in zip(reads[14:], reads[15:]))
+    staleness = (reads[-1] - boot) % 600
+    assert 5 <= staleness <= 65
+
+
+def test_aligned_schedule_narrows_boot_time():
+    boot = -12345.6
+    schedule = CycleAlignedSchedule()
+    for now in [0, 17, 33, 48]:
+        schedule.observe(now, fake_status(now, boot))
+    assert schedule.boot is not None
+    assert schedule.boot[0] <= boot <= schedule.boot[1]
+    assert schedule.boot[1] - schedule.boot[0] <= 20
+
+
+def test_aligned_schedule_learns_offset_from_changes():
+    boot, offset = -12345.6, 200
+    schedule = CycleAlignedSchedule(margin=5)
+    # reads close to each other around update reveal when measurement actually changes
+    for now in range(0, 900, 30):
+        schedule.observe(now, fake_status(now, boot, offset))
+
+    next_update = schedule.next_update(900)
+    assert next_update is not None
+    actual_update = boot + offset + ((900 - boot - offset) // 600 + 1) * 600
+    assert 0 <= next_update - actual_update <= 90
+
+
+@pytest.mark.parametrize("offset", [37, 200, 599])
+def test_aligned_schedule_learns_offset_in_steady_state(offset: float):
+    boot = -12345.6
+    schedule = CycleAlignedSchedule(margin=5, precision=30)
+    now = 0.0
+    reads: list[float] = []
+    while now < 6 * 3600:
+        schedule.observe(now, fake_status(now, boot, offset))
+        reads.append(now)
+        now += schedule.next_delay(now)
+
+    # probes bisect update window in the first hour and a half, then one read per cycle
+    assert len([read for read in reads if read >= 5400]) == (6 * 3600 - 5400) // 600
+    assert schedule.offset is not None
+    assert schedule.offset[1] - schedule.offset[0] <= 30
+    # reads follow the actual update, not boot time
+    assert all(5 <= (read - boot - offset) % 600 <= 65 for read in reads[-10:])
+
+
+def test_aligned_schedule_reboot():
+    schedule = CycleAlignedSchedule()
+    schedule.observe(0, fake_status(0, -100000))
+    schedule.observe(600, fake_status(600, 500))
+    assert schedule.boot == (480, 540)
+
+
+def level_status(level: float, alarm_level: float = 148) -> Any:
+    return {"latest_bq_m3": level, "alarm_level_bq_m3": alarm_level}
+
+
+def test_adaptive_schedule_backs_off_when_flat():
+    schedule = AdaptiveSchedule(min_interval=600, max_interval=3600, backoff=2)
+    delays: list[float] = []
+    for i in range(5):
+        schedule.observe(i * 600, level_status(20))
+        delays.append(schedule.next_delay(i * 600))
+    assert delays == [1200, 2400, 3600, 3600, 3600]
+
+
+def test_adaptive_schedule_speeds_up_when_rising():
+    schedule = AdaptiveSchedule(min_interval=600, max_interval=3600)
+    schedule.observe(0, level_status(20))
+    schedule.observe(3600, level_status(20))
+    assert schedule.next_delay(3600) == 2400
+
+    schedule.observe(7200, level_status(60))
+    assert schedule.rising
+    assert schedule.next_delay(7200) == 600
+
+
+def test_adaptive_schedule_speeds_up_near_alarm():
+    schedule = AdaptiveSchedule(min_interval=600, max_interval=3600)
+    schedule.observe(0, level_status(130, alarm_level=148))
+    schedule.observe(3600, level_status(130, alarm_level=148))
+    assert not schedule.rising
+    assert schedule.near_alarm
+    assert schedule.next_delay(3600) == 600
+    assert schedule.priority() > AdaptiveSchedule().priority()
+
+
+@pytest.mark.asyncio
+async def test_airtime_budget_limits_rate_and_prefers_priority():
+    budget = AirtimeBudget(reads_per_hour=3600 * 50)  # one read per 20ms
+    granted: list[str] = []
+
+    async def read(name: str, priority: float):
+        await budget.acquire(priority)
+        granted.append(name)
+
+    await read("first", 0)
+    tasks = [
+        asyncio.create_task(read("low", 0)),
+        asyncio.create_task(read("high", 2)),
+        asyncio.create_task(read("mid", 1)),
+    ]
+    await asyncio.sleep(0.01)
+    assert granted == ["first"]
+
+    await asyncio.gather(*tasks)
+    assert granted == ["first", "high", "mid", "low"]
@@ -0,0 +1,220 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from radoneye.client import RadonEyeClient
+from radoneye.clock import VirtualClock, run_virtual
+from radoneye.interface_v2 import CHAR_HISTORY, COMMAND_HISTORY
+from radoneye.model import RadonEyeHistoryProgress
+from radoneye.simulator import SimulatedClient, SimulatedDevice
+
+
+def simulated_client(device: SimulatedDevice, drop_rate: float = 0) -> RadonEyeClient:
+    link = SimulatedClient(device, latency=0, jitter=0, connect_latency=0, drop_rate=drop_rate)
+    return RadonEyeClient("simulated", status_read_timeout=1, history_read_timeout=1, client=link)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "version,model,serial",
+    [
+        (1, "RD200", "RU22012020159"),
+        (2, "RD200N", "RU22201030383"),
+        (2, "RD200V3", "IJ01RE001404"),
+    ],
+)
+async def test_status_and_history(version: int, model: str, serial: str):
+    uptime_minutes = 3 * 24 * 60
+    device = SimulatedDevice(version, model=model, uptime_minutes=uptime_minutes)  # type: ignore
+
+    async with simulated_client(device) as client:
+        status = await client.status()
+        history = await client.history()
+
+    assert status["serial"] == serial
+    assert status["model"] == model
+    assert status["uptime_minutes"] == uptime_minutes
+    assert status["month_avg_bq_m3"] == 0  # less than 30 days of uptime
+    assert len(history["values_bq_m3"]) == 3 * 24
+    assert history["values_bq_m3"] == pytest.approx(device.history(), abs=1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("version", [1, 2])
+async def test_commands(version: int):
+    device = SimulatedDevice(version=version)  # type: ignore
+
+    async with simulated_client(device) as client:
+        await client.beep()
+        await client.set_alarm(enabled=False, level=2.0, unit="pci/l", interval=10)
+        await client.set_unit("bq/m3")
+        status = await client.status()
+
+    assert device.beeps == 1
+    assert status["alarm_enabled"] is False
+    assert status["alarm_level_pci_l"] == 2.0
+    assert status["alarm_interval_minutes"] == 10
+    assert status["display_unit"] == "bq/m3"
+
+
+def test_history_chunking():
+    device = SimulatedDevice(version=2, uptime_minutes=100 * 60)
+
+    # 100 - 3 (ATT header) - 4 (page header) bytes leave room for 46 values per page
+    pages = device.handle(bytes([COMMAND_HISTORY]), mtu=100)
+    assert [(uuid, page[1], page[2], page[3]) for uuid, page in pages] == [
+        (CHAR_HISTORY, 3, 1, 46),
+        (CHAR_HISTORY, 3, 2, 46),
+        (CHAR_HISTORY, 3, 3, 8),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_history_small_mtu():
+    # 90 days in pages of 8 values would be more than 255 pages
+    device = SimulatedDevice(version=2, uptime_minutes=90 * 24 * 60)
+    link = SimulatedClient(device, latency=0, jitter=0, connect_latency=0, mtu=23)
+
+    async with RadonEyeClient("simulated", client=link) as client:
+        history = await client.history()
+
+    assert len(history["values_bq_m3"]) == 90 * 24
+    assert history["values_bq_m3"] == pytest.approx(device.history(), abs=1)
+
+
+def test_history_max_size():
+    device = SimulatedDevice(version=2, uptime_minutes=400 * 24 * 60)
+
+    # the oldest values are dropped, the rest is the same
+    history = list(device.history())
+    assert len(history) == 365 * 24
+    assert history[-1] == SimulatedDevice(version=2, uptime_minutes=400 * 24 * 60).history()[-1]
+
+    device.initial_uptime_minutes += 60
+    assert len(device.history()) == 365 * 24
+    assert device.history()[-2] == history[-1]
+
+
+@pytest.mark.asyncio
+async def test_notification_order():
+    # jitter makes many pages due at the same time, they still have to arrive in order
+    async def read_history(seed: int):
+        device = SimulatedDevice(version=2, uptime_minutes=30 * 24 * 60)
+        link = SimulatedClient(
+            device, latency=0.01, jitter=0.01, connect_latency=0, mtu=40, seed=seed
+        )
+        async with RadonEyeClient("simulated", history_read_timeout=1, client=link) as client:
+            return await client.history()
+
+    histories = await asyncio.gather(*[read_history(seed) for seed in range(10)])
+
+    assert all(len(history["values_bq_m3"]) == 30 * 24 for history in histories)
+
+
+@pytest.mark.asyncio
+async def test_dropped_notifications():
+    device = SimulatedDevice(version=2)
+
+    async with simulated_client(device, drop_rate=1) as client:
+        with pytest.raises(asyncio.TimeoutError):
+            await client.status()
+
+
+def test_history_retries_dropped_pages():
+    device = SimulatedDevice(version=2, uptime_minutes=30 * 24 * 60)
+    link = SimulatedClient(
+        device, latency=0, jitter=0, connect_latency=0, mtu=40, drop_rate=0.1, seed=1
+    )
+    clock = VirtualClock()
+    progress: list[RadonEyeHistoryProgress] = []
+
+    async def main():
+        async with RadonEyeClient(
+            "simulated", history_read_timeout=1, client=link, clock=clock
+        ) as client:
+            return await client.history(retries=5, progress=progress.append)
+
+    history = run_virtual(main())
+
+    # lost pages are taken from the attempt that got them
+    assert link.dropped > 0
+    assert progress[-1].received == progress[-1].expected
+    assert history["values_bq_m3"] == pytest.approx(device.history(), abs=1)
+
+
+def test_history_retries_disconnect():
+    device = SimulatedDevice(version=1, uptime_minutes=30 * 24 * 60)
+    link = SimulatedClient(device, latency=0, jitter=0, connect_latency=0, disconnect_after=20)
+    clock = VirtualClock()
+
+    async def main():
+        async with RadonEyeClient(
+            "simulated", history_read_timeout=1, client=link, clock=clock
+        ) as client:
+            history = await client.history(retries=1)
+            assert client.is_connected  # reconnected after link was lost
+            return history
+
+    history = run_virtual(main())
+
+    assert link.writes == 4  # E8 and E9 for both attempts
+    assert history["values_bq_m3"] == pytest.approx(device.history(), abs=1)
+
+
+def test_history_retries_exhausted():
+    device = SimulatedDevice(version=2)
+    link = SimulatedClient(device, latency=0, jitter=0, connect_latency=0, drop_rate=1)
+    clock = VirtualClock()
+
+    async def main():
+        async with RadonEyeClient(
+            "simulated", status_read_timeout=5, history_read_timeout=60, client=link, clock=clock
+        ) as client:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.history(retries=2, progress=lambda progress: None)
+            return clock.monotonic()
+
+    # status for progress is never received, each attempt waits for status timeout, backoff is 1
+    # and 2 sec
+    assert run_virtual(main()) == 3 * 5 + 1 + 2
+    assert link.writes == 3
+
+
+@pytest.mark.asyncio
+async def test_history_retries_only_lost_data():
+    device = SimulatedDevice(version=2)
+    link = SimulatedClient(device, latency=0, jitter=0, connect_latency=0)
+
+    async with RadonEyeClient("simulated", client=link) as client:
+        with patch.object(
+            link, "write_gatt_char", AsyncMock(side_effect=ValueError("Unknown characteristic"))
+        ) as write_gatt_char:
+            with pytest.raises(ValueError):
+                await client.history(retries=2)
+
+    # error that is not a timeout or lost link would happen again
+    assert write_gatt_char.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("version", [1, 2])
+async def test_history_progress(version: int):
+    device = SimulatedDevice(version, uptime_minutes=30 * 24 * 60)  # type: ignore
+    progress: list[RadonEyeHistoryProgress] = []
+
+    async with simulated_client(device) as client:
+        await client.history(progress=progress.append)
+
+    # size is known before history data (v1 E8 message, v2 status)
+    assert {item.expected for item in progress} == {30 * 24}
+    assert progress[0].received == 0
+    received = [item.received for item in progress]
+    assert received == sorted(received)
+    assert received[-1] == 30 * 24
+    assert progress[-1].bytes > 30 * 24 * 2
+
+
+def test_history_progress_throughput():
+    assert RadonEyeHistoryProgress(1, 3, 504, 2).throughput == 252
+    assert RadonEyeHistoryProgress(0, 0, 0, 0).throughput == 0